@@ -0,0 +1,57 @@
+"""
+Login throughput of argon2 verify with different process pool sizes,
+under a burst of concurrent requests served by a pool of threads
+
+usage: PYTHONPATH=. python benchmarks/argon2_pool.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from flaskel.ext.crypto.argon import Argon2
+from flaskel.http.exceptions import ServiceUnavailable
+
+LOGINS = 64
+REQUEST_THREADS = 16
+POOL_SIZES = (0, 1, 2, 4)
+
+
+def login(argon: Argon2, hashed: str) -> bool:
+    try:
+        return argon.verify(hashed, "password")
+    except ServiceUnavailable:
+        return False
+
+
+def run(pool_size: int):
+    app = Flask(__name__)
+    app.config.update(
+        ARGON2_POOL_SIZE=pool_size,
+        ARGON2_POOL_MAX_PENDING=2 * pool_size,
+        ARGON2_POOL_TIMEOUT=2,
+    )
+    argon = Argon2(app)
+    hashed = argon.hash("password")  # starts the workers
+
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as threads:
+        start = time.perf_counter()
+        results = list(threads.map(lambda _: login(argon, hashed), range(LOGINS)))
+        elapsed = time.perf_counter() - start
+
+    argon.shutdown()
+    served = results.count(True)
+    print(
+        f"pool size {pool_size}: {served / elapsed:7.2f} logins/s"
+        f"  rejected {LOGINS - served:3d}/{LOGINS}  in {elapsed:5.2f}s"
+    )
+
+
+def main():
+    for size in POOL_SIZES:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Coroutine views: dispatch overhead with an event loop per call (asgiref)
+and with the loop shared by the request threads (ASYNC_SHARED_LOOP),
+and latency of a view that waits for several slow upstream calls
+
+usage: PYTHONPATH=. python benchmarks/async_views.py
+"""
+
+import asyncio
+import time
+import timeit
+
+from flaskel import Flaskel
+
+NUMBER = 2000
+UPSTREAM_CALLS = 10
+UPSTREAM_LATENCY = 0.05
+
+
+def create_app(shared_loop: bool) -> Flaskel:
+    app = Flaskel(__name__)
+    app.config["ASYNC_SHARED_LOOP"] = shared_loop
+
+    @app.route("/sync")
+    def sync_view():
+        return {}
+
+    @app.route("/async")
+    async def async_view():
+        return {}
+
+    @app.route("/sync/upstream")
+    def sync_upstream():
+        for _ in range(UPSTREAM_CALLS):
+            time.sleep(UPSTREAM_LATENCY)
+        return {}
+
+    @app.route("/async/upstream")
+    async def async_upstream():
+        calls = (asyncio.sleep(UPSTREAM_LATENCY) for _ in range(UPSTREAM_CALLS))
+        await asyncio.gather(*calls)
+        return {}
+
+    return app
+
+
+def main():
+    for shared_loop in (False, True):
+        app = create_app(shared_loop)
+        client = app.test_client()
+        label = "shared loop" if shared_loop else "loop per call"
+        for url in ("/sync", "/async"):
+            elapsed = timeit.timeit(lambda: client.get(url), number=NUMBER)
+            print(f"{label:14s} {url:16s} {elapsed / NUMBER * 10**6:8.1f} us/request")
+        app.event_loop.stop()
+
+    client = create_app(True).test_client()
+    for url in ("/sync/upstream", "/async/upstream"):
+        elapsed = timeit.timeit(lambda: client.get(url), number=5)
+        print(
+            f"{UPSTREAM_CALLS} upstream calls {url:16s} {elapsed / 5 * 10**3:6.1f} ms/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Body size, encode and decode time of a service to service payload:
+json (JSON_ENGINE) vs msgpack vs cbor
+
+usage: PYTHONPATH=. python benchmarks/binary_formats.py
+"""
+
+import timeit
+
+from flaskel.utils.binary import FORMATS
+from flaskel.utils.jsonengine import get_engine
+
+NUMBER = 50
+PAYLOAD = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "result": [
+        {"id": i, "name": f"item-{i}", "price": i / 100, "tags": ["a", "b"]}
+        for i in range(5000)
+    ],
+}
+
+
+def bench(name: str, dumps, loads):
+    data = dumps(PAYLOAD)
+    assert loads(data)["result"][-1]["id"] == 4999
+    encode = timeit.timeit(lambda: dumps(PAYLOAD), number=NUMBER) / NUMBER
+    decode = timeit.timeit(lambda: loads(data), number=NUMBER) / NUMBER
+    print(
+        f"{name:8s} size {len(data) / 1024:7.1f} KiB  "
+        f"encode {encode * 10**3:6.2f} ms  decode {decode * 10**3:6.2f} ms"
+    )
+
+
+def main():
+    engine = get_engine()
+    bench("json", engine.dumpb, engine.loads)
+    for binary_format in FORMATS.values():
+        bench(binary_format.name, binary_format.dumps, binary_format.loads)
+
+
+if __name__ == "__main__":
+    main()
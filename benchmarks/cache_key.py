@@ -0,0 +1,47 @@
+"""
+Per request cost of Caching.make_cache_key, before and after fixed length keys
+
+usage: PYTHONPATH=. python benchmarks/cache_key.py
+"""
+
+import timeit
+from base64 import b64encode
+
+from flaskel import Flaskel, request
+from flaskel.ext.caching import Caching
+
+NUMBER = 20000
+QUERY = "&".join(f"filter_{i}=value-{i}" for i in range(50))
+HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+
+
+def legacy_make_cache_key(cache: Caching) -> str:
+    """make_cache_key as it was: base64 of the whole query string and headers"""
+    tokens = []
+    for param, value in request.args.items(multi=True):
+        tokens.extend(f"{param}={v}" for v in value)
+    query = "&".join(sorted(tokens))
+    headers = cache.make_headers_string(cache.headers_in_keys, "/")
+    hashed = b64encode(f"{query}/{headers}".encode()).decode()
+    return f"{cache.key_prefix}/{request.base_url.rstrip('/')}/{hashed}"
+
+
+def bench(name: str, func):
+    elapsed = timeit.timeit(func, number=NUMBER)
+    key = func()
+    print(f"{name:20s} {elapsed / NUMBER * 10**6:8.2f} us/call  key length: {len(key)}")
+
+
+def main():
+    app = Flaskel(__name__)
+    cache = Caching()
+    template = cache.key_template(query=("filter_1", "filter_2"))
+
+    with app.test_request_context(f"/items?{QUERY}", headers=HEADERS):
+        bench("legacy", lambda: legacy_make_cache_key(cache))
+        bench("make_cache_key", cache.make_cache_key)
+        bench("key_template", template)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Payload size, build and client parse time of a 100k rows export:
+csv vs arrow ipc stream vs parquet
+
+usage: PYTHONPATH=. python benchmarks/columnar_builders.py
+"""
+
+import csv
+import io
+import time
+
+import pyarrow
+from pyarrow import ipc, parquet
+
+from flaskel.ext.response.builders import ArrowBuilder, CsvBuilder, ParquetBuilder
+
+ROWS = 100_000
+CONF = {"RB_ARROW_BATCH_SIZE": 2**16, "RB_PARQUET_COMPRESSION": "snappy"}
+
+
+def iter_rows():
+    for i in range(ROWS):
+        yield {
+            "id": i,
+            "name": f"name-{i % 1000}",
+            "price": i / 100,
+            "enabled": bool(i % 2),
+            "address": {"city": f"city-{i % 50}", "zip": f"{i % 99999:05}"},
+        }
+
+
+def parse_csv(data: bytes):
+    reader = csv.DictReader(io.StringIO(data.decode()), delimiter=";")
+    return [{**r, "id": int(r["id"]), "price": float(r["price"])} for r in reader]
+
+
+def bench(name: str, builder, parse):
+    start = time.perf_counter()
+    data = b"".join(
+        c if isinstance(c, bytes) else c.encode() for c in builder.build(iter_rows())
+    )
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = parse(data)
+    parsed = time.perf_counter() - start
+    assert len(rows) == ROWS
+    print(
+        f"{name:8s} size {len(data) / 2**20:6.2f} MiB  "
+        f"build {built * 10**3:7.1f} ms  parse {parsed * 10**3:7.1f} ms"
+    )
+
+
+def main():
+    bench("csv", CsvBuilder("text/csv", **CONF), parse_csv)
+    bench(
+        "arrow",
+        ArrowBuilder("application/vnd.apache.arrow.stream", **CONF),
+        lambda d: ipc.open_stream(d).read_all(),
+    )
+    bench(
+        "parquet",
+        ParquetBuilder("application/vnd.apache.parquet", **CONF),
+        lambda d: parquet.read_table(pyarrow.BufferReader(d)),
+    )
+
+
+if __name__ == "__main__":
+    main()
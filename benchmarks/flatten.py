@@ -0,0 +1,56 @@
+"""
+Flattening of 100k nested records: generic walk vs compiled plan
+
+usage: PYTHONPATH=. python benchmarks/flatten.py
+"""
+
+import functools
+import timeit
+
+from flaskel.ext.response.builders import CsvBuilder
+from flaskel.ext.response.dictutils import (
+    _expand_lists,
+    _flatten_dict,
+    FlattenPlan,
+    to_flatten,
+)
+
+NUMBER = 3
+RECORDS = [
+    {
+        "id": i,
+        "name": f"name-{i}",
+        "price": i / 100,
+        "enabled": bool(i % 2),
+        "address": {"city": "city", "zip": "00100", "geo": {"lat": 1.0, "lon": 2.0}},
+        "meta": {"created": "2022-01-01", "updated": None},
+    }
+    for i in range(100_000)
+]
+PLAN = FlattenPlan.from_record(RECORDS[0])
+
+
+def legacy_flatten(data):
+    """to_flatten as it was: every record is walked"""
+    rows = []
+    for item in data:
+        rows.extend(_expand_lists(_flatten_dict(dict(item), "", "_"), "_"))
+    return rows
+
+
+def bench(name: str, func):
+    elapsed = timeit.timeit(func, number=NUMBER) / NUMBER
+    print(f"{name:20s} {elapsed * 10**3:8.1f} ms")
+
+
+def main():
+    plan_flatten = functools.partial(to_flatten, plan=PLAN)
+    assert legacy_flatten(RECORDS) == plan_flatten(RECORDS), "not equivalent"
+    bench("legacy flatten", lambda: legacy_flatten(RECORDS))
+    bench("plan flatten", lambda: plan_flatten(RECORDS))
+    bench("legacy csv", lambda: CsvBuilder.to_csv(legacy_flatten(RECORDS)))
+    bench("plan csv", lambda: CsvBuilder.to_csv(plan_flatten(RECORDS)))
+
+
+if __name__ == "__main__":
+    main()
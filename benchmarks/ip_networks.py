@@ -0,0 +1,44 @@
+"""
+Per check cost of the ip whitelist, before and after the network index
+
+usage: PYTHONPATH=. python benchmarks/ip_networks.py
+"""
+
+import ipaddress
+import timeit
+
+from flaskel.utils.netindex import NetworkIndex
+
+NUMBER = 20000
+NETWORKS = [f"10.{i}.0.0/16" for i in range(200)] + [
+    f"2001:db8:{i:x}::/48" for i in range(200)
+]
+ADDRESSES = ("10.150.1.1", "192.168.1.1", "2001:db8:c7::1")
+
+
+def legacy_is_whitelisted(networks, ip: str) -> bool:
+    """IpBanService.is_whitelisted as it was: a containment check per network"""
+    ip_addr = ipaddress.ip_address(ip)
+    for net in networks:
+        if ip_addr in net:
+            return True
+    return False
+
+
+def main():
+    networks = {ipaddress.ip_network(n) for n in NETWORKS}
+    index = NetworkIndex(networks)
+
+    for ip in ADDRESSES:
+        legacy = timeit.timeit(
+            lambda: legacy_is_whitelisted(networks, ip), number=NUMBER
+        )
+        indexed = timeit.timeit(lambda: ip in index, number=NUMBER)
+        print(
+            f"{ip:16s} legacy {legacy / NUMBER * 10**6:8.2f} us/check"
+            f"  index {indexed / NUMBER * 10**6:6.2f} us/check"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Serialization cost of the json engines on a catalog-like payload
+
+usage: PYTHONPATH=. python benchmarks/json_engine.py
+"""
+
+import datetime
+import timeit
+import uuid
+from decimal import Decimal
+
+from vbcore.datastruct import ObjectDict
+
+from flaskel.utils.jsonengine import get_engine
+
+NUMBER = 200
+PAYLOAD = [
+    ObjectDict(
+        id=i,
+        uuid=uuid.uuid4(),
+        name=f"item-{i}",
+        price=Decimal("9.99"),
+        created=datetime.datetime(2022, 1, 1, 12, 0, i % 60),
+        tags=["a", "b", "c"],
+        attrs={"color": "red", "size": i % 10, "enabled": bool(i % 2)},
+    )
+    for i in range(1000)
+]
+
+
+def bench(name: str, func):
+    elapsed = timeit.timeit(func, number=NUMBER)
+    print(f"{name:20s} {elapsed / NUMBER * 10**3:8.2f} ms/call")
+
+
+def main():
+    stdlib, fast = get_engine("stdlib"), get_engine("orjson")
+    std_data, fast_data = stdlib.dumps(PAYLOAD), fast.dumpb(PAYLOAD)
+
+    expected = stdlib.loads(std_data)
+    for item in expected:
+        item["uuid"] = str(uuid.UUID(item["uuid"]))
+    assert fast.loads(fast_data) == expected, "engines are not equivalent"
+
+    bench("stdlib dumps", lambda: stdlib.dumps(PAYLOAD))
+    bench("orjson dumps", lambda: fast.dumpb(PAYLOAD))
+    bench("stdlib loads", lambda: stdlib.loads(std_data))
+    bench("orjson loads", lambda: fast.loads(fast_data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput of the response builders served by one gunicorn worker,
+sync versus gthread, while checking that no response gets the
+mimetype or the headers of a concurrent one
+
+usage: PYTHONPATH=. python benchmarks/response_builders.py
+"""
+
+import http.client
+import os
+import subprocess  # nosec
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+
+from flaskel.ext.response.builder import ResponseBuilder
+
+HOST = "127.0.0.1"
+PORT = 5099
+REQUESTS = 2000
+CLIENTS = 16
+IO_WAIT = 0.002  # simulates a query before building the response
+URLS = {
+    "/json": "application/json",
+    "/json?callback=cb": "application/javascript",
+    "/csv": "text/csv",
+}
+
+app = flask.Flask(__name__)
+rb = ResponseBuilder(app)
+rows = [{"id": i, "name": f"name-{i}"} for i in range(100)]
+
+
+@app.route("/json")
+@rb.json()
+def view_json():
+    time.sleep(IO_WAIT)
+    return rows
+
+
+@app.route("/csv")
+def view_csv():
+    time.sleep(IO_WAIT)
+    return rb.csv(filename="rows")(data=rows)
+
+
+def fetch(url: str) -> bool:
+    conn = http.client.HTTPConnection(HOST, PORT)
+    try:
+        conn.request("GET", url)
+        res = conn.getresponse()
+        res.read()
+        mimetype = res.getheader("Content-Type", "").split(";")[0]
+        total_rows = res.getheader("X-Total-Rows")
+        return mimetype == URLS[url] and (total_rows is not None) == (url == "/csv")
+    finally:
+        conn.close()
+
+
+def wait_ready(timeout: float = 10):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            fetch("/json")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server not started")
+
+
+def bench(name: str, *options: str):
+    server = subprocess.Popen(  # nosec
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--chdir",
+            os.path.dirname(os.path.abspath(__file__)),
+            "--bind",
+            f"{HOST}:{PORT}",
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+            *options,
+            "response_builders:app",
+        ]
+    )
+    try:
+        wait_ready()
+        urls = list(URLS) * (REQUESTS // len(URLS))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CLIENTS) as executor:
+            results = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    errors = results.count(False)
+    print(f"{name:10s} {len(urls) / elapsed:8.1f} req/s  inconsistent: {errors}")
+
+
+def main():
+    bench("sync", "--worker-class", "sync")
+    bench("gthread", "--worker-class", "gthread", "--threads", str(CLIENTS))
+
+
+if __name__ == "__main__":
+    main()
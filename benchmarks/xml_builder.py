@@ -0,0 +1,52 @@
+"""
+Whole document vs streamed XmlBuilder for a 100k rows export:
+total time, time to first byte and peak of traced memory
+
+usage: PYTHONPATH=. python benchmarks/xml_builder.py
+"""
+
+import datetime
+import time
+import tracemalloc
+
+from flaskel.ext.response.builders import XmlBuilder
+
+ROWS = 100_000
+
+
+def iter_rows():
+    for i in range(ROWS):
+        yield {
+            "id": i,
+            "name": f"name-{i}",
+            "price": i / 100,
+            "enabled": bool(i % 2),
+            "created": datetime.date(2022, 1, 1),
+            "tags": ["a", "b"],
+        }
+
+
+def bench(name: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first, size = None, 0
+    for chunk in func():
+        first = first or time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:10s} total {elapsed:6.2f} s  first byte {first:6.3f} s  "
+        f"peak {peak / 2**20:7.1f} MiB  size {size / 2**20:6.1f} MiB"
+    )
+
+
+def main():
+    builder = XmlBuilder("application/xml", RB_XML_ROOT="ROOT")
+    bench("document", lambda: [builder.build(list(iter_rows())).encode()])
+    bench("stream", lambda: builder.build(iter_rows()))
+
+
+if __name__ == "__main__":
+    main()
@@ -214,10 +214,11 @@ class AppBuilder:
     def register_middlewares(self):
         for m in self._middlewares:
             m, kwargs = self.normalize_tuple(m)
-            if isinstance(m, BaseMiddleware):
-                m.flask_app = self._app
+            wsgi_app = m(self._app.wsgi_app, **kwargs)
+            if isinstance(wsgi_app, BaseMiddleware):
+                wsgi_app.flask_app = self._app
 
-            self._app.wsgi_app = m(self._app.wsgi_app, **kwargs)
+            self._app.wsgi_app = wsgi_app
             self._app.logger.debug("Registered middleware: '%s'", m.__name__)
 
     def register_views(self):
@@ -45,6 +45,7 @@ JWT_ACCESS_TOKEN_EXPIRES = config(
 JWT_REFRESH_TOKEN_EXPIRES = config(
     "JWT_REFRESH_TOKEN_EXPIRES", default=Seconds.day * 14, cast=int
 )
+JWT_DECODED_CACHE_SIZE = config("JWT_DECODED_CACHE_SIZE", default=0, cast=int)
 
 SQLALCHEMY_DATABASE_URI = config("DATABASE_URL", default="sqlite:///db.sqlite")
 
@@ -133,6 +134,7 @@ HTTP_DUMP_BODY = [
 MAX_CONTENT_LENGTH = config("MAX_CONTENT_LENGTH", default=10 * 10**6, cast=int)
 USE_X_SENDFILE = config("USE_X_SENDFILE", default=not DEBUG, cast=bool)
 ENABLE_ACCEL = config("ENABLE_ACCEL", default=True, cast=bool)
+SEND_FILE_PRECOMPRESSED = config("SEND_FILE_PRECOMPRESSED", default=True, cast=bool)
 ACCEL_BUFFERING = True
 ACCEL_CHARSET = "utf-8"
 ACCEL_LIMIT_RATE = "off"
@@ -168,7 +170,15 @@ SECRET_KEY_FILE_NAME = ".secret.key"  # nosec
 SECRET_KEY_MIN_LENGTH = 256
 RB_DEFAULT_ACCEPTABLE_MIMETYPES = [
     ContentTypeEnum.JSON,
+    "application/x-ndjson",
 ]
+RB_CONDITIONAL_ENABLED = config("RB_CONDITIONAL_ENABLED", default=False, cast=bool)
+JSON_ENGINE = config(
+    "JSON_ENGINE",
+    default="stdlib",
+    cast=decouple.Choices(["auto", "stdlib", "orjson"]),
+)
+ASYNC_SHARED_LOOP = config("ASYNC_SHARED_LOOP", default=False, cast=bool)
 
 PRETTY_DATE = "%d %B %Y %I:%M %p"
 DATE_ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
@@ -188,7 +198,16 @@ RATELIMIT_STORAGE_OPTIONS = {
 IPBAN_ENABLED = config("IPBAN_ENABLED", default=True, cast=bool)
 IPBAN_COUNT = config("IPBAN_COUNT", default=20, cast=int)
 IPBAN_SECONDS = config("IPBAN_SECONDS", default=Seconds.hour, cast=int)
+IPBAN_SCORING = config("IPBAN_SCORING", default="counter")
+IPBAN_CLEAN_TTL = config("IPBAN_CLEAN_TTL", default=0, cast=float)
+IPBAN_FLUSH_INTERVAL = config("IPBAN_FLUSH_INTERVAL", default=0, cast=float)
 IPBAN_STATUS_CODE = config("IPBAN_STATUS_CODE", default=403, cast=int)
+IPBAN_WHITELIST_SOURCES = config(
+    "IPBAN_WHITELIST_SOURCES", default="", cast=decouple.Csv()
+)
+IPBAN_BLACKLIST_SOURCES = config(
+    "IPBAN_BLACKLIST_SOURCES", default="", cast=decouple.Csv()
+)
 IPBAN_CHECK_CODES = config(
     "IPBAN_CHECK_CODES",
     default="404,405,501",
@@ -215,6 +234,39 @@ CACHE_REDIS_URL = config("CACHE_REDIS_URL", default=REDIS_URL)
 CACHE_DISABLED = config("CACHE_DISABLED", default=False, cast=bool)
 CACHE_DEFAULT_TIMEOUT = config("CACHE_DEFAULT_TIMEOUT", default=Seconds.hour, cast=int)
 CACHE_KEY_PREFIX = config("CACHE_KEY_PREFIX", default=APP_NAME)
+CACHE_L1_ENABLED = config("CACHE_L1_ENABLED", default=False, cast=bool)
+CACHE_L1_MAX_BYTES = config("CACHE_L1_MAX_BYTES", default=32 * 2**20, cast=int)
+CACHE_L1_TIMEOUT = config("CACHE_L1_TIMEOUT", default=5, cast=int)
+CACHE_L1_INVALIDATION = config(
+    "CACHE_L1_INVALIDATION",
+    default="local",
+    cast=decouple.Choices(["local", "redis"]),
+)
+CACHE_SINGLE_FLIGHT = config("CACHE_SINGLE_FLIGHT", default=False, cast=bool)
+CACHE_LOCK_BACKEND = config(
+    "CACHE_LOCK_BACKEND",
+    default="local",
+    cast=decouple.Choices(["local", "redis"]),
+)
+CACHE_LOCK_TIMEOUT = config("CACHE_LOCK_TIMEOUT", default=5, cast=float)
+CACHE_STALE_TIMEOUT = config("CACHE_STALE_TIMEOUT", default=0, cast=int)
+CACHE_STALE_WHILE_REVALIDATE = config(
+    "CACHE_STALE_WHILE_REVALIDATE", default=True, cast=bool
+)
+CACHE_STALE_IF_ERROR = config("CACHE_STALE_IF_ERROR", default=True, cast=bool)
+CACHE_REFRESH_WORKERS = config("CACHE_REFRESH_WORKERS", default=4, cast=int)
+CACHE_ETAG_ENABLED = config("CACHE_ETAG_ENABLED", default=False, cast=bool)
+CACHE_TAG_INDEX = config(
+    "CACHE_TAG_INDEX",
+    default="local",
+    cast=decouple.Choices(["local", "redis"]),
+)
+CACHE_CODEC = config(
+    "CACHE_CODEC",
+    default="",
+    cast=decouple.Choices(["", "identity", "gzip", "zstd"]),
+)
+CACHE_CODEC_MIN_SIZE = config("CACHE_CODEC_MIN_SIZE", default=1024, cast=int)
 CACHE_OPTIONS = {
     "socket_timeout": REDIS_OPTS["socket_connect_timeout"],
     "socket_connect_timeout": REDIS_OPTS["socket_connect_timeout"],
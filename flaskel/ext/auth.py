@@ -1,8 +1,12 @@
 import dataclasses
 import functools
+import hashlib
+import threading
+import time
 import typing as t
-from datetime import timedelta
+from datetime import datetime, timedelta
 
+import jwt
 import sqlalchemy as sa
 from flask_httpauth import HTTPBasicAuth
 from flask_jwt_extended import (
@@ -14,15 +18,87 @@ from flask_jwt_extended import (
     jwt_required,
     JWTManager,
 )
+from flask_jwt_extended.config import config as jwt_config
 from vbcore.base import BaseDTO
-from vbcore.datastruct import ObjectDict
+from vbcore.datastruct import LRUCache, ObjectDict
 from vbcore.db.mixins import StandardMixin
 from vbcore.http import httpcode
 
 from flaskel.flaskel import cap
 from flaskel.http.exceptions import abort
-
-token_auth: JWTManager = JWTManager()
+from flaskel.utils.datastruct import BloomFilter
+
+RevokedLoader = t.Callable[[t.Any], t.Tuple[t.Iterable[str], t.Any]]
+
+
+class CachedJWTManager(JWTManager):
+    """
+    Keeps the claims of the verified tokens, keyed by a digest of the token,
+    until they expire: the signature of a token reused by a client is
+    verified once (JWT_DECODED_CACHE_SIZE entries, 0 disables the cache).
+    Tokens created by the app are cached from their own claims.
+
+    Only the signature verification is cached: flask_jwt_extended checks the
+    blocklist after decoding on every request, so revoked tokens are
+    rejected even when their claims are cached
+    """
+
+    def __init__(self, app=None, **kwargs):
+        self._cache: t.Optional[LRUCache] = None
+        self._cache_lock = threading.Lock()
+        super().__init__(app, **kwargs)
+
+    def init_app(self, app, add_context_processor: bool = False):
+        super().init_app(app, add_context_processor)
+        app.config.setdefault("JWT_DECODED_CACHE_SIZE", 0)
+        size = app.config["JWT_DECODED_CACHE_SIZE"]
+        self._cache = LRUCache(size) if size else None
+
+    @staticmethod
+    def token_digest(encoded_token: str) -> bytes:
+        return hashlib.blake2b(encoded_token.encode(), digest_size=16).digest()
+
+    def cache_claims(self, encoded_token: str, claims: dict):
+        expires_at = claims.get("exp", float("inf")) + jwt_config.leeway
+        with self._cache_lock:
+            self._cache[self.token_digest(encoded_token)] = (claims, expires_at)
+
+    def cached_claims(self, encoded_token: str) -> t.Optional[dict]:
+        key = self.token_digest(encoded_token)
+        with self._cache_lock:
+            try:
+                claims, expires_at = self._cache[key]
+            except KeyError:
+                return None
+            if expires_at <= time.time():
+                del self._cache[key]
+                return None
+        return dict(claims)
+
+    def _encode_jwt_from_config(self, *args, **kwargs) -> str:
+        encoded_token = super()._encode_jwt_from_config(*args, **kwargs)
+        if self._cache is not None:
+            claims = jwt.decode(encoded_token, options={"verify_signature": False})
+            self.cache_claims(encoded_token, claims)
+        return encoded_token
+
+    def _decode_jwt_from_config(
+        self, encoded_token: str, csrf_value=None, allow_expired: bool = False
+    ) -> dict:
+        if self._cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(
+                encoded_token, csrf_value, allow_expired
+            )
+
+        claims = self.cached_claims(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            self.cache_claims(encoded_token, claims)
+            claims = dict(claims)
+        return claims
+
+
+token_auth: JWTManager = CachedJWTManager()
 basic_auth: HTTPBasicAuth = HTTPBasicAuth()
 
 
@@ -42,7 +118,15 @@ def invalid_token_loader(mess) -> t.Tuple[dict, int]:
 
 
 class RevokedTokenMixin(StandardMixin):
+    """
+    The blocklist filters read the revocations by creation time: ids and
+    creation times are assigned at insert, not at commit, so the rows created
+    up to revoked_overlap seconds before the cursor are read again, to get
+    the ones committed late
+    """
+
     jti = sa.Column(sa.String(120), nullable=False, unique=True)
+    revoked_overlap: t.ClassVar[int] = 60
 
     def __repr__(self):
         return f"<RevokedToken: {self.id} - {self.jti}>"
@@ -52,6 +136,117 @@ class RevokedTokenMixin(StandardMixin):
         # noinspection PyUnresolvedReferences
         return bool(cls.query.filter_by(jti=jti).first())
 
+    @classmethod
+    def revoked_query(cls):
+        # noinspection PyUnresolvedReferences
+        return cls.query.with_entities(cls.jti, cls.created_at)
+
+    @classmethod
+    def revoked_since(
+        cls, cursor: t.Optional[datetime] = None
+    ) -> t.Tuple[t.List[str], t.Optional[datetime]]:
+        """jtis of the tokens revoked after cursor, and the last creation time"""
+        query = cls.revoked_query()
+        if cursor is not None:
+            low = cursor - timedelta(seconds=cls.revoked_overlap)
+            query = query.filter(cls.created_at >= low)
+        rows = query.all()
+        created = (r.created_at for r in rows if r.created_at is not None)
+        return [r.jti for r in rows], max(created, default=cursor)
+
+
+class ExpiringRevokedTokenMixin(RevokedTokenMixin):
+    """
+    Keeps the exp claim of the revoked tokens: the expired ones are not
+    loaded by the blocklist filter and are deleted on revoke.
+    Existing tables need the new column, e.g.:
+
+        ALTER TABLE <table> ADD COLUMN expires_at INTEGER;
+        CREATE INDEX ix_<table>_expires_at ON <table> (expires_at);
+    """
+
+    expires_at = sa.Column(sa.Integer, nullable=True, index=True)  # exp claim
+
+    @classmethod
+    def revoked_query(cls):
+        return (
+            super()
+            .revoked_query()
+            .filter(sa.or_(cls.expires_at.is_(None), cls.expires_at > int(time.time())))
+        )
+
+    @classmethod
+    def purge_expired(cls):
+        # noinspection PyUnresolvedReferences
+        cls.query.filter(cls.expires_at <= int(time.time())).delete(
+            synchronize_session=False
+        )
+
+
+class RevokedTokenFilter:
+    """
+    Per worker bloom filter of the revoked jtis consulted before the store,
+    that is queried only if the jti may be revoked.
+
+    The loader returns the jtis revoked after a cursor and the new cursor,
+    all the ones not expired when the cursor is None: the filter loads
+    the new revocations every refresh_interval seconds and is rebuilt every
+    rebuild_interval seconds to drop the expired ones. Tokens revoked by
+    other workers are seen within refresh_interval; while the loader fails
+    every jti is checked by the store
+    """
+
+    def __init__(
+        self,
+        loader: RevokedLoader,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        refresh_interval: float = 1.0,
+        rebuild_interval: float = 3600.0,
+    ):
+        self.loader = loader
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._bloom: t.Optional[BloomFilter] = None
+        self._cursor: t.Any = None
+        self._refreshed_at = self._rebuilt_at = -rebuild_interval
+        self._lock = threading.Lock()
+
+    def refresh(self, rebuild: bool = False):
+        now = time.monotonic()
+        try:
+            if rebuild or self._bloom is None:
+                jtis, cursor = self.loader(None)
+                bloom = BloomFilter(self.capacity, self.error_rate)
+                bloom.update(jtis)
+                self._bloom, self._cursor, self._rebuilt_at = bloom, cursor, now
+            else:
+                jtis, self._cursor = self.loader(self._cursor)
+                self._bloom.update(jtis)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._bloom = None
+            cap.logger.exception(exc)
+        self._refreshed_at = now
+
+    def might_contain(self, jti: str) -> bool:
+        now = time.monotonic()
+        if now - self._refreshed_at >= self.refresh_interval:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.refresh(now - self._rebuilt_at >= self.rebuild_interval)
+                finally:
+                    self._lock.release()
+
+        bloom = self._bloom
+        return bloom is None or jti in bloom
+
+    def add(self, jti: str):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
 
 @dataclasses.dataclass(frozen=True)
 class TokenInfo(BaseDTO):
@@ -89,7 +284,19 @@ class TokenData(BaseDTO):
 
 
 class BaseTokenHandler:
-    def __init__(self, blocklist_loader: t.Optional[t.Callable] = None):
+    def __init__(
+        self,
+        blocklist_loader: t.Optional[t.Callable] = None,
+        blocklist_filter: t.Optional[dict] = None,
+    ):
+        """
+        :param blocklist_filter: options of RevokedTokenFilter, None disables it
+        """
+        self.blocklist_filter: t.Optional[RevokedTokenFilter] = None
+        if blocklist_filter is not None:
+            self.blocklist_filter = RevokedTokenFilter(
+                self.load_revoked, **blocklist_filter
+            )
         if blocklist_loader:
             token_auth.token_in_blocklist_loader(blocklist_loader)
 
@@ -97,6 +304,15 @@ class BaseTokenHandler:
         _ = jwt_headers, jwt_data
         return False
 
+    def may_be_revoked(self, jti: str) -> bool:
+        if self.blocklist_filter is None:
+            return True
+        return self.blocklist_filter.might_contain(jti)
+
+    def load_revoked(self, cursor: t.Any) -> t.Tuple[t.Iterable[str], t.Any]:
+        """must be implemented by subclass to use the blocklist filter"""
+        raise NotImplementedError  # pragma: no cover
+
     def revoke(self, token: t.Optional[str] = None):
         """can be implemented by subclass"""
 
@@ -204,30 +420,68 @@ class BaseTokenHandler:
 
 
 class DBTokenHandler(BaseTokenHandler):
-    def __init__(self, model, session, blocklist_loader: t.Optional[t.Callable] = None):
+    def __init__(
+        self,
+        model,
+        session,
+        blocklist_loader: t.Optional[t.Callable] = None,
+        blocklist_filter: t.Optional[dict] = None,
+    ):
         self.model = model
         self.session = session
-        super().__init__(blocklist_loader or self.check_token_block_listed)
+        super().__init__(
+            blocklist_loader or self.check_token_block_listed, blocklist_filter
+        )
 
     def check_token_block_listed(self, jwt_headers, jwt_data) -> bool:
+        if not self.may_be_revoked(jwt_data["jti"]):
+            return False
         return self.model.is_block_listed(jwt_data["jti"])
 
+    def load_revoked(self, cursor: t.Optional[datetime]):
+        return self.model.revoked_since(cursor)
+
     def revoke(self, token: t.Optional[str] = None):
         decoded_token = self.decode(token) if token else self.get_raw()
         if decoded_token.jti:
-            self.session.add(self.model(jti=decoded_token.jti))
+            if hasattr(self.model, "purge_expired"):
+                self.model.purge_expired()
+                entry = self.model(jti=decoded_token.jti, expires_at=decoded_token.exp)
+            else:
+                entry = self.model(jti=decoded_token.jti)
+            self.session.add(entry)
             self.session.commit()
+            if self.blocklist_filter is not None:
+                self.blocklist_filter.add(decoded_token.jti)
 
 
 class RedisTokenHandler(BaseTokenHandler):
+    """
+    Revoked tokens expire with the token, and are indexed by revocation
+    time in a sorted set, kept for the longest token lifetime, read
+    by the blocklist filters
+    """
+
     entry_value = "true"
     key_prefix = "token_revoked::"
+    index_key = "token_revoked"
+    clock_skew = 5
 
-    def __init__(self, redis, blocklist_loader: t.Optional[t.Callable] = None):
+    def __init__(
+        self,
+        redis,
+        blocklist_loader: t.Optional[t.Callable] = None,
+        blocklist_filter: t.Optional[dict] = None,
+    ):
         self.redis = redis
-        super().__init__(blocklist_loader or self.check_token_block_listed)
+        super().__init__(
+            blocklist_loader or self.check_token_block_listed, blocklist_filter
+        )
 
     def check_token_block_listed(self, jwt_headers, jwt_data) -> bool:
+        if not self.may_be_revoked(jwt_data["jti"]):
+            return False
+
         entry = self.redis.get(f"{self.key_prefix}{jwt_data['jti']}")
         if not entry:
             return False
@@ -236,6 +490,38 @@ class RedisTokenHandler(BaseTokenHandler):
             return entry == self.entry_value
         return entry == self.entry_value.encode()
 
+    def load_revoked(self, cursor: t.Optional[float]):
+        """the cursor is the last revocation time, minus the clock skew"""
+        low = "-inf" if cursor is None else cursor - self.clock_skew
+        entries = self.redis.zrangebyscore(self.index_key, low, "+inf", withscores=True)
+        jtis = [m.decode() if isinstance(m, bytes) else m for m, _ in entries]
+        return jtis, max((score for _, score in entries), default=cursor)
+
+    @staticmethod
+    def max_token_lifetime() -> t.Optional[int]:
+        lifetimes = []
+        for key in ("JWT_ACCESS_TOKEN_EXPIRES", "JWT_REFRESH_TOKEN_EXPIRES"):
+            value = cap.config.get(key)
+            if value is None or value is False:
+                return None
+            if isinstance(value, timedelta):
+                value = value.total_seconds()
+            lifetimes.append(int(value))
+        return max(lifetimes)
+
     def revoke(self, token: t.Optional[str] = None):
         decoded_token = self.decode(token) if token else self.get_raw()
-        self.redis.set(f"{self.key_prefix}{decoded_token.jti}", self.entry_value)
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.set(
+            f"{self.key_prefix}{decoded_token.jti}",
+            self.entry_value,
+            exat=decoded_token.exp,
+        )
+        pipe.zadd(self.index_key, {decoded_token.jti: now})
+        retention = self.max_token_lifetime()
+        if retention:
+            pipe.zremrangebyscore(self.index_key, "-inf", now - retention)
+        pipe.execute()
+        if self.blocklist_filter is not None:
+            self.blocklist_filter.add(decoded_token.jti)
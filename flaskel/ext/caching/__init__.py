@@ -0,0 +1,28 @@
+from .caching import Caching, KeySchema
+from .codecs import (
+    BaseCodec,
+    CachedResponse,
+    EncodedCache,
+    GzipCodec,
+    IdentityCodec,
+    ZstdCodec,
+)
+from .locking import KeyLocks, RedisKeyLocks
+from .policy import CachePolicy, MissHandler
+from .tags import (
+    BaseTagIndex,
+    LocalTagIndex,
+    model_tag,
+    model_tags,
+    RedisTagIndex,
+    resolve_tags,
+)
+from .tiered import (
+    BaseInvalidator,
+    CacheStats,
+    LocalInvalidator,
+    LocalLRUCache,
+    RedisInvalidator,
+    TieredCache,
+)
+from .validators import Validators
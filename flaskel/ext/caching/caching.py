@@ -0,0 +1,446 @@
+import functools
+import hashlib
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from flask_caching import Cache as FlaskCache
+from vbcore.http import httpcode, HttpMethod
+from vbcore.http.headers import HeaderEnum
+
+from flaskel.flaskel import cap, request, Response
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+from .codecs import BaseCodec, EncodedCache, GzipCodec, IdentityCodec, ZstdCodec
+from .locking import KeyLocks, RedisKeyLocks
+from .policy import CachePolicy, MissHandler
+from .tags import BaseTagIndex, LocalTagIndex, RedisTagIndex, resolve_tags, TagsType
+from .tiered import (
+    BaseInvalidator,
+    CacheStats,
+    LocalInvalidator,
+    LocalLRUCache,
+    RedisInvalidator,
+    TieredCache,
+)
+from .validators import Validators
+
+
+@dataclass(frozen=True)
+class KeySchema:
+    """
+    Declares which query params and headers are part of the cache key
+    of a view, None means all query params and ``headers_in_keys``
+    """
+
+    query: t.Optional[t.FrozenSet[str]] = None
+    headers: t.Optional[t.Tuple[str, ...]] = None
+
+    @classmethod
+    def create(
+        cls,
+        query: t.Optional[t.Iterable[str]] = None,
+        headers: t.Optional[t.Iterable[str]] = None,
+    ) -> "KeySchema":
+        return cls(
+            query=None if query is None else frozenset(query),
+            headers=None if headers is None else tuple(sorted(headers)),
+        )
+
+
+class Caching(FlaskCache):
+    def __init__(
+        self,
+        app=None,
+        with_jinja2_ext: bool = True,
+        config: t.Optional[dict] = None,
+        key_separator: t.Union[t.Callable, str] = "/",
+        key_prefix: t.Union[t.Callable, str] = "/cached_request",
+        default_timeout: t.Union[t.Callable, str] = None,
+        cache_control_bypass: t.Union[t.Callable, str] = "no-store",
+        headers_in_keys: t.Union[t.Callable, t.Iterable[str]] = (
+            HeaderEnum.CONTENT_TYPE,
+        ),
+        cacheable_methods: t.Union[t.Callable, t.Iterable[str]] = (HttpMethod.GET,),
+    ):
+        self.key_prefix = key_prefix
+        self.key_separator = key_separator
+        self.default_timeout = default_timeout
+        self.headers_in_keys = headers_in_keys
+        self.cacheable_methods = cacheable_methods
+        self.cache_control_bypass = cache_control_bypass
+        # kind of backend (invalidator, lock, tag_index, codec) -> name -> factory
+        self.backends: t.Dict[str, t.Dict[str, t.Callable]] = {
+            "invalidator": {},
+            "lock": {},
+            "tag_index": {},
+            "codec": {},
+        }
+        self.tag_index: BaseTagIndex = LocalTagIndex()
+        self.miss_handler = MissHandler(self._backend, self._separator)
+        self.validators = Validators(self._backend, self._separator)
+
+        self.register_invalidator("local", LocalInvalidator)
+        self.register_invalidator("redis", RedisInvalidator)
+        self.register_lock_backend("local", KeyLocks)
+        self.register_lock_backend("redis", RedisKeyLocks)
+        self.register_tag_index("local", LocalTagIndex)
+        self.register_tag_index("redis", RedisTagIndex)
+        self.register_codec("identity", IdentityCodec)
+        self.register_codec("gzip", GzipCodec)
+        self.register_codec("zstd", ZstdCodec)
+        super().__init__(app, with_jinja2_ext, config)
+
+    @classmethod
+    def set_default_config(cls, app):
+        app.config.setdefault("CACHE_L1_ENABLED", False)
+        app.config.setdefault("CACHE_L1_MAX_BYTES", 32 * 2**20)
+        app.config.setdefault("CACHE_L1_TIMEOUT", 5)
+        app.config.setdefault("CACHE_L1_INVALIDATION", "local")
+        app.config.setdefault("CACHE_L1_INVALIDATION_OPTS", {})
+        app.config.setdefault(
+            "CACHE_L1_CHANNEL", f"{app.config.get('CACHE_KEY_PREFIX')}/invalidate"
+        )
+        app.config.setdefault("CACHE_SINGLE_FLIGHT", False)
+        app.config.setdefault("CACHE_LOCK_BACKEND", "local")
+        app.config.setdefault("CACHE_LOCK_OPTS", {})
+        app.config.setdefault("CACHE_LOCK_TIMEOUT", 5)
+        app.config.setdefault("CACHE_STALE_TIMEOUT", 0)
+        app.config.setdefault("CACHE_STALE_WHILE_REVALIDATE", True)
+        app.config.setdefault("CACHE_STALE_IF_ERROR", True)
+        app.config.setdefault("CACHE_REFRESH_WORKERS", 4)
+        app.config.setdefault("CACHE_ETAG_ENABLED", False)
+        app.config.setdefault("CACHE_TAG_INDEX", "local")
+        app.config.setdefault("CACHE_TAG_INDEX_OPTS", {})
+        app.config.setdefault(
+            "CACHE_TAG_PREFIX", f"{app.config.get('CACHE_KEY_PREFIX')}/tag/"
+        )
+        app.config.setdefault("CACHE_CODEC", None)
+        app.config.setdefault("CACHE_CODEC_OPTS", {})
+        app.config.setdefault("CACHE_CODEC_MIN_SIZE", 1024)
+
+    def init_app(self, app, config=None):
+        self.set_default_config(app)
+        super().init_app(app, config)
+        if app.config.CACHE_L1_ENABLED is True:
+            backend = app.extensions["cache"][self]
+            app.extensions["cache"][self] = self.tiered_factory(backend, app.config)
+        if app.config.CACHE_CODEC:
+            backend = app.extensions["cache"][self]
+            app.extensions["cache"][self] = EncodedCache(
+                backend,
+                codec=self.backends["codec"][app.config.CACHE_CODEC](
+                    **app.config.CACHE_CODEC_OPTS
+                ),
+                min_size=app.config.CACHE_CODEC_MIN_SIZE,
+            )
+
+        self.miss_handler.locks = self.backends["lock"][app.config.CACHE_LOCK_BACKEND](
+            url=app.config.get("CACHE_REDIS_URL"),
+            **app.config.CACHE_LOCK_OPTS,
+        )
+        self.tag_index = self.backends["tag_index"][app.config.CACHE_TAG_INDEX](
+            url=app.config.get("CACHE_REDIS_URL"),
+            prefix=app.config.CACHE_TAG_PREFIX,
+            **app.config.CACHE_TAG_INDEX_OPTS,
+        )
+        if self.miss_handler.executor is None:
+            self.miss_handler.executor = ThreadPoolExecutor(
+                max_workers=app.config.CACHE_REFRESH_WORKERS,
+                thread_name_prefix="cache-refresh",
+            )
+
+    def register_lock_backend(
+        self, name: str, locks_class: t.Type[KeyLocks], *args, **kwargs
+    ):
+        self.backends["lock"][name] = functools.partial(locks_class, *args, **kwargs)
+
+    def register_invalidator(
+        self, name: str, invalidator_class: t.Type[BaseInvalidator], *args, **kwargs
+    ):
+        invalidator = functools.partial(invalidator_class, *args, **kwargs)
+        self.backends["invalidator"][name] = invalidator
+
+    def register_tag_index(
+        self, name: str, index_class: t.Type[BaseTagIndex], *args, **kwargs
+    ):
+        self.backends["tag_index"][name] = functools.partial(
+            index_class, *args, **kwargs
+        )
+
+    def register_codec(
+        self, name: str, codec_class: t.Type[BaseCodec], *args, **kwargs
+    ):
+        self.backends["codec"][name] = functools.partial(codec_class, *args, **kwargs)
+
+    def tiered_factory(self, backend, config) -> TieredCache:
+        invalidator = self.backends["invalidator"][config.CACHE_L1_INVALIDATION](
+            channel=config.CACHE_L1_CHANNEL,
+            url=config.get("CACHE_REDIS_URL"),
+            **config.CACHE_L1_INVALIDATION_OPTS,
+        )
+        invalidator.start()
+        return TieredCache(
+            backend,
+            local=LocalLRUCache(
+                max_bytes=config.CACHE_L1_MAX_BYTES,
+                default_timeout=config.CACHE_L1_TIMEOUT,
+            ),
+            invalidator=invalidator,
+        )
+
+    @property
+    def stats(self) -> t.Optional[CacheStats]:
+        """hit/miss counters per tier, available only if L1 is enabled"""
+        return getattr(self.cache, "stats", None)
+
+    @staticmethod
+    def optional_callable(key):
+        return key() if callable(key) else key
+
+    def _backend(self):
+        return self.cache
+
+    def _separator(self) -> str:
+        return self.optional_callable(self.key_separator)
+
+    @staticmethod
+    def hash_method(data: str) -> str:
+        """fixed length digest, xxhash if installed otherwise blake2b"""
+        if xxhash is not None:
+            return xxhash.xxh3_128_hexdigest(data.encode())
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def make_query_string(params: t.Optional[t.Collection[str]] = None) -> str:
+        tokens = [
+            f"{param}={value}"
+            for param, value in request.args.items(multi=True)
+            if params is None or param in params
+        ]
+        return "&".join(sorted(tokens))
+
+    @staticmethod
+    def make_headers_string(headers: t.List[str], separator: str) -> str:
+        tokens: t.List[str] = []
+        for header in headers:
+            value = request.headers.get_all(header)
+            tokens.extend(value[0].split(", ") if len(value) == 1 else value)
+        return separator.join((sorted(tokens)))
+
+    def unless(self, *_, **__) -> bool:
+        if cap.config.CACHE_DISABLED:
+            return True
+
+        bypass = self.optional_callable(self.cache_control_bypass)
+        return bypass == request.headers.get(HeaderEnum.CACHE_CONTROL)
+
+    def response_filter(self, response) -> bool:
+        if request.method not in self.optional_callable(self.cacheable_methods):
+            return False
+        if isinstance(response, Response):
+            if response.status_code == httpcode.NOT_MODIFIED or response.is_streamed:
+                return False
+            return httpcode.is_ok(response.status_code)
+
+        cap.logger.debug(
+            "response is not of type Response, so no status code can be checked"
+        )
+        return False
+
+    def make_cache_key(self, *_, key_schema: t.Optional[KeySchema] = None, **__) -> str:
+        """
+        Returns a string formatted as follow:
+            <prefix><sep><url><sep>[<query><sep><headers>]
+
+        string between [] is hashed with ``hash_method`` so its length is fixed,
+        note that query string and headers are sorted and restricted
+        to the ones declared in ``key_schema`` if any
+        """
+        schema = key_schema or KeySchema()
+        headers = schema.headers
+        if headers is None:
+            headers = self.optional_callable(self.headers_in_keys)
+
+        return self._format_key(
+            self.optional_callable(self.key_prefix),
+            self.optional_callable(self.key_separator),
+            schema.query,
+            headers,
+        )
+
+    def _format_key(
+        self,
+        key_prefix: str,
+        separator: str,
+        query: t.Optional[t.Collection[str]],
+        headers: t.Iterable[str],
+    ) -> str:
+        url = request.base_url.rstrip(separator)
+        query_string = self.make_query_string(query)
+        headers_string = self.make_headers_string(list(headers), separator)
+        hashed_key = self.hash_method(f"{query_string}{separator}{headers_string}")
+        return f"{key_prefix}{separator}{url}{separator}{hashed_key}"
+
+    def key_template(
+        self,
+        query: t.Optional[t.Iterable[str]] = None,
+        headers: t.Optional[t.Iterable[str]] = None,
+    ) -> t.Callable[..., str]:
+        """
+        make_cache_key of a view: prefix, separator and headers are resolved
+        once, at the first request of the view because callable options may
+        need the app context, then only the request values are formatted
+        """
+        schema = KeySchema.create(query, headers)
+
+        @functools.lru_cache(maxsize=None)
+        def resolve() -> t.Tuple[str, str, t.Tuple[str, ...]]:
+            key_headers = schema.headers
+            if key_headers is None:
+                key_headers = tuple(self.optional_callable(self.headers_in_keys))
+            return (
+                self.optional_callable(self.key_prefix),
+                self.optional_callable(self.key_separator),
+                key_headers,
+            )
+
+        def make_key(*_, **__) -> str:
+            key_prefix, separator, key_headers = resolve()
+            return self._format_key(key_prefix, separator, schema.query, key_headers)
+
+        return make_key
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Deletes the entries stored with any of the given tags,
+        their stale copies and validators too
+
+        :return: the number of invalidated keys
+        """
+        if self not in cap.extensions.get("cache", {}):
+            return 0
+
+        keys = self.tag_index.pop(tags)
+        if keys:
+            self.cache.delete_many(
+                *keys,
+                *(self.miss_handler.stale_key(k) for k in keys),
+                *(self.validators.meta_key(k) for k in keys),
+            )
+            cap.logger.debug("invalidated %d keys of tags: %s", len(keys), tags)
+        return len(keys)
+
+    def superclass_cached(self, **kwargs):
+        """This is here only to mock it in tests, until a better way is found"""
+        return super().cached(**kwargs)
+
+    # options are keyword only: flask_caching options are passed as kwargs
+    # pylint: disable=too-many-arguments,arguments-differ
+    def cached(  # type: ignore[override]
+        self,
+        *,
+        single_flight: t.Optional[bool] = None,
+        stale_timeout: t.Optional[int] = None,
+        stale_while_revalidate: t.Optional[bool] = None,
+        stale_if_error: t.Optional[bool] = None,
+        etag: t.Optional[bool] = None,
+        key_query: t.Optional[t.Iterable[str]] = None,
+        key_headers: t.Optional[t.Iterable[str]] = None,
+        tags: t.Optional[TagsType] = None,
+        **kwargs,
+    ):
+        """
+        The entry expires after timeout (soft ttl), its stale copy after
+        timeout + stale_timeout (hard ttl). Options set to None are read
+        from the CACHE_* configuration keys with the same name
+
+        :param single_flight: coalesce concurrent recomputations of the same key
+        :param stale_timeout: seconds the stale copy outlives the entry, 0 disables it
+        :param stale_while_revalidate: serve stale copy and refresh in background
+        :param stale_if_error: serve stale copy if recomputation fails
+        :param etag: store validators and answer conditional requests with 304
+        :param key_query: query params that are part of the key, default all
+        :param key_headers: headers that are part of the key, default headers_in_keys
+        :param tags: tag templates formatted with view arguments (e.g. ``model:item:{res_id}``)
+            or a callable that returns them, see ``invalidate_tags``
+        :param kwargs: passed to flask_caching ``cached``
+        """
+
+        def option(value, key):
+            return cap.config.get(key) if value is None else value
+
+        if key_query is not None or key_headers is not None:
+            kwargs.setdefault(
+                "make_cache_key", self.key_template(key_query, key_headers)
+            )
+
+        def wrapper(f):
+            @functools.wraps(f)
+            def decorator(*args, **kw):
+                kwargs.setdefault("unless", self.unless)
+                kwargs.setdefault("timeout", self.default_timeout)
+                kwargs.setdefault("make_cache_key", self.make_cache_key)
+                kwargs.setdefault("response_filter", self.response_filter)
+                kwargs["timeout"] = self.optional_callable(kwargs["timeout"])
+                response_filter = kwargs["response_filter"]
+                options = kwargs
+
+                validators = option(etag, "CACHE_ETAG_ENABLED")
+                if validators:
+                    if self._bypass_cache(kwargs["unless"], f, *args, **kw):
+                        return self._call_fn(f, *args, **kw)
+                    # unless is evaluated once: the cache is not bypassed
+                    options = {**kwargs, "unless": None}
+                    make_key = functools.partial(kwargs["make_cache_key"], *args, **kw)
+                    if self.validators.is_conditional():
+                        response = self.validators.not_modified(make_key())
+                        if response is not None:
+                            return response
+                    response_filter = self.validators.wrap_filter(
+                        response_filter, make_key, kwargs["timeout"]
+                    )
+
+                _stale_timeout = option(stale_timeout, "CACHE_STALE_TIMEOUT")
+                if tags is not None:
+                    _timeout = kwargs["timeout"]
+                    if _timeout is None:
+                        _timeout = self.cache.default_timeout
+                    response_filter = self.tag_index.wrap_filter(
+                        response_filter,
+                        functools.partial(kwargs["make_cache_key"], *args, **kw),
+                        resolve_tags(tags, *args, **kw),
+                        _timeout + _stale_timeout if _timeout else None,
+                    )
+
+                policy = CachePolicy(
+                    response_filter=response_filter,
+                    timeout=kwargs["timeout"],
+                    single_flight=option(single_flight, "CACHE_SINGLE_FLIGHT"),
+                    stale_timeout=_stale_timeout,
+                    stale_while_revalidate=option(
+                        stale_while_revalidate, "CACHE_STALE_WHILE_REVALIDATE"
+                    ),
+                    stale_if_error=option(stale_if_error, "CACHE_STALE_IF_ERROR"),
+                )
+                func = f
+                if policy.enabled:
+                    func = self.miss_handler.wrap(f, kwargs["make_cache_key"], policy)
+                    response_filter = self.miss_handler.skip_stored(response_filter)
+
+                response = self.superclass_cached(
+                    **{**options, "response_filter": response_filter}
+                )(func)(*args, **kw)
+                return (
+                    self.validators.make_conditional(response)
+                    if validators
+                    else response
+                )
+
+            return decorator
+
+        return wrapper
@@ -0,0 +1,191 @@
+import gzip
+import typing as t
+from abc import ABC, abstractmethod
+
+import flask
+from flask_caching.backends.base import BaseCache
+from vbcore.http.headers import HeaderEnum
+
+from flaskel.flaskel import request, Response
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class CachedResponse(t.NamedTuple):
+    """Response stored as raw (maybe compressed) body plus a header tuple"""
+
+    status: int
+    headers: t.Tuple[t.Tuple[str, str], ...]
+    body: bytes
+    encoding: t.Optional[str] = None
+
+
+class BaseCodec(ABC):
+    """name is the http content-coding of the compressed payload"""
+
+    name: str = "identity"
+
+    def __init__(self, *_, **__):
+        """accepts and ignores the options of other codecs"""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        pass  # pragma: no cover
+
+
+class IdentityCodec(BaseCodec):
+    name = "identity"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class GzipCodec(BaseCodec):
+    name = "gzip"
+
+    def __init__(self, *args, level: int = 6, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data: bytes) -> bytes:
+        return gzip.decompress(data)
+
+
+class ZstdCodec(BaseCodec):
+    name = "zstd"
+
+    def __init__(self, *args, level: int = 3, **kwargs):
+        super().__init__(*args, **kwargs)
+        if zstandard is None:
+            raise ImportError("you must install 'zstandard'")  # pragma: no cover
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.decompressor.decompress(data)
+
+
+class EncodedCache(BaseCache):
+    """
+    Flask-Caching backend that stores responses as ``CachedResponse``
+    instead of pickled Response objects, bodies larger than ``min_size``
+    are compressed with the codec
+
+    A compressed entry is served as is (with Content-Encoding and a weak ETag)
+    if the client accepts the encoding, otherwise it is decompressed
+    """
+
+    def __init__(self, backend: BaseCache, codec: BaseCodec, min_size: int = 1024):
+        super().__init__(default_timeout=backend.default_timeout)
+        self.backend = backend
+        self.codec = codec
+        self.min_size = min_size
+
+    def __getattr__(self, item):
+        if item == "backend":
+            raise AttributeError(item)
+        return getattr(self.backend, item)
+
+    @staticmethod
+    def is_encodable(value: t.Any) -> bool:
+        return (
+            isinstance(value, Response)
+            and not value.is_streamed
+            and not value.direct_passthrough
+            and HeaderEnum.CONTENT_ENCODING not in value.headers
+        )
+
+    def encode(self, value: t.Any) -> t.Any:
+        if not self.is_encodable(value):
+            return value
+
+        encoding = None
+        body = value.get_data()
+        if len(body) >= self.min_size and self.codec.name != IdentityCodec.name:
+            body = self.codec.compress(body)
+            encoding = self.codec.name
+
+        headers = tuple(
+            (k, v) for k, v in value.headers if k != HeaderEnum.CONTENT_LENGTH
+        )
+        return CachedResponse(value.status_code, headers, body, encoding)
+
+    @staticmethod
+    def accepts(encoding: str) -> bool:
+        return flask.has_request_context() and request.accept_encodings[encoding] > 0
+
+    def decode(self, value: t.Any) -> t.Any:
+        if not isinstance(value, CachedResponse):
+            return value
+
+        body = value.body
+        response = Response(status=value.status, headers=list(value.headers))
+        if value.encoding is None:
+            response.set_data(body)
+            return response
+
+        response.vary.add(HeaderEnum.ACCEPT_ENCODING)
+        if self.accepts(value.encoding):
+            response.set_data(body)
+            response.headers[HeaderEnum.CONTENT_ENCODING] = value.encoding
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+            return response
+
+        if value.encoding != self.codec.name:
+            return None  # written by another codec, treated as a miss
+        response.set_data(self.codec.decompress(body))
+        return response
+
+    def get(self, key: str) -> t.Any:
+        return self.decode(self.backend.get(key))
+
+    def get_many(self, *keys: str) -> t.List[t.Any]:
+        return [self.decode(v) for v in self.backend.get_many(*keys)]
+
+    def has(self, key: str) -> bool:
+        return self.backend.has(key)
+
+    def set(self, key: str, value: t.Any, timeout: t.Optional[int] = None) -> bool:
+        return self.backend.set(key, self.encode(value), timeout=timeout)
+
+    def add(self, key: str, value: t.Any, timeout: t.Optional[int] = None) -> bool:
+        return self.backend.add(key, self.encode(value), timeout=timeout)
+
+    def set_many(
+        self, mapping: t.Dict[str, t.Any], timeout: t.Optional[int] = None
+    ) -> t.List[t.Any]:
+        mapping = {k: self.encode(v) for k, v in mapping.items()}
+        return self.backend.set_many(mapping, timeout=timeout)
+
+    def delete(self, key: str) -> bool:
+        return self.backend.delete(key)
+
+    def delete_many(self, *keys: str) -> t.List[t.Any]:
+        return self.backend.delete_many(*keys)
+
+    def clear(self) -> bool:
+        return self.backend.clear()
+
+    def inc(self, key: str, delta: int = 1) -> t.Optional[int]:
+        return self.backend.inc(key, delta=delta)
+
+    def dec(self, key: str, delta: int = 1) -> t.Optional[int]:
+        return self.backend.dec(key, delta=delta)
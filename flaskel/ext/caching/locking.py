@@ -0,0 +1,91 @@
+import threading
+import time
+import typing as t
+from contextlib import contextmanager
+
+from redis import Redis
+from redis.exceptions import LockError, RedisError
+
+
+class KeyLocks:
+    """
+    Per key locks shared by the threads (or greenlets) of a worker,
+    a lock is kept alive only while someone is holding or waiting for it
+    """
+
+    def __init__(self, *_, **__):
+        self._lock = threading.Lock()
+        self._locks: t.Dict[str, t.List[t.Any]] = {}
+
+    def _get(self, key: str) -> threading.Lock:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release(self, key: str):
+        with self._lock:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float) -> t.Iterator[bool]:
+        lock = self._get(key)
+        acquired = lock.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            self._release(key)
+
+
+class RedisKeyLocks(KeyLocks):
+    """
+    Local locks plus a redis lock, so that only one worker
+    among all hosts recomputes the same key
+    """
+
+    def __init__(
+        self,
+        *args,
+        client: t.Optional[Redis] = None,
+        url: t.Optional[str] = None,
+        suffix: str = "/lock",
+        lock_ttl: float = 30,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.suffix = suffix
+        self.lock_ttl = lock_ttl
+        self.client = client or Redis.from_url(url)
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float) -> t.Iterator[bool]:
+        start = time.monotonic()
+        with super().acquire(key, timeout) as acquired:
+            if not acquired:
+                yield False
+                return
+
+            remaining = max(timeout - (time.monotonic() - start), 0)
+            lock = self.client.lock(
+                f"{key}{self.suffix}",
+                timeout=self.lock_ttl,
+                blocking_timeout=remaining,
+            )
+            try:
+                acquired = lock.acquire()
+            except RedisError:
+                acquired = True  # degrade to the local lock only
+
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    try:
+                        lock.release()
+                    except (LockError, RedisError):
+                        pass
@@ -0,0 +1,187 @@
+import functools
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import flask
+from vbcore.http import httpcode
+from werkzeug.exceptions import HTTPException
+
+from flaskel.flaskel import cap, Response
+
+from .locking import KeyLocks
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    response_filter: t.Callable
+    timeout: t.Optional[int] = None
+    single_flight: bool = False
+    stale_timeout: int = 0
+    stale_while_revalidate: bool = False
+    stale_if_error: bool = False
+
+    @property
+    def stale_enabled(self) -> bool:
+        return bool(self.stale_timeout)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.single_flight) or self.stale_enabled
+
+
+class MissHandler:
+    """
+    Recomputes the entries of the cached views on cache miss, with
+    single flight (per key locks) and stale copies of the entries,
+    stored under ``stale_key`` until timeout + stale_timeout
+    """
+
+    def __init__(self, backend: t.Callable[[], t.Any], separator: t.Callable[[], str]):
+        """
+        :param backend: returns the cache backend of the current app
+        :param separator: returns the key separator
+        """
+        self.backend = backend
+        self.separator = separator
+        self.locks: KeyLocks = KeyLocks()
+        self.executor: t.Optional[ThreadPoolExecutor] = None
+
+    def stale_key(self, key: str) -> str:
+        return f"{key}{self.separator()}stale"
+
+    @staticmethod
+    def skip_store():
+        """marks the current value as already cached, see ``skip_stored``"""
+        flask.g.cache_skip_store = True
+
+    @staticmethod
+    def skip_stored(response_filter: t.Callable) -> t.Callable:
+        def _filter(response) -> bool:
+            if flask.g.pop("cache_skip_store", False):
+                return False
+            return response_filter(response)
+
+        return _filter
+
+    @staticmethod
+    def is_server_error(value) -> bool:
+        if isinstance(value, HTTPException):
+            return httpcode.is_server_error(
+                value.code or httpcode.INTERNAL_SERVER_ERROR
+            )
+        if isinstance(value, Exception):
+            return True
+        if isinstance(value, Response):
+            return httpcode.is_server_error(value.status_code)
+        return False
+
+    def store(self, key: str, value, policy: CachePolicy):
+        self.backend().set(key, value, timeout=policy.timeout)
+        self.store_stale(key, value, policy)
+
+    def store_stale(self, key: str, value, policy: CachePolicy):
+        backend = self.backend()
+        timeout = backend.default_timeout if policy.timeout is None else policy.timeout
+        if policy.stale_enabled and timeout:
+            backend.set(
+                self.stale_key(key), value, timeout=timeout + policy.stale_timeout
+            )
+
+    def serve_stale(self, key: str):
+        value = self.backend().get(self.stale_key(key))
+        if value is not None:
+            cap.logger.debug("stale value used for key: %s", key)
+            self.skip_store()
+        return value
+
+    def recompute(
+        self, key: str, compute: t.Callable, policy: CachePolicy, store: bool = False
+    ):
+        """
+        :param store: stores the value itself instead of leaving it
+            to flask_caching, e.g. before a key lock is released
+        """
+        try:
+            value = compute()
+        except Exception as exc:  # pylint: disable=broad-except
+            if not (policy.stale_if_error and self.is_server_error(exc)):
+                raise
+            stale = self.serve_stale(key)
+            if stale is None:
+                raise
+            cap.logger.exception(exc)
+            return stale
+
+        if policy.response_filter(value):
+            if store:
+                self.store(key, value, policy)
+                self.skip_store()
+            else:
+                self.store_stale(key, value, policy)
+        elif policy.stale_if_error and self.is_server_error(value):
+            stale = self.serve_stale(key)
+            if stale is not None:
+                return stale
+        return value
+
+    def revalidate(self, key: str, compute: t.Callable, policy: CachePolicy):
+        """recomputes the value in background, at most one refresh per key"""
+
+        @flask.copy_current_request_context
+        def refresh():
+            with self.locks.acquire(key, timeout=0) as acquired:
+                if not acquired:
+                    return
+                try:
+                    value = compute()
+                except Exception as exc:  # pylint: disable=broad-except
+                    cap.logger.exception(exc)
+                    return
+                if policy.response_filter(value):
+                    self.store(key, value, policy)
+
+        t.cast(ThreadPoolExecutor, self.executor).submit(refresh)
+
+    def wrap(
+        self, f: t.Callable, make_cache_key: t.Callable, policy: CachePolicy
+    ) -> t.Callable:
+        """
+        Wraps the view function invoked on cache miss, i.e. after the soft ttl:
+
+            - stale while revalidate: the stale copy is served at once
+              and the value is recomputed in background
+            - single flight: only the holder of the key lock recomputes
+              and stores the value before releasing the lock,
+              the others wait for it until CACHE_LOCK_TIMEOUT,
+              then they get the stale copy if any, otherwise they compute it
+            - stale if error: if the recomputation raises or returns
+              a server error the stale copy is served until the hard ttl
+        """
+
+        @functools.wraps(f)
+        def wrapped(*args, **kwargs):
+            key = make_cache_key(*args, **kwargs)
+            compute = functools.partial(f, *args, **kwargs)
+
+            if policy.stale_enabled and policy.stale_while_revalidate:
+                stale = self.serve_stale(key)
+                if stale is not None:
+                    self.revalidate(key, compute, policy)
+                    return stale
+
+            if not policy.single_flight:
+                return self.recompute(key, compute, policy)
+
+            with self.locks.acquire(key, cap.config.CACHE_LOCK_TIMEOUT) as acquired:
+                if acquired:
+                    value = self.backend().get(key)
+                    if value is not None:
+                        self.skip_store()
+                        return value
+                    return self.recompute(key, compute, policy, store=True)
+
+            stale = self.serve_stale(key)
+            return stale if stale is not None else self.recompute(key, compute, policy)
+
+        return wrapped
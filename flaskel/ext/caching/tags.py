@@ -0,0 +1,153 @@
+import threading
+import time
+import typing as t
+from abc import ABC, abstractmethod
+
+from redis import Redis
+
+from flaskel.flaskel import request
+
+TagsType = t.Union[t.Iterable[str], t.Callable[..., t.Iterable[str]]]
+
+
+def model_tag(name: str, res_id: t.Any = None) -> str:
+    return f"model:{name}" if res_id is None else f"model:{name}:{res_id}"
+
+
+def model_tags(name: str) -> t.Callable[..., t.List[str]]:
+    """
+    Tags of a resource view: the collection is tagged with ``model:<name>``,
+    the resource and its sub resources with ``model:<name>:<res_id>``
+    """
+
+    def _tags(*_, res_id=None, **__) -> t.List[str]:
+        return [model_tag(name, res_id)]
+
+    return _tags
+
+
+def resolve_tags(tags: TagsType, *args, **kwargs) -> t.List[str]:
+    """
+    A callable is invoked with the view arguments, otherwise every tag
+    is formatted with them and skipped if it needs a missing one
+    """
+    if callable(tags):
+        return list(tags(*args, **kwargs))
+
+    resolved = []
+    view_args = {**(request.view_args or {}), **kwargs}
+    for tag in tags:
+        try:
+            resolved.append(tag.format(**view_args))
+        except (KeyError, IndexError):
+            continue
+    return resolved
+
+
+class BaseTagIndex(ABC):
+    """
+    Maps every tag to the cache keys stored with it, so that a write
+    can drop all the cached responses that depend on it
+    """
+
+    def __init__(self, *_, **__):
+        """accepts and ignores the options of other indexes"""
+
+    @abstractmethod
+    def add(self, tags: t.Iterable[str], key: str, timeout: t.Optional[int] = None):
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def pop(self, tags: t.Iterable[str]) -> t.Set[str]:
+        """removes the given tags and returns the keys they were indexing"""
+
+    def wrap_filter(
+        self,
+        response_filter: t.Callable,
+        make_key: t.Callable,
+        tags: t.List[str],
+        timeout: t.Optional[int] = None,
+    ) -> t.Callable:
+        """indexes the keys of the responses that are going to be cached"""
+
+        def _filter(response) -> bool:
+            if not response_filter(response):
+                return False
+            self.add(tags, make_key(), timeout)
+            return True
+
+        return _filter
+
+
+class LocalTagIndex(BaseTagIndex):
+    """
+    In-memory index for single process deployments and tests,
+    keys are forgotten after their timeout (monotonic clock)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._tags: t.Dict[str, t.Dict[str, float]] = {}
+
+    def add(self, tags: t.Iterable[str], key: str, timeout: t.Optional[int] = None):
+        now = time.monotonic()
+        expire_at = now + timeout if timeout else float("inf")
+        with self._lock:
+            for tag in tags:
+                keys = self._tags.setdefault(tag, {})
+                for k in [k for k, exp in keys.items() if exp <= now]:
+                    del keys[k]
+                keys[key] = max(keys.get(key, 0), expire_at)
+
+    def pop(self, tags: t.Iterable[str]) -> t.Set[str]:
+        keys: t.Set[str] = set()
+        with self._lock:
+            for tag in tags:
+                keys.update(self._tags.pop(tag, {}))
+        return keys
+
+
+class RedisTagIndex(BaseTagIndex):
+    """
+    Every tag is a redis set of cache keys, shared by all the workers;
+    the set expires with the longest lived key added to it
+    """
+
+    def __init__(
+        self,
+        *args,
+        client: t.Optional[Redis] = None,
+        url: t.Optional[str] = None,
+        prefix: str = "cache/tag/",
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.prefix = prefix
+        self.client = client or Redis.from_url(url)
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.prefix}{tag}"
+
+    def add(self, tags: t.Iterable[str], key: str, timeout: t.Optional[int] = None):
+        with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                name = self.tag_key(tag)
+                pipe.sadd(name, key)
+                if timeout:
+                    pipe.expire(name, timeout, gt=True)
+                    pipe.expire(name, timeout, nx=True)
+                else:
+                    pipe.persist(name)
+            pipe.execute()
+
+    def pop(self, tags: t.Iterable[str]) -> t.Set[str]:
+        names = [self.tag_key(tag) for tag in tags]
+        if not names:
+            return set()
+
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.sunion(names)
+            pipe.delete(*names)
+            members, _ = pipe.execute()
+        return {m.decode() if isinstance(m, bytes) else m for m in members}
@@ -0,0 +1,280 @@
+import pickle  # nosec
+import threading
+import time
+import typing as t
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from flask_caching.backends.base import BaseCache
+from redis import Redis
+
+InvalidationCallback = t.Callable[[t.Optional[str]], t.Any]
+
+
+@dataclass
+class CacheStats:
+    l1_hits: int = 0
+    l1_misses: int = 0
+    l2_hits: int = 0
+    l2_misses: int = 0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def incr(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def reset(self):
+        with self._lock:
+            self.l1_hits = self.l1_misses = self.l2_hits = self.l2_misses = 0
+
+    def to_dict(self) -> t.Dict[str, int]:
+        return asdict(self)
+
+
+class LocalLRUCache:
+    """
+    Per process LRU bounded by the size in bytes of the stored payloads,
+    every entry expires after its own timeout (monotonic clock)
+    """
+
+    def __init__(self, max_bytes: int = 32 * 2**20, default_timeout: int = 5):
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        self._lock = threading.RLock()
+        self._data: "OrderedDict[str, t.Tuple[bytes, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def _pop(self, key: str) -> t.Optional[bytes]:
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self.size -= len(item[0])
+        return item[0]
+
+    def get(self, key: str) -> t.Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, payload: bytes, timeout: t.Optional[int] = None) -> bool:
+        with self._lock:
+            self._pop(key)
+            if len(payload) > self.max_bytes:
+                return False
+
+            expire_at = time.monotonic() + (timeout or self.default_timeout)
+            self._data[key] = (payload, expire_at)
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+        return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._pop(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+class BaseInvalidator(ABC):
+    """
+    Broadcasts invalidations to every worker: a key means delete,
+    None means clear the whole local tier
+    """
+
+    def __init__(self, *_, **__):
+        self._subscribers: t.List[InvalidationCallback] = []
+
+    def subscribe(self, callback: InvalidationCallback):
+        self._subscribers.append(callback)
+
+    def notify(self, key: t.Optional[str]):
+        for callback in self._subscribers:
+            callback(key)
+
+    def start(self):
+        """invoked once at init_app, override to start listeners"""
+
+    def stop(self):
+        """override to stop listeners"""
+
+    @abstractmethod
+    def publish(self, key: t.Optional[str]):
+        pass  # pragma: no cover
+
+
+class LocalInvalidator(BaseInvalidator):
+    """
+    Stand-in for single process deployments and tests:
+    subscribers in the same process are notified in place
+    """
+
+    def publish(self, key: t.Optional[str]):
+        self.notify(key)
+
+
+class RedisInvalidator(BaseInvalidator):
+    DELETE_PREFIX = "del:"
+    CLEAR_MESSAGE = "clear"
+
+    def __init__(
+        self,
+        *args,
+        channel: str = "cache/invalidate",
+        client: t.Optional[Redis] = None,
+        url: t.Optional[str] = None,
+        sleep_time: float = 1.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.channel = channel
+        self.sleep_time = sleep_time
+        self.client = client or Redis.from_url(url)
+        self._worker: t.Optional[threading.Thread] = None
+
+    def encode(self, key: t.Optional[str]) -> str:
+        return self.CLEAR_MESSAGE if key is None else f"{self.DELETE_PREFIX}{key}"
+
+    def decode(self, message: t.Union[str, bytes]) -> t.Optional[str]:
+        if isinstance(message, bytes):
+            message = message.decode()
+        if message.startswith(self.DELETE_PREFIX):
+            return message[len(self.DELETE_PREFIX) :]
+        return None
+
+    def on_message(self, message: dict):
+        self.notify(self.decode(message["data"]))
+
+    def start(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: self.on_message})
+        self._worker = pubsub.run_in_thread(sleep_time=self.sleep_time, daemon=True)
+
+    def stop(self):
+        if self._worker is not None:
+            self._worker.stop()  # type: ignore
+            self._worker = None
+
+    def publish(self, key: t.Optional[str]):
+        self.client.publish(self.channel, self.encode(key))
+
+
+class TieredCache(BaseCache):
+    """
+    Flask-Caching backend with an in-process LRU (L1)
+    in front of the configured shared backend (L2)
+
+    L1 stores pickled values, so its size can be bounded in bytes and
+    a cached Response is never shared between requests. Deletions and
+    clear are applied to L2 and then broadcast to the L1 of every worker
+    """
+
+    def __init__(
+        self,
+        backend: BaseCache,
+        local: t.Optional[LocalLRUCache] = None,
+        invalidator: t.Optional[BaseInvalidator] = None,
+    ):
+        super().__init__(default_timeout=backend.default_timeout)
+        self.backend = backend
+        self.stats = CacheStats()
+        self.local = local if local is not None else LocalLRUCache()
+        self.invalidator = invalidator or LocalInvalidator()
+        self.invalidator.subscribe(self.evict)
+
+    def __getattr__(self, item):
+        if item == "backend":
+            raise AttributeError(item)
+        return getattr(self.backend, item)
+
+    def local_timeout(self, timeout: t.Optional[int] = None) -> int:
+        timeout = self._normalize_timeout(timeout)
+        if not timeout:
+            return self.local.default_timeout
+        return min(timeout, self.local.default_timeout)
+
+    def evict(self, key: t.Optional[str] = None):
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+
+    def get(self, key: str) -> t.Any:
+        payload = self.local.get(key)
+        if payload is not None:
+            self.stats.incr("l1_hits")
+            return pickle.loads(payload)  # nosec
+
+        self.stats.incr("l1_misses")
+        value = self.backend.get(key)
+        if value is None:
+            self.stats.incr("l2_misses")
+            return None
+
+        self.stats.incr("l2_hits")
+        self.local.set(key, pickle.dumps(value), self.local_timeout())
+        return value
+
+    def has(self, key: str) -> bool:
+        return key in self.local or self.backend.has(key)
+
+    def set(self, key: str, value: t.Any, timeout: t.Optional[int] = None) -> bool:
+        result = self.backend.set(key, value, timeout=timeout)
+        if result:
+            self.local.set(key, pickle.dumps(value), self.local_timeout(timeout))
+        return result
+
+    def add(self, key: str, value: t.Any, timeout: t.Optional[int] = None) -> bool:
+        result = self.backend.add(key, value, timeout=timeout)
+        if result:
+            self.local.set(key, pickle.dumps(value), self.local_timeout(timeout))
+        return result
+
+    def delete(self, key: str) -> bool:
+        result = self.backend.delete(key)
+        self.evict(key)
+        self.invalidator.publish(key)
+        return result
+
+    def delete_many(self, *keys: str) -> t.List[t.Any]:
+        result = self.backend.delete_many(*keys)
+        for key in keys:
+            self.evict(key)
+            self.invalidator.publish(key)
+        return result
+
+    def clear(self) -> bool:
+        result = self.backend.clear()
+        self.evict(None)
+        self.invalidator.publish(None)
+        return result
+
+    def inc(self, key: str, delta: int = 1) -> t.Optional[int]:
+        result = self.backend.inc(key, delta=delta)
+        self.evict(key)
+        self.invalidator.publish(key)
+        return result
+
+    def dec(self, key: str, delta: int = 1) -> t.Optional[int]:
+        result = self.backend.dec(key, delta=delta)
+        self.evict(key)
+        self.invalidator.publish(key)
+        return result
@@ -0,0 +1,88 @@
+import typing as t
+from datetime import datetime, timezone
+
+from vbcore.http import httpcode
+from vbcore.http.headers import HeaderEnum
+from werkzeug.http import http_date, quote_etag
+
+from flaskel.flaskel import request, Response
+
+
+class Validators:
+    """
+    Strong ETag (content hash) and Last-Modified of the cached responses,
+    stored in a tiny entry under ``meta_key``, so that conditional
+    requests are answered without loading the cached response: it costs
+    one more write per stored response and an existence check per 304
+    """
+
+    def __init__(self, backend: t.Callable[[], t.Any], separator: t.Callable[[], str]):
+        """
+        :param backend: returns the cache backend of the current app
+        :param separator: returns the key separator
+        """
+        self.backend = backend
+        self.separator = separator
+
+    def meta_key(self, key: str) -> str:
+        return f"{key}{self.separator()}meta"
+
+    @staticmethod
+    def is_conditional() -> bool:
+        return bool(request.if_none_match or request.if_modified_since)
+
+    def add(self, key: str, response, timeout: t.Optional[int] = None):
+        if not isinstance(response, Response) or response.is_streamed:
+            return
+
+        response.add_etag(overwrite=False)
+        if response.last_modified is None:
+            response.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+        etag, _ = response.get_etag()
+        meta = (etag, response.last_modified)
+        self.backend().set(self.meta_key(key), meta, timeout=timeout)
+
+    def wrap_filter(
+        self, response_filter: t.Callable, make_key: t.Callable, timeout=None
+    ) -> t.Callable:
+        """adds the validators to the responses that are going to be cached"""
+
+        def _filter(response) -> bool:
+            if not response_filter(response):
+                return False
+            self.add(make_key(), response, timeout)
+            return True
+
+        return _filter
+
+    def not_modified(self, key: str) -> t.Optional[Response]:
+        backend = self.backend()
+        meta = backend.get(self.meta_key(key))
+        if meta is None:
+            return None
+
+        etag, last_modified = meta
+        if request.if_none_match:
+            if not request.if_none_match.contains_weak(etag):
+                return None
+        elif not last_modified <= request.if_modified_since:
+            return None
+
+        # validators outlive the entry if it is deleted or evicted
+        if not backend.has(key):
+            return None
+
+        return Response.no_content(
+            status=httpcode.NOT_MODIFIED,
+            headers={
+                HeaderEnum.ETAG: quote_etag(etag),
+                HeaderEnum.LAST_MODIFIED: http_date(last_modified),
+            },
+        )
+
+    @staticmethod
+    def make_conditional(response):
+        if isinstance(response, Response) and response.status_code == httpcode.SUCCESS:
+            return response.make_conditional(request)
+        return response
@@ -4,10 +4,13 @@ import flask
 import netaddr as net
 from vbcore.http import httpcode
 
+from flaskel.utils.netindex import NetworkIndex
+
 
 class CloudflareRemote:
     def __init__(self, app=None, **kwargs):
         self._cf_ips = None
+        self._cf_index = NetworkIndex()
         self._cf_ipv6_enabled = None
 
         if app is not None:
@@ -24,16 +27,23 @@ class CloudflareRemote:
         if app.config["CF_OVERRIDE_REMOTE"]:
             app.before_request_funcs.setdefault(None, []).append(self._hook_client_ip)
 
+        self.reload(app, cf_ips)
+
+    def reload(self, app, cf_ips=None):
+        """
+        loads the cloudflare networks and swaps them with the current ones,
+        requests in progress use the previous networks
+        """
         if not cf_ips:
             if app.config["CF_IPs"]:
-                self._cf_ips = app.config["CF_IPs"]
+                cf_ips = app.config["CF_IPs"]
             else:
-                self._cf_ips = self._get_ip_list(app, app.config["CF_IP4_URI"])
+                cf_ips = self._get_ip_list(app, app.config["CF_IP4_URI"])
                 if app.config["CF_IPv6_ENABLED"]:
-                    self._cf_ips += self._get_ip_list(app, app.config["CF_IP6_URI"])
-        else:
-            self._cf_ips = cf_ips
+                    cf_ips = cf_ips + self._get_ip_list(app, app.config["CF_IP6_URI"])
 
+        cf_index = NetworkIndex(cf_ips)
+        self._cf_ips, self._cf_index = list(cf_ips), cf_index
         app.logger.debug("CLOUDFLARE registered ips:\n%s}", self._cf_ips)
 
     @staticmethod
@@ -82,24 +92,28 @@ class CloudflareRemote:
                 )
             flask.abort(httpcode.FORBIDDEN, mess)
 
-    def _get_ip_list(self, app, uri):
-        if not self._cf_ips:
-            conn = http.client.HTTPSConnection(
-                host=app.config["CF_DOMAIN"],
-                timeout=app.config["CF_REQ_TIMEOUT"],
-                port=443,
-            )
-            conn.request("GET", uri)
-            res = conn.getresponse()
-            body = res.read()
-            conn.close()
+    @staticmethod
+    def _get_ip_list(app, uri):
+        conn = http.client.HTTPSConnection(
+            host=app.config["CF_DOMAIN"],
+            timeout=app.config["CF_REQ_TIMEOUT"],
+            port=443,
+        )
+        conn.request("GET", uri)
+        res = conn.getresponse()
+        body = res.read()
+        conn.close()
 
-            if res.status == httpcode.SUCCESS:
-                self._cf_ips = body.decode().strip("\n").split("\n")
-            else:
-                raise http.client.HTTPException(res.status, res.getheaders(), body)
+        if res.status != httpcode.SUCCESS:
+            raise http.client.HTTPException(res.status, res.getheaders(), body)
+        return body.decode().strip("\n").split("\n")
 
-        return self._cf_ips
+    def in_cloudflare_network(self, ipaddr) -> bool:
+        try:
+            return ipaddr in self._cf_index
+        except ValueError as exc:
+            flask.current_app.logger.exception(exc)
+            return False
 
     def is_cloudflare(self, remote=None):
         ip_check = False
@@ -109,10 +123,9 @@ class CloudflareRemote:
             remote = self.get_remote()
 
         for r in remote.split(","):
-            for ip in self._cf_ips:
-                if self.ip_in_network(r.strip(), ip):
-                    ip_check = True
-                    break
+            if self.in_cloudflare_network(r.strip()):
+                ip_check = True
+                break
 
         if flask.current_app.config["CF_HDR_CLIENT_IP"] in flask.request.headers:
             cf_req_check = True
@@ -1,11 +1,45 @@
+import functools
+import multiprocessing
+import os
+import threading
 import typing as t
+from concurrent.futures import Future, ProcessPoolExecutor
 
 import argon2
 from vbcore.crypto.argon import Argon2 as HasherArgon2, Argon2Options
+from vbcore.crypto.base import HashableType
+
+from flaskel.http.exceptions import ServiceUnavailable
+
+HasherFactory = t.Callable[[Argon2Options], HasherArgon2]
+
+
+@functools.lru_cache(maxsize=8)
+def _worker_hasher(argon_class: HasherFactory, options: Argon2Options) -> HasherArgon2:
+    return argon_class(options)
+
+
+def _worker_call(
+    argon_class: HasherFactory, options: Argon2Options, method: str, *args
+):
+    return getattr(_worker_hasher(argon_class, options), method)(*args)
 
 
 class Argon2:
+    """
+    With ``ARGON2_POOL_SIZE`` hashing and verification run in a pool of
+    processes, so the memory used is bounded by the pool size
+    (``ARGON2_MEMORY_COST`` KiB per process). ``hash`` and ``verify`` still
+    block the calling thread until the result is ready, ``hash_async`` and
+    ``verify_async`` return a future instead, e.g. to be awaited by
+    coroutine views with ``asyncio.wrap_future``.
+    Up to ``ARGON2_POOL_MAX_PENDING`` calls are queued: when the queue is
+    full for ``ARGON2_POOL_TIMEOUT`` seconds ServiceUnavailable is raised,
+    with ``ARGON2_POOL_RETRY_AFTER`` as Retry-After
+    """
+
     CONFIG_PREFIX = "ARGON2_"
+    POOL_PREFIX = "pool_"
     PROFILES: t.Dict[str, argon2.Parameters] = {
         "low": argon2.profiles.RFC_9106_LOW_MEMORY,
         "high": argon2.profiles.RFC_9106_HIGH_MEMORY,
@@ -13,6 +47,13 @@ class Argon2:
 
     def __init__(self, app=None, **kwargs):
         self._argon = None
+        self._argon_class: t.Type[HasherArgon2] = HasherArgon2
+        self._options: t.Optional[Argon2Options] = None
+        self._pool: t.Dict[str, t.Any] = {}
+        self._executor: t.Optional[ProcessPoolExecutor] = None
+        self._executor_pid: t.Optional[int] = None
+        self._executor_lock = threading.Lock()
+        self._slots: t.Optional[threading.BoundedSemaphore] = None
 
         if app is not None:
             self.init_app(app, **kwargs)
@@ -21,6 +62,10 @@ class Argon2:
     def set_default_config(cls, app):
         app.config.setdefault(f"{cls.CONFIG_PREFIX}PROFILE", "low")
         app.config.setdefault(f"{cls.CONFIG_PREFIX}ENCODING", "utf-8")
+        app.config.setdefault(f"{cls.CONFIG_PREFIX}POOL_SIZE", 0)
+        app.config.setdefault(f"{cls.CONFIG_PREFIX}POOL_MAX_PENDING", 0)
+        app.config.setdefault(f"{cls.CONFIG_PREFIX}POOL_TIMEOUT", 0.5)
+        app.config.setdefault(f"{cls.CONFIG_PREFIX}POOL_RETRY_AFTER", 1)
 
         argon_profile = app.config.pop(f"{cls.CONFIG_PREFIX}PROFILE", None)
         if argon_profile not in cls.PROFILES:
@@ -36,10 +81,87 @@ class Argon2:
 
     def init_app(self, app, argon_class: t.Type[HasherArgon2] = HasherArgon2):
         self.set_default_config(app)
-        self._argon = argon_class(
-            Argon2Options(**app.config.get_namespace(self.CONFIG_PREFIX))
+        namespace = app.config.get_namespace(self.CONFIG_PREFIX)
+        self._pool = {
+            k[len(self.POOL_PREFIX) :]: v
+            for k, v in namespace.items()
+            if k.startswith(self.POOL_PREFIX)
+        }
+        self._argon_class = argon_class
+        self._options = Argon2Options(
+            **{k: v for k, v in namespace.items() if not k.startswith(self.POOL_PREFIX)}
         )
+        self._argon = argon_class(self._options)
+        self.shutdown()
+        if self._pool["size"]:
+            max_pending = self._pool["max_pending"] or 2 * self._pool["size"]
+            self._slots = threading.BoundedSemaphore(max_pending)
         app.extensions["argon2"] = self
 
     def __getattr__(self, item):
         return getattr(self._argon, item)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """created at first use, and again in forked processes"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._pool["size"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def shutdown(self, wait: bool = True):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._slots = None
+
+    def submit(self, method: str, *args) -> Future:
+        """
+        :raise ServiceUnavailable: if the queue is still full after the timeout
+        """
+        future: Future
+        if self._slots is None:
+            future = Future()
+            try:
+                future.set_result(getattr(self._argon, method)(*args))
+            except Exception as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+            return future
+
+        slots = self._slots
+        if not slots.acquire(timeout=self._pool["timeout"]):
+            raise ServiceUnavailable(retry_after=self._pool["retry_after"])
+        try:
+            future = self.executor.submit(
+                _worker_call, self._argon_class, self._options, method, *args
+            )
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def hash_async(self, data: HashableType) -> "Future[str]":
+        return self.submit("hash", data)
+
+    def verify_async(
+        self, given_hash: str, data: HashableType, raise_exc: bool = False
+    ) -> "Future[bool]":
+        return self.submit("verify", given_hash, data, raise_exc)
+
+    def hash(self, data: HashableType) -> str:
+        if self._slots is None:
+            return self._argon.hash(data)
+        return self.hash_async(data).result()
+
+    def verify(
+        self, given_hash: str, data: HashableType, raise_exc: bool = False
+    ) -> bool:
+        if self._slots is None:
+            return self._argon.verify(given_hash, data, raise_exc)
+        return self.verify_async(given_hash, data, raise_exc).result()
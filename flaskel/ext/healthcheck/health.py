@@ -100,9 +100,12 @@ class HealthCheck:
             else set(only_checkers).intersection(all_checkers)
         )
 
+    def get_checker(self, name: str) -> t.Callable:
+        return self.app.ensure_batch_task(self._checkers[name], self._executor)
+
     def execute(self) -> t.Tuple[t.List[str], t.List[CheckerResponseType]]:
         checkers = self.get_checkers()
-        tasks = [(self._checkers.get(c), {"app": self.app}) for c in checkers]
+        tasks = [(self.get_checker(c), {"app": self.app}) for c in checkers]
         return checkers, self._executor(tasks=tasks).run()
 
     def perform(self) -> t.Tuple[dict, int, dict]:
@@ -1,7 +1,16 @@
+import atexit
 import ipaddress
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
 import typing as t
+import uuid
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from contextlib import contextmanager
 from functools import partial
 
 from redis import Redis
@@ -10,17 +19,156 @@ from vbcore.date_helper import Day
 from vbcore.http import httpcode
 
 from flaskel import abort, client_redis, flaskel
+from flaskel.utils.netindex import IpType, load_networks, NetType, NetworkIndex
 
 cap = flaskel.cap
 
-IpType = t.Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
-NetType = t.Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+LUA_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+"""
+
+
+class BanScoring(ABC):
+    """
+    Scores the attempts of a key instead of a fixed counter. Every strategy
+    has a lua implementation, evaluated atomically by redis with the redis
+    clock, and an in memory one that works on a state stored by the repo
+    """
+
+    lua_hit: str = ""
+    lua_score: str = ""
+
+    def hit_args(self, _ttl: t.Optional[int]) -> list:
+        return []
+
+    def score_args(self) -> list:
+        return []
+
+    @abstractmethod
+    def hit(
+        self, state: t.Any, now: float, ttl: t.Optional[int]
+    ) -> t.Tuple[t.Any, int]:
+        """:return: the new state and score"""
+
+    @abstractmethod
+    def score(self, state: t.Any, now: float) -> int:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def expires_at(self, state: t.Any, now: float) -> t.Optional[float]:
+        """when the state can be dropped, None if never"""
+
+
+class SlidingWindowScoring(BanScoring):
+    """
+    Sliding window log: every attempt expires ttl seconds after it is made,
+    the score is the count of the attempts not expired, so slow scanners
+    are forgotten and the ban ends when the oldest attempts age out
+    """
+
+    lua_hit = f"""{LUA_NOW}
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if ARGV[1] == '' then
+    redis.call('ZADD', KEYS[1], '+inf', ARGV[2])
+    redis.call('PERSIST', KEYS[1])
+else
+    local ttl = tonumber(ARGV[1])
+    redis.call('ZADD', KEYS[1], now + ttl, ARGV[2])
+    local permanent = redis.call('ZCOUNT', KEYS[1], '+inf', '+inf')
+    if permanent == 0 and redis.call('PTTL', KEYS[1]) < ttl * 1000 then
+        redis.call('PEXPIRE', KEYS[1], math.ceil(ttl * 1000))
+    end
+end
+return redis.call('ZCARD', KEYS[1])
+"""
+    lua_score = f"""{LUA_NOW}
+return redis.call('ZCOUNT', KEYS[1], '(' .. now, '+inf')
+"""
+
+    def hit_args(self, ttl: t.Optional[int]) -> list:
+        return ["" if ttl is None else ttl, uuid.uuid4().hex]
+
+    def hit(
+        self, state: t.Optional[t.List[float]], now: float, ttl: t.Optional[int]
+    ) -> t.Tuple[t.List[float], int]:
+        expires = [e for e in state or () if e > now]
+        expires.append(math.inf if ttl is None else now + ttl)
+        return expires, len(expires)
+
+    def score(self, state: t.Optional[t.List[float]], now: float) -> int:
+        return sum(1 for e in state or () if e > now)
+
+    def expires_at(self, state: t.List[float], now: float) -> t.Optional[float]:
+        last = max(state)
+        return None if last == math.inf else last
+
+
+class TokenBucketScoring(BanScoring):
+    """
+    Token bucket with capacity max_attempts: every attempt takes a token and
+    rate tokens per second are given back, the score is the count of tokens
+    not yet given back. Bursts are banned, steady traffic under the rate
+    never is, e.g. many users behind a NAT; ttl is not used, keys expire
+    when the bucket is full again
+    """
+
+    lua_hit = f"""{LUA_NOW}
+local rate = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'level', 'time')
+local level = tonumber(state[1]) or 0
+local last = tonumber(state[2]) or now
+level = math.max(0, level - (now - last) * rate) + 1
+redis.call('HMSET', KEYS[1], 'level', tostring(level), 'time', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(level / rate * 1000))
+return math.ceil(level)
+"""
+    lua_score = f"""{LUA_NOW}
+local rate = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'level', 'time')
+local level = tonumber(state[1]) or 0
+local last = tonumber(state[2]) or now
+return math.ceil(math.max(0, level - (now - last) * rate))
+"""
+
+    def __init__(self, rate: float = 1 / 60):
+        self.rate = rate
+
+    def hit_args(self, _ttl: t.Optional[int]) -> list:
+        return [self.rate]
+
+    def score_args(self) -> list:
+        return [self.rate]
+
+    def level(self, state: t.Optional[t.Tuple[float, float]], now: float) -> float:
+        level, last = state or (0, now)
+        return max(0.0, level - (now - last) * self.rate)
+
+    def hit(
+        self, state: t.Optional[t.Tuple[float, float]], now: float, _ttl=None
+    ) -> t.Tuple[t.Tuple[float, float], int]:
+        level = self.level(state, now) + 1
+        return (level, now), math.ceil(level)
+
+    def score(self, state: t.Optional[t.Tuple[float, float]], now: float) -> int:
+        return math.ceil(self.level(state, now))
+
+    def expires_at(self, state: t.Tuple[float, float], now: float) -> float:
+        return now + self.level(state, now) / self.rate
 
 
 class IBanRepo(ABC):
-    def __init__(self, *_, key_prefix: str = "", separator: str = "/", **__):
+    def __init__(
+        self,
+        *_,
+        key_prefix: str = "",
+        separator: str = "/",
+        scoring: t.Optional[BanScoring] = None,
+        **__,
+    ):
         self.separator = separator
         self.key_prefix = key_prefix
+        self.scoring = scoring
 
     def prepare_key(self, key: str) -> str:
         return f"{self.key_prefix}{self.separator}{key}"
@@ -37,18 +185,89 @@ class IBanRepo(ABC):
     def unban(self, key: str):
         pass  # pragma: no cover
 
+    def attempts_many(self, key: str, *others: "IBanRepo") -> t.List[int]:
+        """attempts of key in this repo followed by the ones in others"""
+        return [self.attempts(key), *(repo.attempts(key) for repo in others)]
+
+    def flush(self):
+        """writes the pending increments, if the repo batches them"""
+
 
 class BanRepoRedis(IBanRepo):
-    def __init__(self, client: Redis, **kwargs):
+    """
+    With ``flush_interval`` the increments are batched in memory and written
+    by a background thread every ``flush_interval`` seconds in one pipeline,
+    the pending increments of this process are counted by ``attempts``
+    and kept for the next flush if the pipeline fails.
+    Batching does not apply to scoring, evaluated by redis on every attempt
+    """
+
+    def __init__(self, client: Redis, flush_interval: float = 0, **kwargs):
         super().__init__(**kwargs)
         self.client = client
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: t.Dict[str, t.Tuple[int, t.Optional[int]]] = {}
+        self._flusher: t.Optional[threading.Thread] = None
+        if self.scoring is not None:
+            self._hit_script = client.register_script(self.scoring.lua_hit)
+            self._score_script = client.register_script(self.scoring.lua_score)
+
+    def pending(self, cache_key: str) -> int:
+        return self._pending.get(cache_key, (0, None))[0]
+
+    def read_attempts(self, client, cache_key: str):
+        """queues the read of the attempts when client is a pipeline"""
+        if self.scoring is None:
+            return client.get(cache_key)
+        args = self.scoring.score_args()
+        return self._score_script(keys=[cache_key], args=args, client=client)
+
+    def parse_attempts(self, cache_key: str, value) -> int:
+        return (int(value) if value else 0) + self.pending(cache_key)
 
     def attempts(self, key: str) -> int:
-        value = self.client.get(self.prepare_key(key))
-        return int(value) if value else 0
+        cache_key = self.prepare_key(key)
+        return self.parse_attempts(
+            cache_key, self.read_attempts(self.client, cache_key)
+        )
+
+    def attempts_many(self, key: str, *others: IBanRepo) -> t.List[int]:
+        if not all(
+            isinstance(repo, BanRepoRedis) and repo.client is self.client
+            for repo in others
+        ):
+            return super().attempts_many(key, *others)
+
+        repos = (self, *t.cast(t.Tuple[BanRepoRedis, ...], others))
+        cache_keys = [repo.prepare_key(key) for repo in repos]
+        if all(repo.scoring is None for repo in repos):
+            values = t.cast(t.List[t.Any], self.client.mget(cache_keys))
+        else:
+            pipe = self.client.pipeline(transaction=False)
+            for repo, cache_key in zip(repos, cache_keys):
+                repo.read_attempts(pipe, cache_key)
+            values = pipe.execute()
+
+        return [
+            repo.parse_attempts(cache_key, value)
+            for repo, cache_key, value in zip(repos, cache_keys, values)
+        ]
 
     def ban(self, key: str, ttl: t.Optional[int] = None) -> int:
+        """when batched, the result counts only the pending increments"""
         cache_key = self.prepare_key(key)
+        if self.scoring is not None:
+            args = self.scoring.hit_args(ttl)
+            return int(self._hit_script(keys=[cache_key], args=args))
+
+        if self.flush_interval:
+            with self._lock:
+                attempts = self.pending(cache_key) + 1
+                self._pending[cache_key] = (attempts, ttl)
+            self.start_flusher()
+            return attempts
+
         pipe = self.client.pipeline()
         pipe.incr(cache_key)
         if ttl is not None:
@@ -57,10 +276,56 @@ class BanRepoRedis(IBanRepo):
         return result[0]
 
     def unban(self, key: str):
-        self.client.delete(self.prepare_key(key))
+        cache_key = self.prepare_key(key)
+        with self._lock:
+            self._pending.pop(cache_key, None)
+        self.client.delete(cache_key)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        pipe = self.client.pipeline(transaction=False)
+        for cache_key, (attempts, ttl) in pending.items():
+            pipe.incrby(cache_key, attempts)
+            if ttl is not None:
+                pipe.expire(cache_key, ttl)
+        try:
+            pipe.execute()
+        except Exception:
+            self.restore(pending)
+            raise
+
+    def restore(self, pending: t.Dict[str, t.Tuple[int, t.Optional[int]]]):
+        """merges back the increments of a failed flush, keeps the newer ttl"""
+        with self._lock:
+            for cache_key, (attempts, ttl) in pending.items():
+                newer, newer_ttl = self._pending.get(cache_key, (0, ttl))
+                self._pending[cache_key] = (attempts + newer, newer_ttl)
+
+    def start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as exc:  # pylint: disable=broad-except
+                logging.getLogger(__name__).exception(exc)
 
 
 class BanRepoLocal(IBanRepo):
+    """per process repo, expiration uses the monotonic clock"""
+
     def __init__(
         self,
         client_class: t.Type[LRUCache] = LRUCache,
@@ -69,25 +334,35 @@ class BanRepoLocal(IBanRepo):
     ):
         super().__init__(**kwargs)
         self.client = client_class(maxsize)
+        self._lock = threading.Lock()
 
-    def get(self, key: str) -> t.Tuple[int, t.Optional[datetime]]:
-        attempts, set_time = self.client.get(self.prepare_key(key)) or (0, None)
-        if set_time and set_time < datetime.now():
+    def get(self, key: str) -> t.Tuple[int, t.Optional[float]]:
+        attempts, expires_at = self.client.get(self.prepare_key(key)) or (0, None)
+        if expires_at is not None and expires_at <= time.monotonic():
             self.unban(key)
             return 0, None
-        return attempts, set_time
+        return attempts, expires_at
 
     def attempts(self, key: str) -> int:
+        if self.scoring is not None:
+            state = self.client.get(self.prepare_key(key))
+            return self.scoring.score(state, time.monotonic())
         return self.get(key)[0]
 
     def ban(self, key: str, ttl: t.Optional[int] = None) -> int:
-        attempts, set_time = self.get(key)
-        set_time = (
-            None
-            if ttl is None
-            else (set_time or datetime.now()) + timedelta(seconds=ttl)
-        )
-        self.client.set(self.prepare_key(key), (attempts + 1, set_time))
+        if self.scoring is not None:
+            cache_key = self.prepare_key(key)
+            with self._lock:
+                state = self.client.get(cache_key)
+                state, score = self.scoring.hit(state, time.monotonic(), ttl)
+                self.client.set(cache_key, state)
+            return score
+
+        with self._lock:
+            attempts, expires_at = self.get(key)
+            if ttl is not None:
+                expires_at = (expires_at or time.monotonic()) + ttl
+            self.client.set(self.prepare_key(key), (attempts + 1, expires_at))
         return attempts + 1
 
     def unban(self, key: str):
@@ -97,6 +372,131 @@ class BanRepoLocal(IBanRepo):
             pass
 
 
+class BanRepoSQLite(IBanRepo):
+    """
+    Repo shared by the processes of a host, e.g. the workers of a wsgi
+    server, without redis: a SQLite database in WAL mode where keys are
+    stored as packed addresses when they are ips.
+
+    Expiration uses the wall clock, like redis: the monotonic clock is reset
+    at boot, so its deadlines do not survive a reboot of the host.
+    Every write removes at most ``cleanup_batch`` expired entries,
+    so the cleanup is spread over the writes
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS bans ("
+        " scope TEXT NOT NULL,"
+        " key BLOB NOT NULL,"
+        " attempts INTEGER NOT NULL DEFAULT 0,"
+        " state TEXT,"
+        " expires_at REAL,"
+        " PRIMARY KEY (scope, key))",
+        "CREATE INDEX IF NOT EXISTS bans_expires_at ON bans (expires_at)",
+    )
+
+    def __init__(
+        self,
+        path: str = ".ipban.db",
+        timeout: float = 5.0,
+        cleanup_batch: int = 16,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.timeout = timeout
+        self.cleanup_batch = cleanup_batch
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction(conn):
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """a connection per thread, opened again in forked processes"""
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            self._local.conn = self.connect()
+            self._local.pid = pid
+        return self._local.conn
+
+    @staticmethod
+    @contextmanager
+    def transaction(conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def pack_key(key: str) -> bytes:
+        try:
+            return ipaddress.ip_address(key).packed
+        except ValueError:
+            return key.encode()
+
+    def select(self, conn: sqlite3.Connection, key: str, now: float):
+        return conn.execute(
+            "SELECT attempts, state FROM bans WHERE scope = ? AND key = ?"
+            " AND (expires_at IS NULL OR expires_at > ?)",
+            (self.key_prefix, self.pack_key(key), now),
+        ).fetchone()
+
+    def cleanup(self, conn: sqlite3.Connection, now: float):
+        conn.execute(
+            "DELETE FROM bans WHERE rowid IN (SELECT rowid FROM bans"
+            " WHERE expires_at <= ? LIMIT ?)",
+            (now, self.cleanup_batch),
+        )
+
+    def attempts(self, key: str) -> int:
+        now = time.time()
+        row = self.select(self.conn, key, now)
+        if row is None:
+            return 0
+        if self.scoring is None:
+            return row[0]
+        return self.scoring.score(json.loads(row[1]), now)
+
+    def ban(self, key: str, ttl: t.Optional[int] = None) -> int:
+        """like the redis counter: every attempt sets the expiration"""
+        now = time.time()
+        with self.transaction(self.conn) as conn:
+            self.cleanup(conn, now)
+            row = self.select(conn, key, now)
+            if self.scoring is None:
+                attempts, state = (row[0] if row else 0) + 1, None
+                expires_at = None if ttl is None else now + ttl
+            else:
+                state, attempts = self.scoring.hit(
+                    json.loads(row[1]) if row else None, now, ttl
+                )
+                expires_at = self.scoring.expires_at(state, now)
+                state = json.dumps(state)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO bans (scope, key, attempts, state, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.key_prefix, self.pack_key(key), attempts, state, expires_at),
+            )
+        return attempts
+
+    def unban(self, key: str):
+        self.conn.execute(
+            "DELETE FROM bans WHERE scope = ? AND key = ?",
+            (self.key_prefix, self.pack_key(key)),
+        )
+
+
 class IpBanService:
     def __init__(
         self,
@@ -104,31 +504,69 @@ class IpBanService:
         key_prefix: str,
         max_attempts: t.Optional[int] = None,
         default_ttl: t.Optional[int] = None,
+        clean_ttl: float = 0,
+        clean_cache_size: int = 10000,
         **kwargs,
     ):
+        """
+        :param clean_ttl: seconds an ip found not banned is not checked again,
+            bans made by other processes are seen after at most clean_ttl
+        """
         self.default_ttl = default_ttl
         self.max_attempts = max_attempts
+        self.clean_cache: t.Optional[ExpiringCache] = None
+        if clean_ttl:
+            self.clean_cache = ExpiringCache(clean_cache_size, max_age=clean_ttl)
         self.white_list: t.Set[IpType] = set()
         self.net_white_list: t.Set[NetType] = set()
+        self.whitelist_index = NetworkIndex()
+        self.blacklist_index = NetworkIndex()
         self.repo: IBanRepo = repo_class(key_prefix=key_prefix, **kwargs)
+        # permanent bans are counters never batched
+        kwargs.pop("flush_interval", None)
+        kwargs.pop("scoring", None)
         self.black_list: IBanRepo = repo_class(
             key_prefix=self.repo.prepare_key("blacklist"), **kwargs
         )
 
-    def load_whitelist(self, ip: t.Iterable[str] = (), net: t.Iterable[str] = ()):
+    def load_whitelist(
+        self,
+        ip: t.Iterable[str] = (),
+        net: t.Iterable[str] = (),
+        sources: t.Iterable[str] = (),
+    ):
+        """
+        adds addresses and networks to the whitelist,
+        sources are files or urls with one network per line
+        """
         self.white_list.update(ipaddress.ip_address(i) for i in ip)
         self.net_white_list.update(ipaddress.ip_network(n) for n in net)
+        self.net_white_list.update(load_networks(*sources))
+        self.whitelist_index = NetworkIndex([*self.white_list, *self.net_white_list])
+
+    def reload_whitelist(
+        self,
+        ip: t.Iterable[str] = (),
+        net: t.Iterable[str] = (),
+        sources: t.Iterable[str] = (),
+    ):
+        """replaces the whitelist, checks in progress use the previous one"""
+        white_list = {ipaddress.ip_address(i) for i in ip}
+        net_white_list = {ipaddress.ip_network(n) for n in net}
+        net_white_list.update(load_networks(*sources))
+        self.whitelist_index = NetworkIndex([*white_list, *net_white_list])
+        self.white_list, self.net_white_list = white_list, net_white_list
+
+    def load_blacklist(self, net: t.Iterable[str] = (), sources: t.Iterable[str] = ()):
+        """replaces the networks that are always banned"""
+        self.blacklist_index = NetworkIndex([*net, *load_networks(*sources)])
 
     def is_whitelisted(self, ip: str) -> bool:
-        ip_addr = ipaddress.ip_address(ip)
-        if ip_addr in self.white_list:
-            return True
-        for net in self.net_white_list:
-            if ip_addr in net:
-                return True
-        return False
+        return ip in self.whitelist_index
 
     def is_blacklisted(self, ip: str) -> bool:
+        if ip in self.blacklist_index:
+            return True
         return bool(self.black_list.attempts(ip))
 
     def add_blacklist(self, ip: str):
@@ -142,24 +580,44 @@ class IpBanService:
 
         if self.is_whitelisted(ip) or self.is_blacklisted(ip):
             return None
+        return self.add_attempt(ip, ttl)
+
+    def add_attempt(self, ip: str, ttl: t.Optional[int] = None) -> int:
+        """like ban, but the caller already knows ip is not in the lists"""
+        if self.clean_cache is not None:
+            self.clean_cache.delete(ip)
         return self.repo.ban(ip, ttl or self.default_ttl)
 
     def is_banned(self, ip: str) -> bool:
         if self.is_whitelisted(ip):
             return False
-        if self.is_blacklisted(ip):
+        if ip in self.blacklist_index:
             return True
+        if self.clean_cache is not None and ip in self.clean_cache:
+            return False
 
-        return self.repo.attempts(ip) >= self.max_attempts
+        attempts, blacklisted = self.repo.attempts_many(ip, self.black_list)
+        if blacklisted:
+            return True
+        if attempts >= self.max_attempts:
+            return True
+        if self.clean_cache is not None:
+            self.clean_cache.set(ip, True)
+        return False
 
 
 class FlaskIPBan:
     def __init__(self, app=None, **kwargs) -> None:
         self.service: t.Optional[IpBanService] = None
         self.backends: t.Dict[str, t.Type[IBanRepo]] = {}
+        self.scorings: t.Dict[str, t.Callable[..., t.Optional[BanScoring]]] = {}
 
-        self.register_backend("local", BanRepoLocal, client_class=ExpiringCache)
+        self.register_backend("local", BanRepoLocal)
         self.register_backend("redis", BanRepoRedis, client=client_redis)
+        self.register_backend("sqlite", BanRepoSQLite)
+        self.register_scoring("counter", lambda **_: None)
+        self.register_scoring("window", SlidingWindowScoring)
+        self.register_scoring("bucket", TokenBucketScoring)
 
         if app is not None:
             self.init_app(app, **kwargs)
@@ -175,6 +633,13 @@ class FlaskIPBan:
         app.config.setdefault("IPBAN_SECONDS", Day.seconds)
         app.config.setdefault("IPBAN_NET_WHITELIST", ["127.0.0.0/8"])
         app.config.setdefault("IPBAN_IP_WHITELIST", ["127.0.0.1"])
+        app.config.setdefault("IPBAN_WHITELIST_SOURCES", [])
+        app.config.setdefault("IPBAN_NET_BLACKLIST", [])
+        app.config.setdefault("IPBAN_BLACKLIST_SOURCES", [])
+        app.config.setdefault("IPBAN_SCORING", "counter")
+        app.config.setdefault("IPBAN_SCORING_OPTS", {})
+        app.config.setdefault("IPBAN_CLEAN_TTL", 0)
+        app.config.setdefault("IPBAN_FLUSH_INTERVAL", 0)
         app.config.setdefault("IPBAN_STATUS_CODE", httpcode.FORBIDDEN)
         app.config.setdefault(
             "IPBAN_CHECK_CODES",
@@ -192,7 +657,13 @@ class FlaskIPBan:
             app.before_request(self.before_request_hook)
             self.service = self.service_factory(service_class, app.config)
             self.service.load_whitelist(
-                ip=app.config.IPBAN_IP_WHITELIST, net=app.config.IPBAN_NET_WHITELIST
+                ip=app.config.IPBAN_IP_WHITELIST,
+                net=app.config.IPBAN_NET_WHITELIST,
+                sources=app.config.IPBAN_WHITELIST_SOURCES,
+            )
+            self.service.load_blacklist(
+                net=app.config.IPBAN_NET_BLACKLIST,
+                sources=app.config.IPBAN_BLACKLIST_SOURCES,
             )
 
         app.extensions["ipban"] = self
@@ -204,6 +675,9 @@ class FlaskIPBan:
             default_ttl=config.IPBAN_SECONDS,
             key_prefix=config.IPBAN_KEY_PREFIX,
             separator=config.IPBAN_KEY_SEP,
+            clean_ttl=config.IPBAN_CLEAN_TTL,
+            flush_interval=config.IPBAN_FLUSH_INTERVAL,
+            scoring=self.scorings[config.IPBAN_SCORING](**config.IPBAN_SCORING_OPTS),
             **config.IPBAN_BACKEND_OPTS,
         )
 
@@ -213,6 +687,11 @@ class FlaskIPBan:
         backend = partial(repo_class, *args, **kwargs)
         self.backends[name] = t.cast(t.Type[IBanRepo], backend)
 
+    def register_scoring(
+        self, name: str, scoring_class: t.Callable[..., t.Optional[BanScoring]]
+    ):
+        self.scorings[name] = scoring_class
+
     @classmethod
     def get_ip(cls) -> str:
         return flaskel.request.remote_addr
@@ -220,7 +699,10 @@ class FlaskIPBan:
     def after_request_hook(self, response):
         if response.status_code in cap.config.IPBAN_CHECK_CODES:
             ip = self.get_ip()
-            attempts = self.service.ban(ip)
+            if self.service.is_whitelisted(ip):
+                return response
+            # the blacklist is already checked by before_request_hook
+            attempts = self.service.add_attempt(ip)
             if attempts:
                 cap.logger.info("%s added to ban list with attempts: %s", ip, attempts)
         return response
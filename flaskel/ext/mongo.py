@@ -121,8 +121,14 @@ class BaseRepo:
         projection: t.Optional[t.List[str]] = None,
         sort: t.Optional[SortType] = None,
         collection: t.Optional[str] = None,
+        lazy: bool = False,
         **kwargs,
-    ) -> t.Union[t.Tuple[list, int, dict], t.List[dict]]:
+    ) -> t.Union[t.Tuple[t.Iterable[dict], int, dict], t.Iterable[dict]]:
+        """
+        :param lazy: returns a generator over the cursor instead of a list,
+            so records can be streamed by the response builders
+        """
+        prepare = cls.iter_records if lazy else cls.list_records
         cursor = partial(
             cls.find,
             collection=collection,
@@ -141,7 +147,7 @@ class BaseRepo:
                 else tuple()
             )
             return (
-                [cls.prepare_record(d) for d in _cursor],
+                prepare(_cursor),
                 (
                     httpcode.PARTIAL_CONTENT
                     if pagination.is_paginated(total)
@@ -150,7 +156,15 @@ class BaseRepo:
                 Response.pagination_headers(total, pagination),
             )
 
-        return [cls.prepare_record(d) for d in cursor()]
+        return prepare(cursor())
+
+    @classmethod
+    def iter_records(cls, cursor: t.Iterable[dict]) -> t.Iterator[dict]:
+        return (cls.prepare_record(d) for d in cursor)
+
+    @classmethod
+    def list_records(cls, cursor: t.Iterable[dict]) -> t.List[dict]:
+        return [cls.prepare_record(d) for d in cursor]
 
     @classmethod
     def get_detail(
@@ -1,10 +1,14 @@
+import functools
+import typing as t
 from functools import wraps
 
 import flask
 from flask import current_app as cap
+from vbcore import aio
 from vbcore.http import httpcode
 from vbcore.http.headers import HeaderEnum
-from werkzeug.datastructures import Headers
+from werkzeug.datastructures import Headers, MIMEAccept
+from werkzeug.http import parse_accept_header
 
 from .builders.builder import Builder
 from .config import DEFAULT_BUILDERS, set_default_config
@@ -13,6 +17,11 @@ from .config import DEFAULT_BUILDERS, set_default_config
 class ResponseBuilder:
     def __init__(self, app=None, builders=None):
         self._builders = {}
+        self._mimetypes: t.Dict[str, t.Tuple[str, Builder]] = {}
+        self._default_format = None
+        self._acceptable: t.FrozenSet[str] = frozenset()
+        self._format_key = None
+        self._negotiate = functools.lru_cache(maxsize=512)(self._negotiate_accept)
 
         if app is not None:
             self.init_app(app, builders)
@@ -21,6 +30,14 @@ class ResponseBuilder:
         set_default_config(app)
         app.extensions["response_builder"] = self
 
+        # negotiation settings are read once, like the builders conf
+        self._default_format = app.config["RB_DEFAULT_RESPONSE_FORMAT"]
+        self._acceptable = frozenset(app.config["RB_DEFAULT_ACCEPTABLE_MIMETYPES"])
+        self._format_key = app.config["RB_FORMAT_KEY"]
+        self._negotiate = functools.lru_cache(
+            maxsize=app.config["RB_NEGOTIATION_CACHE_SIZE"]
+        )(self._negotiate_accept)
+
         for name, builder in {**DEFAULT_BUILDERS, **(builders or {})}.items():
             self.register_builder(name, builder, **app.config)
 
@@ -37,6 +54,7 @@ class ResponseBuilder:
             builder.conf.update(kwargs)
 
         self._builders.update({name: builder})
+        self._index_builders()
 
         def _builder_attr(**params):
             def _wrapper(func=None, data=None):
@@ -46,12 +64,9 @@ class ResponseBuilder:
                     if data is provided means decorator used as attribute
                 """
                 if func is not None:
-
-                    @wraps(func)
-                    def wrapped():
-                        return self.build_response(name, func(), **params)
-
-                    return wrapped
+                    return self.wrap_view(
+                        func, lambda resp, _: self.build_response(name, resp, **params)
+                    )
 
                 return self.build_response(name, data, **params)
 
@@ -59,6 +74,50 @@ class ResponseBuilder:
 
         setattr(self, name, _builder_attr)
 
+    def _index_builders(self):
+        """mimetype -> (name, builder), the first registered builder wins"""
+        self._mimetypes = {}
+        for name, builder in self._builders.items():
+            self._mimetypes.setdefault(builder.mimetype, (name, builder))
+        self.negotiation_cache_clear()
+
+    def negotiation_cache_info(self):
+        """hits, misses and size of the accept header negotiation cache"""
+        return self._negotiate.cache_info()
+
+    def negotiation_cache_clear(self):
+        self._negotiate.cache_clear()
+
+    @staticmethod
+    def wrap_view(
+        func: t.Callable,
+        finalize: t.Callable[[t.Any, t.Any], t.Any],
+        prepare: t.Optional[t.Callable[[], t.Any]] = None,
+    ) -> t.Callable:
+        """
+        Decorates a view, plain or coroutine function, so that its response
+        is passed to finalize, with the result of prepare called before it
+        """
+        if aio.is_async(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                prepared = prepare() if prepare else None
+                return finalize(await func(*args, **kwargs), prepared)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            prepared = prepare() if prepare else None
+            return finalize(func(*args, **kwargs), prepared)
+
+        return wrapper
+
+    def find_builder(self, mimetype: t.Optional[str]) -> t.Optional[Builder]:
+        _, builder = self._mimetypes.get(mimetype, (None, None))
+        return builder
+
     @staticmethod
     def _empty_response(status, headers):
         resp = flask.make_response(b"", status, headers)
@@ -75,13 +134,9 @@ class ResponseBuilder:
             return self._empty_response(status, headers)
 
         if not builder:
-            default_format = cap.config.get("RB_DEFAULT_RESPONSE_FORMAT")
-            m = headers.get(HeaderEnum.CONTENT_TYPE) or default_format
-            for value in self._builders.values():
-                if value.mimetype == m:
-                    builder = value
-                    break
-            else:
+            m = headers.get(HeaderEnum.CONTENT_TYPE) or self._default_format
+            builder = self.find_builder(m)
+            if not builder:
                 allowed = ", ".join(self._builders.keys())
                 raise NameError(f"Builder not found: using one of: '{allowed}'")
         elif not issubclass(builder.__class__, Builder):
@@ -90,31 +145,56 @@ class ResponseBuilder:
                 f"You must extend class: '{Builder.__name__}'"
             )
 
-        builder.build(data, **kwargs)
-        return builder.response(status=status, headers=headers)
-
-    def get_mimetype_accept(self, default=None, acceptable=None, strict=True):
-        def find_builder(a):
-            for b in self._builders.values():
-                if a == b.mimetype:
-                    return b
-            return None
-
-        mimetypes = flask.request.accept_mimetypes
-        default = default or cap.config["RB_DEFAULT_RESPONSE_FORMAT"]
-        acceptable = acceptable or cap.config["RB_DEFAULT_ACCEPTABLE_MIMETYPES"]
+        result = builder.render(data, **kwargs)
+        response = builder.response(result, status=status, headers=headers)
+        if cap.config.get("RB_CONDITIONAL_ENABLED"):
+            return self.make_conditional(response)
+        return response
 
+    @staticmethod
+    def make_conditional(response):
+        """
+        Adds a strong ETag (content hash) to successful GET/HEAD responses
+        and turns them into 304 if the request validators match
+        """
+        if flask.request.method not in ("GET", "HEAD"):
+            return response
+        if response.status_code != httpcode.SUCCESS or response.is_streamed:
+            return response
+
+        response.add_etag(overwrite=False)
+        return response.make_conditional(flask.request)
+
+    def _negotiate_accept(
+        self, accept: str, default: str, acceptable: t.FrozenSet[str]
+    ) -> t.Optional[t.Tuple[str, Builder]]:
+        """
+        memoized by raw Accept header, see ``RB_NEGOTIATION_CACHE_SIZE``:
+        clients send a handful of distinct values, so the header is parsed
+        only on the first request that carries it
+        """
+        mimetypes = parse_accept_header(accept, MIMEAccept)
         if not mimetypes or str(mimetypes) == "*/*":
-            builder = find_builder(default)
+            builder = self.find_builder(default)
             if builder:
                 return default, builder
 
-        for m in mimetypes:
-            m = m[0].split(";")[0]  # in order to remove encoding param
-            accept = m if m in acceptable else None
-            builder = find_builder(accept)
+        for value, _ in mimetypes:
+            mimetype = value.split(";")[0]  # in order to remove encoding param
+            builder = self.find_builder(mimetype) if mimetype in acceptable else None
             if builder:
-                return accept, builder
+                return mimetype, builder
+
+        return None
+
+    def get_mimetype_accept(self, default=None, acceptable=None, strict=True):
+        default = default or self._default_format
+        acceptable = frozenset(acceptable) if acceptable else self._acceptable
+        accept = flask.request.headers.get(HeaderEnum.ACCEPT, "")
+
+        negotiated = self._negotiate(accept, default, acceptable)
+        if negotiated:
+            return negotiated
 
         if strict is True:
             flask.abort(
@@ -122,7 +202,7 @@ class ResponseBuilder:
                 f"Not Acceptable: {flask.request.accept_mimetypes}",
             )
 
-        return default, find_builder(default)
+        return default, self.find_builder(default)
 
     @staticmethod
     def normalize_response_data(data):
@@ -138,9 +218,7 @@ class ResponseBuilder:
         return data, None, Headers()
 
     def no_content(self, func):
-        @wraps(func)
-        def wrapped(*args, **kwargs):
-            resp = func(*args, **kwargs)
+        def finalize(resp, _):
             data, status, headers = self.normalize_response_data(resp)
 
             if data:
@@ -151,68 +229,63 @@ class ResponseBuilder:
 
             return resp
 
-        return wrapped
+        return self.wrap_view(func, finalize)
 
     def on_format(self, default=None, acceptable=None):
-        def response(fun):
-            @wraps(fun)
-            def wrapper(*args, **kwargs):
-                builder = (
-                    flask.request.args.get(cap.config.get("RB_FORMAT_KEY")) or default
-                )
-                if builder not in (acceptable or self._builders):
-                    for k, v in self._builders.items():
-                        if v.mimetype == cap.config.get("RB_DEFAULT_RESPONSE_FORMAT"):
-                            builder = k
-                            break
-
-                return self.build_response(builder, fun(*args, **kwargs))
+        def prepare():
+            builder = flask.request.args.get(self._format_key) or default
+            if builder not in (acceptable or self._builders):
+                builder, _ = self._mimetypes.get(self._default_format, (builder, None))
+            return builder
 
-            return wrapper
+        def response(fun):
+            return self.wrap_view(
+                fun, lambda resp, builder: self.build_response(builder, resp), prepare
+            )
 
         return response
 
     def on_accept(self, default=None, acceptable=None, strict=True):
-        def response(fun):
-            @wraps(fun)
-            def wrapper(*args, **kwargs):
-                _, builder = self.get_mimetype_accept(default, acceptable, strict)
-                return self.build_response(builder, fun(*args, **kwargs))
+        acceptable = frozenset(acceptable) if acceptable else None
 
-            return wrapper
+        def prepare():
+            _, builder = self.get_mimetype_accept(default, acceptable, strict)
+            return builder
+
+        def response(fun):
+            return self.wrap_view(
+                fun, lambda resp, builder: self.build_response(builder, resp), prepare
+            )
 
         return response
 
     def response(self, builder, **kwargs):
         def _response(f):
-            @wraps(f)
-            def wrapper(*args, **kw):
-                return self.build_response(builder, f(*args, **kw), **kwargs)
-
-            return wrapper
+            return self.wrap_view(
+                f, lambda resp, _: self.build_response(builder, resp, **kwargs)
+            )
 
         return _response
 
     def template_or_json(self, template: str, as_table=False, to_dict=None):
-        def response(fun):
-            @wraps(fun)
-            def wrapper(*args, **kwargs):
-                varargs = {}
-                builder = self._builders.get("json")
-
-                # check if request is XHR
-                if (
-                    flask.request.headers.get("X-Requested-With", "").lower()
-                    == "xmlhttprequest"
-                ):
-                    builder = self._builders.get("html")
-                    varargs.update(
-                        template=template, as_table=as_table, to_dict=to_dict
-                    )
+        def prepare():
+            varargs = {}
+            builder = self._builders.get("json")
+
+            # check if request is XHR
+            if (
+                flask.request.headers.get("X-Requested-With", "").lower()
+                == "xmlhttprequest"
+            ):
+                builder = self._builders.get("html")
+                varargs.update(template=template, as_table=as_table, to_dict=to_dict)
+            return builder, varargs
+
+        def finalize(resp, prepared):
+            builder, varargs = prepared
+            return self.build_response(builder, resp, **varargs)
 
-                resp = fun(*args, **kwargs)
-                return self.build_response(builder, resp, **varargs)
-
-            return wrapper
+        def response(fun):
+            return self.wrap_view(fun, finalize, prepare)
 
         return response
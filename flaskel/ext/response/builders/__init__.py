@@ -1,6 +1,9 @@
+from .arrow import ArrowBuilder, ParquetBuilder
 from .base64 import Base64Builder
+from .binary import BinaryBuilder, CborBuilder, MsgpackBuilder
+from .builder import Builder, BuildResult
 from .csv import CsvBuilder
 from .html import HtmlBuilder
-from .json import JsonBuilder
+from .json import JsonBuilder, NdJsonBuilder
 from .xml import XmlBuilder
 from .yaml import YamlBuilder
@@ -0,0 +1,142 @@
+import io
+import itertools
+import typing as t
+from collections.abc import Iterable, Mapping
+
+import flask
+
+from ..dictutils import iter_flatten
+from .builder import Builder, BuildResult
+
+try:
+    import pyarrow
+    from pyarrow import ipc as pyarrow_ipc, parquet as pyarrow_parquet
+except ImportError:  # pragma: no cover
+    pyarrow = pyarrow_ipc = pyarrow_parquet = None
+
+
+class ArrowBuilder(Builder):
+    """
+    Arrow IPC stream: rows are flattened and written as record batches
+    of ``RB_ARROW_BATCH_SIZE`` rows, every batch is sent as soon as it is
+    written so memory is bounded by the batch size. Data can be an iterable
+    of records or columns (name -> values), e.g. ``FlattenPlan.columnar``.
+
+    The schema is inferred from the first batch, or given with ``schema``:
+    missing fields of the next batches are null, extra fields are dropped
+    """
+
+    extension = "arrow"
+
+    def __init__(self, mimetype: str, response_class=None, **kwargs):
+        if pyarrow is None:
+            raise ImportError("you must install 'pyarrow'")  # pragma: no cover
+        super().__init__(mimetype, response_class, **kwargs)
+
+    def _build(self, data, **kwargs):
+        headers = ()
+        filename = kwargs.pop("filename", None)
+        if filename:
+            disposition = f"attachment; filename={filename}.{self.extension}"
+            headers = (("Content-Disposition", disposition),)
+
+        batches = self.iter_batches(
+            data,
+            batch_size=kwargs.pop("batch_size", None)
+            or self.conf.get("RB_ARROW_BATCH_SIZE", 2**16),
+            schema=kwargs.pop("schema", None),
+            to_dict=kwargs.pop("to_dict", None),
+            parent_key=self.conf.get("RB_FLATTEN_PREFIX", ""),
+            sep=self.conf.get("RB_FLATTEN_SEPARATOR", "_"),
+        )
+        chunks = self.iter_write(batches, **kwargs)
+        if flask.has_request_context():
+            chunks = flask.stream_with_context(chunks)
+        return BuildResult(chunks, self.mimetype, headers)
+
+    @staticmethod
+    def iter_batches(
+        data,
+        batch_size: int = 2**16,
+        schema: t.Optional["pyarrow.Schema"] = None,
+        **kwargs,
+    ) -> t.Iterator["pyarrow.RecordBatch"]:
+        if isinstance(data, Mapping) and all(
+            isinstance(v, Iterable) and not isinstance(v, (str, bytes))
+            for v in data.values()
+        ):
+            table = pyarrow.table(dict(data), schema=schema)
+            yield from table.to_batches(max_chunksize=batch_size)
+            return
+
+        rows = iter_flatten(data or [], **kwargs)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            record_batch = pyarrow.RecordBatch.from_pylist(batch, schema=schema)
+            schema = record_batch.schema
+            yield record_batch
+
+    @classmethod
+    def writer(cls, sink: t.BinaryIO, schema: "pyarrow.Schema", **kwargs):
+        return pyarrow_ipc.new_stream(sink, schema, **kwargs)
+
+    @classmethod
+    def iter_write(
+        cls, batches: t.Iterable["pyarrow.RecordBatch"], **kwargs
+    ) -> t.Iterator[bytes]:
+        """the writer output is drained after every batch"""
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            first = pyarrow.RecordBatch.from_pylist([])
+
+        sink = io.BytesIO()
+        with cls.writer(sink, first.schema, **kwargs) as writer:
+            for batch in itertools.chain((first,), batches):
+                writer.write_batch(batch)
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+
+        if sink.tell():
+            yield sink.getvalue()
+
+    @staticmethod
+    def to_me(data, **kwargs):
+        batches = ArrowBuilder.iter_batches(data, **kwargs)
+        return b"".join(ArrowBuilder.iter_write(batches))
+
+    @staticmethod
+    def to_dict(data, **kwargs):
+        return pyarrow_ipc.open_stream(data, **kwargs).read_all().to_pylist()
+
+
+class ParquetBuilder(ArrowBuilder):
+    """
+    Parquet file, every batch is written as a row group and sent,
+    the footer (metadata) is sent at the end
+    """
+
+    extension = "parquet"
+
+    def _build(self, data, **kwargs):
+        kwargs.setdefault(
+            "compression", self.conf.get("RB_PARQUET_COMPRESSION", "snappy")
+        )
+        return super()._build(data, **kwargs)
+
+    @classmethod
+    def writer(cls, sink: t.BinaryIO, schema: "pyarrow.Schema", **kwargs):
+        return pyarrow_parquet.ParquetWriter(sink, schema, **kwargs)
+
+    @staticmethod
+    def to_me(data, **kwargs):
+        batches = ArrowBuilder.iter_batches(data, **kwargs)
+        return b"".join(ParquetBuilder.iter_write(batches))
+
+    @staticmethod
+    def to_dict(data, **kwargs):
+        source = pyarrow.BufferReader(data)
+        return pyarrow_parquet.read_table(source, **kwargs).to_pylist()
@@ -0,0 +1,47 @@
+import typing as t
+from collections.abc import Iterator
+
+from flaskel.utils.binary import BinaryFormat, CborFormat, FORMATS, MsgpackFormat
+
+from .builder import Builder
+
+
+class BinaryBuilder(Builder):
+    """
+    Binary alternative to json, see ``flaskel.utils.binary``:
+    iterators are materialized because arrays are length prefixed
+    """
+
+    format_mimetype: str = ""
+
+    def __init__(self, mimetype: str, response_class=None, **kwargs):
+        self.binary_format()  # fails early if the library is missing
+        super().__init__(mimetype, response_class, **kwargs)
+
+    @classmethod
+    def binary_format(cls) -> BinaryFormat:
+        try:
+            return FORMATS[cls.format_mimetype]
+        except KeyError:
+            raise ImportError(f"missing codec for '{cls.format_mimetype}'") from None
+
+    def _build(self, data, **kwargs):
+        if isinstance(data, Iterator):
+            data = list(data)
+        return self.to_me(data, **kwargs)
+
+    @classmethod
+    def to_me(cls, data, **kwargs) -> bytes:
+        return cls.binary_format().dumps(data, **kwargs)
+
+    @classmethod
+    def to_dict(cls, data, **kwargs) -> t.Any:
+        return cls.binary_format().loads(data, **kwargs)
+
+
+class MsgpackBuilder(BinaryBuilder):
+    format_mimetype = MsgpackFormat.mimetype
+
+
+class CborBuilder(BinaryBuilder):
+    format_mimetype = CborFormat.mimetype
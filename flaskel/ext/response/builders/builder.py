@@ -1,3 +1,5 @@
+import threading
+import typing as t
 from abc import ABC, abstractmethod
 
 from flask import Response
@@ -5,7 +7,22 @@ from vbcore.http import httpcode
 from vbcore.http.headers import HeaderEnum
 
 
+class BuildResult(t.NamedTuple):
+    """output of a single build, builders do not keep it"""
+
+    data: t.Any
+    mimetype: str
+    headers: t.Tuple[t.Tuple[str, t.Any], ...] = ()
+
+
 class Builder(ABC):
+    """
+    Builders are shared by all threads and greenlets of a worker,
+    so they must not keep per request state: everything a build
+    produces is returned in a ``BuildResult``, the last one is kept
+    per thread only for the legacy ``build(data); response(status)`` form
+    """
+
     def __init__(self, mimetype: str, response_class=None, **kwargs):
         if not isinstance(mimetype, str):
             raise TypeError(f"Invalid mimetype: {mimetype}")
@@ -19,9 +36,7 @@ class Builder(ABC):
         self.conf = kwargs
         self._mimetype = mimetype
         self._response_class = response_class or Response
-
-        self._data = None
-        self._headers = {HeaderEnum.CONTENT_TYPE: self.mimetype}
+        self._local = threading.local()
 
     @property
     def mimetype(self):
@@ -29,7 +44,9 @@ class Builder(ABC):
 
     @property
     def data(self):
-        return self._data
+        """data of the last build of the current thread"""
+        result = getattr(self._local, "result", None)
+        return result.data if result is not None else None
 
     @staticmethod
     @abstractmethod
@@ -43,23 +60,70 @@ class Builder(ABC):
 
     @abstractmethod
     def _build(self, data, **kwargs):
+        """returns the serialized data or a BuildResult"""
         raise NotImplementedError
 
+    def render(self, data, **kwargs) -> BuildResult:
+        result = self._build(data, **kwargs)
+        if isinstance(result, BuildResult):
+            return result
+        return BuildResult(result, self.mimetype)
+
     def build(self, data, **kwargs):
-        self._data = self._build(data, **kwargs)
-        return self.data
+        result = self.render(data, **kwargs)
+        self._local.result = result
+        return result.data
+
+    def response(
+        self, result: t.Optional[BuildResult] = None, status=None, headers=None
+    ):
+        """
+        :param result: the output of ``render``, if omitted the last build
+            of the current thread is used, the legacy form
+            ``response(status, headers)`` is still accepted
+        """
+        if result is not None and not isinstance(result, BuildResult):
+            result, status, headers = None, result, status or headers
+        if result is None:
+            result = getattr(self._local, "result", None) or BuildResult(
+                None, self.mimetype
+            )
 
-    def response(self, status=None, headers=None):
         headers = headers or {}
-        ct = headers.get(HeaderEnum.CONTENT_TYPE)
+        mimetype = headers.get(HeaderEnum.CONTENT_TYPE) or result.mimetype
 
         return self._response_class(
-            self.data,
-            mimetype=ct or self.mimetype,
+            result.data,
+            mimetype=mimetype,
             status=status or httpcode.SUCCESS,
-            headers={**self._headers, **headers},
+            headers={
+                **dict(result.headers),
+                **headers,
+                HeaderEnum.CONTENT_TYPE: mimetype,
+            },
         )
 
+    @staticmethod
+    def iter_chunks(
+        tokens: t.Iterable[t.Union[str, bytes]],
+        chunk_size: int = 2**16,
+        encoding: str = "utf-8",
+    ) -> t.Iterator[bytes]:
+        """joins str or bytes tokens into encoded chunks of about ``chunk_size``"""
+        size = 0
+        buffer: t.List[bytes] = []
+        for token in tokens:
+            chunk = token.encode(encoding) if isinstance(token, str) else token
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= chunk_size:
+                yield b"".join(buffer)
+                buffer.clear()
+                size = 0
+
+        if buffer:
+            yield b"".join(buffer)
+
     def transform(self, data, builder, inargs=None, outargs=None):
         _dict = builder.to_dict(data, **(inargs or {}))
         return self.build(_dict, **(outargs or {}))
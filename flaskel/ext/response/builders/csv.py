@@ -1,28 +1,24 @@
 import csv
 import io
+import itertools
+import typing as t
+from collections.abc import Iterable, Mapping
 
-from ..dictutils import to_flatten
-from .builder import Builder
+import flask
 
+from ..dictutils import iter_flatten, to_flatten
+from .builder import Builder, BuildResult
 
-class CsvBuilder(Builder):
-    def _build(self, data, **kwargs):
-        data = to_flatten(
-            data or [],
-            to_dict=kwargs.pop("to_dict", None),
-            parent_key=self.conf.get("RB_FLATTEN_PREFIX", ""),
-            sep=self.conf.get("RB_FLATTEN_SEPARATOR", ""),
-        )
 
-        filename = kwargs.pop("filename", self.conf.get("RB_CSV_DEFAULT_NAME"))
-        self._headers.update(
-            {
-                "X-Total-Rows": len(data),
-                "X-Total-Columns": len(data[0].keys()),
-                "Content-Disposition": f"attachment; filename={filename}.csv",
-            }
+class CsvBuilder(Builder):
+    @staticmethod
+    def is_stream(data) -> bool:
+        """lists and tuples are materialized, any other iterable is streamed"""
+        return isinstance(data, Iterable) and not isinstance(
+            data, (list, tuple, str, bytes, Mapping)
         )
 
+    def _writer_options(self, **kwargs) -> dict:
         delimiter = self.conf.get("RB_CSV_DELIMITER")
         if delimiter:
             kwargs.update(delimiter=delimiter)
@@ -34,8 +30,98 @@ class CsvBuilder(Builder):
         dialect = self.conf.get("RB_CSV_DIALECT")
         if dialect:
             kwargs.update(dialect=dialect)
+        return kwargs
+
+    def _build(self, data, **kwargs):
+        stream = kwargs.pop("stream", None)
+        if stream is None:
+            stream = self.is_stream(data)
+        if stream:
+            return self._build_stream(data, **kwargs)
+
+        data = to_flatten(
+            data or [],
+            to_dict=kwargs.pop("to_dict", None),
+            plan=kwargs.pop("plan", None),
+            parent_key=self.conf.get("RB_FLATTEN_PREFIX", ""),
+            sep=self.conf.get("RB_FLATTEN_SEPARATOR", ""),
+        )
+
+        filename = kwargs.pop("filename", self.conf.get("RB_CSV_DEFAULT_NAME"))
+        headers = (
+            ("X-Total-Rows", len(data)),
+            ("X-Total-Columns", len(data[0].keys())),
+            ("Content-Disposition", f"attachment; filename={filename}.csv"),
+        )
+
+        kwargs = self._writer_options(**kwargs)
+        return BuildResult(self.to_csv(data or [], **kwargs), self.mimetype, headers)
+
+    def _build_stream(self, data, **kwargs):
+        """
+        Rows are flattened and written one at a time, the body is a generator
+        of encoded chunks; the columns are taken from ``fieldnames``
+        or from the first row, so it is read before streaming
+        """
+        rows = iter_flatten(
+            data,
+            to_dict=kwargs.pop("to_dict", None),
+            plan=kwargs.pop("plan", None),
+            parent_key=self.conf.get("RB_FLATTEN_PREFIX", ""),
+            sep=self.conf.get("RB_FLATTEN_SEPARATOR", ""),
+        )
+
+        fieldnames = kwargs.pop("fieldnames", None)
+        if fieldnames is None:
+            first = next(rows, None)
+            fieldnames = list(first.keys()) if first else []
+            rows = itertools.chain((first,) if first else (), rows)
+        else:
+            kwargs.setdefault("extrasaction", "ignore")
+
+        filename = kwargs.pop("filename", self.conf.get("RB_CSV_DEFAULT_NAME"))
+        headers = (
+            ("X-Total-Columns", len(fieldnames)),
+            ("Content-Disposition", f"attachment; filename={filename}.csv"),
+        )
+
+        chunks = self.iter_csv(
+            rows,
+            fieldnames,
+            chunk_size=self.conf.get("RB_CSV_CHUNK_SIZE", 2**16),
+            encoding=self.conf.get("RB_DEFAULT_ENCODE") or "utf-8",
+            **self._writer_options(**kwargs),
+        )
+        if flask.has_request_context():
+            chunks = flask.stream_with_context(chunks)
+        return BuildResult(chunks, self.mimetype, headers)
+
+    @staticmethod
+    def iter_csv(
+        rows: t.Iterable[dict],
+        fieldnames: t.Sequence[str],
+        chunk_size: int = 2**16,
+        encoding: str = "utf-8",
+        **kwargs,
+    ) -> t.Iterator[bytes]:
+        """writes rows into a reused buffer, flushed every ``chunk_size`` chars"""
+        kwargs.setdefault("dialect", "excel-tab")
+        kwargs.setdefault("delimiter", ";")
+        kwargs.setdefault("quotechar", '"')
+        kwargs.setdefault("quoting", csv.QUOTE_ALL)
+
+        output = io.StringIO()
+        w = csv.DictWriter(output, fieldnames, **kwargs)
+        w.writeheader()
+        for row in rows:
+            w.writerow(row)
+            if output.tell() >= chunk_size:
+                yield output.getvalue().encode(encoding)
+                output.seek(0)
+                output.truncate()
 
-        return self.to_csv(data or [], **kwargs)
+        if output.tell():
+            yield output.getvalue().encode(encoding)
 
     @staticmethod
     def to_me(data: list, **kwargs):
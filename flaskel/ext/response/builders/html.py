@@ -19,7 +19,11 @@ class HtmlBuilder(Builder):
             kwargs.update(sep=sep)
 
         if as_table is True:
-            data = to_flatten(data or [], to_dict=kwargs.pop("to_dict", None))
+            data = to_flatten(
+                data or [],
+                to_dict=kwargs.pop("to_dict", None),
+                plan=kwargs.pop("plan", None),
+            )
 
         kwargs.update(data=data)
 
@@ -1,21 +1,36 @@
+import itertools
+import typing as t
+from collections.abc import Iterator, Mapping
+
 import flask
 from vbcore import json
 
-from .builder import Builder
+from flaskel.utils.jsonengine import get_engine, JsonEngine
+
+from .builder import Builder, BuildResult
 
 
 class JsonBuilder(Builder):
+    jsonp_mimetype = "application/javascript"
+
     def __init__(self, mimetype: str, response_class=None, encoder=None, **kwargs):
         super().__init__(mimetype, response_class, **kwargs)
         self._encoder = encoder or json.JsonEncoder
-        # it is necessary because jsonp uses another mimetype
-        # and the object is instantiated once
-        self._mimetype_backup = self._mimetype
 
-    def _build(self, data, **kwargs):
-        # restore original mimetype at every response build
-        self._mimetype = self._mimetype_backup
+    @property
+    def engine(self) -> JsonEngine:
+        return get_engine(self.conf.get("JSON_ENGINE"))
+
+    @property
+    def encoding(self) -> str:
+        return self.conf.get("RB_DEFAULT_ENCODE") or "utf-8"
+
+    @staticmethod
+    def is_stream(data) -> bool:
+        """iterators (generators, db cursors) are streamed, the rest is dumped"""
+        return isinstance(data, Iterator)
 
+    def dump_options(self, **kwargs) -> dict:
         if self.conf.get("DEBUG"):
             kwargs.setdefault("indent", self.conf.get("RB_DEFAULT_DUMP_INDENT"))
             kwargs.setdefault("separators", (", ", ": "))
@@ -24,19 +39,81 @@ class JsonBuilder(Builder):
             kwargs.setdefault("separators", (",", ":"))
 
         kwargs.setdefault("cls", self._encoder)
-        resp = self.to_json(data, **kwargs)
+        return kwargs
 
+    def jsonp_callback(self) -> t.Optional[str]:
         param = self.conf.get("RB_JSONP_PARAM")
-        if param:
-            jsonp_callback = flask.request.args.get(param)
-            if jsonp_callback and len(jsonp_callback) > 0:
-                # backup and override original mimetype
-                self._mimetype_backup = self._mimetype
-                self._mimetype = "application/javascript"
-                return f"{jsonp_callback}({resp});"
+        if param and flask.has_request_context():
+            return flask.request.args.get(param) or None
+        return None
 
+    def _build(self, data, **kwargs):
+        stream = kwargs.pop("stream", None)
+        if stream is None:
+            stream = self.is_stream(data)
+        if stream:
+            return self._build_stream(data, **kwargs)
+
+        resp = self.engine.dumpb(data, self.encoding, **self.dump_options(**kwargs))
+        jsonp_callback = self.jsonp_callback()
+        if jsonp_callback:
+            callback = jsonp_callback.encode(self.encoding)
+            return BuildResult(b"%s(%s);" % (callback, resp), self.jsonp_mimetype)
         return resp
 
+    def _build_stream(self, data, **kwargs):
+        """the array is emitted item by item, buffered in chunks"""
+        mimetype = self.mimetype
+        prefix, suffix = "[", "]"
+        jsonp_callback = self.jsonp_callback()
+        if jsonp_callback:
+            mimetype = self.jsonp_mimetype
+            prefix, suffix = f"{jsonp_callback}([", "]);"
+
+        items = self.iter_items(data, self.dumps, **self.dump_options(**kwargs))
+        tokens = self.join_tokens(items, prefix, ",", suffix)
+        return self.stream_result(tokens, mimetype)
+
+    def dumps(self, data, **kwargs) -> bytes:
+        return self.engine.dumpb(data, self.encoding, **kwargs)
+
+    def stream_result(
+        self, tokens: t.Iterable[t.Union[str, bytes]], mimetype: str
+    ) -> BuildResult:
+        chunks = self.iter_chunks(
+            tokens,
+            chunk_size=self.conf.get("RB_JSON_CHUNK_SIZE", 2**16),
+            encoding=self.encoding,
+        )
+        if flask.has_request_context():
+            chunks = flask.stream_with_context(chunks)
+        return BuildResult(chunks, mimetype)
+
+    @staticmethod
+    def iter_items(
+        data, dumps: t.Optional[t.Callable[..., t.AnyStr]] = None, **kwargs
+    ) -> t.Iterator[t.AnyStr]:
+        dumps = dumps or JsonBuilder.to_json
+        if isinstance(data, Mapping):
+            data = (data,)
+        for item in data:
+            yield dumps(item, **kwargs)
+
+    @staticmethod
+    def join_tokens(
+        items: t.Iterable[t.Union[str, bytes]],
+        prefix: str = "",
+        sep: str = "",
+        suffix: str = "",
+    ) -> t.Iterator[t.Union[str, bytes]]:
+        """separators are str, items can be encoded: see ``iter_chunks``"""
+        yield prefix
+        for index, item in enumerate(items):
+            if index:
+                yield sep
+            yield item
+        yield suffix
+
     @staticmethod
     def to_me(data: dict, **kwargs):
         kwargs.setdefault("cls", json.JsonEncoder)
@@ -49,3 +126,20 @@ class JsonBuilder(Builder):
     @staticmethod
     def to_dict(data, **kwargs):
         return json.loads(data, **kwargs)
+
+
+class NdJsonBuilder(JsonBuilder):
+    """newline delimited json: one record per line, always streamed"""
+
+    def _build(self, data, **kwargs):
+        kwargs.pop("stream", None)
+        kwargs["indent"] = None
+        kwargs.setdefault("separators", (",", ":"))
+
+        items = self.iter_items(data, self.dumps, **self.dump_options(**kwargs))
+        tokens = itertools.chain.from_iterable((item, "\n") for item in items)
+        return self.stream_result(tokens, self.mimetype)
+
+    @staticmethod
+    def to_dict(data, **kwargs):
+        return [json.loads(line, **kwargs) for line in data.splitlines() if line]
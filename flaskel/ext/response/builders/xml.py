@@ -1,11 +1,28 @@
+import typing as t
+from collections.abc import Iterator
+
+import flask
 import xmltodict
-from vbcore.data.transformations.builders.dicttoxml import dicttoxml
+from vbcore.data.transformations.builders.dicttoxml import convert_list, dicttoxml
 
-from .builder import Builder
+from .builder import Builder, BuildResult
 
 
 class XmlBuilder(Builder):
+    default_item_name = "ROW"
+
+    @staticmethod
+    def is_stream(data) -> bool:
+        """iterators (generators, db cursors) are streamed, the rest is dumped"""
+        return isinstance(data, Iterator)
+
     def _build(self, data, **kwargs):
+        stream = kwargs.pop("stream", None)
+        if stream is None:
+            stream = self.is_stream(data)
+        if stream:
+            return self._build_stream(data, **kwargs)
+
         return self.to_xml(
             data or {},
             custom_root=kwargs.pop("custom_root", self.conf.get("RB_XML_ROOT")),
@@ -13,9 +30,56 @@ class XmlBuilder(Builder):
             **kwargs,
         )
 
+    def _build_stream(self, data, **kwargs):
+        """
+        The document is written row by row with the same converter
+        of the whole document path, so the output is the same
+        """
+        encoding = self.conf.get("RB_DEFAULT_ENCODE") or "utf-8"
+        tokens = self.iter_xml(
+            data,
+            custom_root=kwargs.pop("custom_root", self.conf.get("RB_XML_ROOT")),
+            cdata=self.conf.get("RB_XML_CDATA"),
+            encoding=encoding,
+            **kwargs,
+        )
+        chunks = self.iter_chunks(
+            tokens,
+            chunk_size=self.conf.get("RB_XML_CHUNK_SIZE", 2**16),
+            encoding=encoding,
+        )
+        if flask.has_request_context():
+            chunks = flask.stream_with_context(chunks)
+        return BuildResult(chunks, self.mimetype)
+
+    @classmethod
+    def iter_xml(
+        cls,
+        rows: t.Iterable[t.Any],
+        root: bool = True,
+        custom_root: str = "root",
+        xml_declaration: bool = True,
+        attr_type: bool = True,
+        default_item_name: t.Optional[str] = None,
+        cdata: bool = False,
+        encoding: str = "utf-8",
+    ) -> t.Iterator[str]:
+        """same arguments of ``dicttoxml``, yields one token per row"""
+        item_name = default_item_name or cls.default_item_name
+        if root:
+            if xml_declaration:
+                yield f'<?xml version="1.0" encoding="{encoding}" ?>'
+            yield f"<{custom_root}>"
+
+        for row in rows:
+            yield convert_list((row,), attr_type, item_name, cdata)
+
+        if root:
+            yield f"</{custom_root}>"
+
     @staticmethod
     def to_me(data, **kwargs):
-        kwargs.setdefault("default_item_name", "ROW")
+        kwargs.setdefault("default_item_name", XmlBuilder.default_item_name)
         return dicttoxml(data, **kwargs)
 
     @staticmethod
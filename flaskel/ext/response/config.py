@@ -1,23 +1,40 @@
 from vbcore.http.headers import ContentTypeEnum
 
+from flaskel.utils.binary import CborFormat, FORMATS, MsgpackFormat
+
 from .builders import (
+    ArrowBuilder,
     Base64Builder,
+    CborBuilder,
     CsvBuilder,
     HtmlBuilder,
     JsonBuilder,
+    MsgpackBuilder,
+    NdJsonBuilder,
+    ParquetBuilder,
     XmlBuilder,
     YamlBuilder,
 )
+from .builders.arrow import pyarrow
 
 DEFAULT_BUILDERS = {
     "csv": CsvBuilder(ContentTypeEnum.CSV.value),
     "html": HtmlBuilder(ContentTypeEnum.HTML.value),
     "xml": XmlBuilder(ContentTypeEnum.XML.value),
     "json": JsonBuilder(ContentTypeEnum.JSON.value),
+    "ndjson": NdJsonBuilder("application/x-ndjson"),
     "yaml": YamlBuilder("application/yaml"),
     "base64": Base64Builder("application/base64"),
 }
 
+if MsgpackFormat.mimetype in FORMATS:
+    DEFAULT_BUILDERS["msgpack"] = MsgpackBuilder(MsgpackFormat.mimetype)
+if CborFormat.mimetype in FORMATS:
+    DEFAULT_BUILDERS["cbor"] = CborBuilder(CborFormat.mimetype)
+if pyarrow is not None:
+    DEFAULT_BUILDERS["arrow"] = ArrowBuilder("application/vnd.apache.arrow.stream")
+    DEFAULT_BUILDERS["parquet"] = ParquetBuilder("application/vnd.apache.parquet")
+
 
 def set_default_config(app):
     app.config.setdefault(
@@ -28,6 +45,7 @@ def set_default_config(app):
         "RB_DEFAULT_RESPONSE_FORMAT", DEFAULT_BUILDERS["json"].mimetype
     )
     app.config.setdefault("RB_FORMAT_KEY", "format")
+    app.config.setdefault("RB_NEGOTIATION_CACHE_SIZE", 512)
     app.config.setdefault("RB_DEFAULT_ENCODE", "utf-8")
     app.config.setdefault("RB_DEFAULT_DUMP_INDENT", None)
     app.config.setdefault("RB_BASE64_ALTCHARS", None)
@@ -38,8 +56,14 @@ def set_default_config(app):
     app.config.setdefault("RB_CSV_DELIMITER", ";")
     app.config.setdefault("RB_CSV_QUOTING_CHAR", '"')
     app.config.setdefault("RB_CSV_DIALECT", "excel-tab")
+    app.config.setdefault("RB_CSV_CHUNK_SIZE", 2**16)
+    app.config.setdefault("RB_JSON_CHUNK_SIZE", 2**16)
+    app.config.setdefault("RB_ARROW_BATCH_SIZE", 2**16)
+    app.config.setdefault("RB_PARQUET_COMPRESSION", "snappy")
     app.config.setdefault("RB_XML_CDATA", False)
     app.config.setdefault("RB_XML_ROOT", "ROOT")
+    app.config.setdefault("RB_XML_CHUNK_SIZE", 2**16)
     app.config.setdefault("RB_FLATTEN_PREFIX", "")
     app.config.setdefault("RB_FLATTEN_SEPARATOR", "_")
     app.config.setdefault("RB_JSONP_PARAM", "callback")
+    app.config.setdefault("RB_CONDITIONAL_ENABLED", False)
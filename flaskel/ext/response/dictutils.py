@@ -1,50 +1,209 @@
-from collections.abc import MutableMapping
+import functools
+import operator
+import typing as t
+from collections.abc import Iterable, Mapping, MutableMapping
 
+KeyPath = t.Tuple[str, ...]
 
-def to_flatten(data, to_dict=None, **kwargs):
-    kwargs.setdefault("sep", "_")
-    kwargs.setdefault("parent_key", "")
+_SCALARS = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+def _flatten_dict(d, parent_key, sep):
+    items = []
+
+    for k, v in d.items():
+        nk = (parent_key + sep + k) if parent_key else k
+
+        if isinstance(v, MutableMapping):
+            fdict = _flatten_dict(v, nk, sep=sep)
+            items.extend(fdict.items())
+        else:
+            items.append((nk, v))
+    return dict(items)
+
+
+def _expand_lists(item, sep, candidates=None):
+    zipkeys = {}
+    for key in list(candidates if candidates is not None else item.keys()):
+        value = item.get(key)
+        if isinstance(value, list) and len(value) > 0:
+            zipkeys.update({key: value})
+            del item[key]
+
+    for zk, value in zipkeys.items():
+        for i in value:
+            yield {**item, **{f"{zk}{sep}{k}": v for k, v in i.items()}}
+
+    if len(zipkeys.keys()) == 0:
+        yield item
+
+
+class FlattenPlan:
+    """
+    Flattening compiled once from the key paths of the records, usually taken
+    from the first one, and applied to every record without walking it:
+    the values are read by precomputed getters.
+
+    A record that does not have the structure of the plan (missing or other
+    keys at any level, a nested dict or a list where the plan has a plain
+    value) is flattened by the generic walk, so the output is always the one
+    of ``to_flatten``; only the paths that hold a list in the plan are
+    expanded into rows (see ``iter_flatten``)
+    """
+
+    def __init__(
+        self,
+        paths: t.Sequence[KeyPath],
+        expand: t.Iterable[KeyPath] = (),
+        parent_key: str = "",
+        sep: str = "_",
+    ):
+        self.paths = tuple(tuple(p) for p in paths)
+        self.parent_key = parent_key
+        self.sep = sep
+        self.columns = tuple(self.column_name(p) for p in self.paths)
+        self.top_keys = frozenset(p[0] for p in self.paths)
+        expand = set(tuple(p) for p in expand)
+        self.expand = tuple(c for c, p in zip(self.columns, self.paths) if p in expand)
+        self._leaves = tuple(p not in expand for p in self.paths)
+        self._getter = self._compile(self.paths)
+        self._nested = self._compile_nested(self.paths)
+
+    def column_name(self, path: KeyPath) -> str:
+        if len(path) == 1 and not self.parent_key:
+            return path[0]
+        path = (self.parent_key, *path) if self.parent_key else path
+        return self.sep.join(k if isinstance(k, str) else str(k) for k in path)
+
+    @staticmethod
+    def _path_getter(path: KeyPath) -> t.Callable[[Mapping], t.Any]:
+        if len(path) == 1:
+            return operator.itemgetter(path[0])
+        return lambda r: functools.reduce(operator.getitem, path, r)
 
-    def _flatten_dict(d, parent_key, sep):
-        items = []
+    @classmethod
+    def _compile(cls, paths: t.Sequence[KeyPath]) -> t.Callable[[Mapping], tuple]:
+        if paths and all(len(p) == 1 for p in paths):
+            if len(paths) == 1:
+                getter = operator.itemgetter(paths[0][0])
+                return lambda r: (getter(r),)
+            return operator.itemgetter(*(p[0] for p in paths))
 
-        for k, v in d.items():
-            nk = (parent_key + sep + k) if parent_key else k
+        getters = tuple(cls._path_getter(p) for p in paths)
+        return lambda r: tuple(g(r) for g in getters)
 
-            if isinstance(v, MutableMapping):
-                fdict = _flatten_dict(v, nk, sep=sep)
-                items.extend(fdict.items())
-            else:
-                items.append((nk, v))
-        return dict(items)
+    @classmethod
+    def _compile_nested(
+        cls, paths: t.Sequence[KeyPath]
+    ) -> t.Tuple[t.Tuple[t.Callable[[Mapping], t.Any], int], ...]:
+        """getter and number of keys of every nested dict of the plan"""
+        children: t.Dict[KeyPath, set] = {}
+        for path in paths:
+            for i in range(1, len(path)):
+                children.setdefault(path[:i], set()).add(path[i])
+        return tuple((cls._path_getter(p), len(c)) for p, c in children.items())
 
-    response = []
+    @classmethod
+    def from_record(cls, record: Mapping, **kwargs) -> "FlattenPlan":
+        paths: t.List[KeyPath] = []
+        expand: t.List[KeyPath] = []
+
+        def walk(d: Mapping, parent: KeyPath):
+            for k, v in d.items():
+                if isinstance(v, MutableMapping):
+                    walk(v, (*parent, k))
+                    continue
+                paths.append((*parent, k))
+                if isinstance(v, list):
+                    expand.append((*parent, k))
+
+        walk(record, ())
+        return cls(paths, expand, **kwargs)
+
+    def values(self, record: Mapping) -> tuple:
+        """raises KeyError or TypeError if the record does not fit the plan"""
+        if len(record) != len(self.top_keys):
+            raise KeyError("top level keys do not match the plan")
+        for getter, size in self._nested:
+            if len(getter(record)) != size:
+                raise KeyError("nested keys do not match the plan")
+
+        values = self._getter(record)
+        for value, leaf in zip(values, self._leaves):
+            if type(value) in _SCALARS:
+                continue
+            if isinstance(value, MutableMapping) or (leaf and isinstance(value, list)):
+                raise TypeError("value does not match the plan")
+        return values
+
+    def apply(self, record: Mapping) -> t.Iterator[dict]:
+        try:
+            values = self.values(record)
+        except (KeyError, TypeError, IndexError):
+            item = _flatten_dict(record, self.parent_key, self.sep)
+            yield from _expand_lists(item, self.sep)
+            return
+
+        item = dict(zip(self.columns, values))
+        if self.expand:
+            yield from _expand_lists(item, self.sep, self.expand)
+        else:
+            yield item
+
+    def iter_rows(self, records: t.Iterable[Mapping]) -> t.Iterator[dict]:
+        for record in records:
+            yield from self.apply(record)
+
+    def columnar(self, records: t.Iterable[Mapping]) -> t.Dict[str, list]:
+        """
+        rows as column arrays, e.g. for Arrow: columns of expanded lists
+        or of records that do not fit the plan are filled with None
+        """
+        columns: t.Dict[str, list] = {c: [] for c in self.columns}
+        count = 0
+        for row in self.iter_rows(records):
+            for name, value in row.items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = [None] * count
+                column.append(value)
+            count += 1
+            for column in columns.values():
+                if len(column) < count:
+                    column.append(None)
+        return columns
+
+
+def iter_flatten(data, to_dict=None, plan: t.Optional[FlattenPlan] = None, **kwargs):
+    """
+    Like ``to_flatten`` but lazy: data can be any iterable (e.g. a generator,
+    a db cursor) and rows are flattened one at a time; with a plan,
+    the records that fit it are not walked
+    """
+    kwargs.setdefault("sep", "_")
+    kwargs.setdefault("parent_key", "")
     to_dict = to_dict or dict
 
-    if not isinstance(data, (list, tuple)):
+    if isinstance(data, (str, bytes, Mapping)) or not isinstance(data, Iterable):
         data = (data,)
 
     for item in data:
-        zipkeys = {}
         try:
-            item = _flatten_dict(to_dict(item), **kwargs)
+            item = to_dict(item)
         except TypeError as exc:
             raise TypeError(
                 f"Could not convert '{item}' into dict object, "
                 f"please provide a to_dict function"
             ) from exc
 
-        for key in list(item.keys()):
-            if isinstance(item.get(key), list):
-                if len(item.get(key)) > 0:
-                    zipkeys.update({key: item.get(key)})
-                    del item[key]
+        if plan is not None:
+            yield from plan.apply(item)
+        else:
+            item = _flatten_dict(item, kwargs["parent_key"], kwargs["sep"])
+            yield from _expand_lists(item, kwargs["sep"])
 
-        _sep = kwargs.get("sep")
-        for zk, value in zipkeys.items():
-            for i in value:
-                response.append({**item, **{f"{zk}{_sep}{k}": v for k, v in i.items()}})
 
-        if len(zipkeys.keys()) == 0:
-            response.append(item)
-    return response
+def to_flatten(data, to_dict=None, plan: t.Optional[FlattenPlan] = None, **kwargs):
+    if not isinstance(data, (list, tuple)):
+        data = (data,)
+    return list(iter_flatten(data, to_dict=to_dict, plan=plan, **kwargs))
@@ -50,8 +50,13 @@ class SQLAModel(Model):
         page: t.Optional[int] = None,
         page_size: t.Optional[int] = None,
         max_per_page: t.Optional[int] = None,
+        yield_per: t.Optional[int] = None,
         **kwargs,
     ):
+        """
+        :param yield_per: if not paginated, rows are fetched lazily
+            in batches of yield_per instead of all at once
+        """
         q = cls.query_collection(*args, **kwargs)
 
         if order_by is not None:
@@ -67,6 +72,8 @@ class SQLAModel(Model):
             res = q.items
             if to_dict is False:
                 return q
+        elif yield_per:
+            res = q.yield_per(yield_per)
         else:
             res = q.all()
 
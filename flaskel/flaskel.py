@@ -1,9 +1,10 @@
+import functools
 import os.path
 import typing as t
 
 import flask
 from flask.json.provider import JSONProvider
-from vbcore import json as vbcore_json
+from vbcore.batch import AsyncBatchExecutor
 from vbcore.datastruct import ObjectDict
 from vbcore.datastruct.lazy import Dumper
 from vbcore.http import httpcode
@@ -12,7 +13,11 @@ from vbcore.types import OptStr
 from werkzeug.routing import Rule
 from werkzeug.utils import safe_join
 
+from flaskel.utils.binary import get_format
+from flaskel.utils.compression import EXTENSIONS, negotiate_encoding
 from flaskel.utils.datastruct import Pagination
+from flaskel.utils.eventloop import EventLoopThread
+from flaskel.utils.jsonengine import get_engine, JsonEngine
 
 cap: "Flaskel" = t.cast("Flaskel", flask.current_app)
 request: "Request" = t.cast("Request", flask.request)
@@ -55,8 +60,37 @@ class Request(flask.Request):
         flask_header_name = f"HTTP_{hdr.upper().replace('-', '_')}"
         return flask.request.environ.get(flask_header_name)
 
-    def get_json(self, *args, allow_empty=False, **kwargs) -> ObjectDict:
-        payload = super().get_json(*args, **kwargs)
+    def get_binary(self, silent: bool = False, cache: bool = True) -> t.Any:
+        """
+        counterpart of ``get_json`` for binary bodies (msgpack, cbor),
+        the format is chosen by Content-Type, see ``flaskel.utils.binary``
+        """
+        if cache and self._cached_json[silent] is not Ellipsis:
+            return self._cached_json[silent]
+
+        binary_format = get_format(self.mimetype)
+        if binary_format is None:
+            return None if silent else self.on_json_loading_failed(None)
+
+        try:
+            payload = binary_format.loads(self.get_data(cache=cache))
+        except ValueError as exc:
+            if silent:
+                return None
+            payload = self.on_json_loading_failed(exc)
+
+        if cache:
+            self._cached_json = (payload, payload)
+        return payload
+
+    def get_json(
+        self, force=False, silent=False, cache=True, allow_empty=False
+    ) -> ObjectDict:
+        """binary bodies are decoded too, so callers need not care about format"""
+        if get_format(self.mimetype) is not None:
+            payload = self.get_binary(silent=silent, cache=cache)
+        else:
+            payload = super().get_json(force=force, silent=silent, cache=cache)
         if payload is None:
             if not allow_empty:
                 flask.abort(httpcode.BAD_REQUEST, "No JSON in request")
@@ -90,17 +124,50 @@ class Response(flask.Response):
             response.headers[hdr.X_ACCEL_EXPIRES] = conf.SEND_FILE_MAX_AGE_DEFAULT
         return response
 
+    @classmethod
+    def find_precompressed(
+        cls, file_path: str
+    ) -> t.Tuple[t.Optional[str], t.Optional[str], bool]:
+        """
+        looks for a sibling file compressed at build time (style.css.br)
+        :return: accepted encoding, its file and if any sibling exists
+        """
+        siblings = {
+            encoding: f"{file_path}{extension}"
+            for encoding, extension in EXTENSIONS.items()
+            if os.path.isfile(f"{file_path}{extension}")
+        }
+        encoding = negotiate_encoding(
+            request.headers.get(HeaderEnum.ACCEPT_ENCODING), siblings.keys()
+        )
+        return encoding, siblings.get(encoding), bool(siblings)
+
     @classmethod
     def send_file(cls, directory: str, filename: str, **kwargs) -> "Response":
         kwargs.setdefault("as_attachment", True)
         file_path = safe_join(directory, filename)
 
+        encoding, encoded_path, precompressed = None, None, False
+        if file_path and cap.config.get("SEND_FILE_PRECOMPRESSED"):
+            encoding, encoded_path, precompressed = cls.find_precompressed(file_path)
+        if encoded_path:
+            # mimetype and attachment name are the ones of the original file
+            kwargs.setdefault("download_name", os.path.basename(file_path))
+
         try:
-            response = flask.send_file(file_path, etag=True, conditional=True, **kwargs)
+            response = flask.send_file(
+                encoded_path or file_path, etag=True, conditional=True, **kwargs
+            )
         except IOError as exc:
             cap.logger.warning(str(exc))
             return flask.abort(httpcode.NOT_FOUND)
 
+        if precompressed:
+            response.vary.add(HeaderEnum.ACCEPT_ENCODING)
+        if encoding:
+            response.headers[HeaderEnum.CONTENT_ENCODING] = encoding
+            file_path = t.cast(str, encoded_path)
+
         if cap.config.USE_X_SENDFILE is True and cap.config.ENABLE_ACCEL is True:
             # following headers works with nginx compatible proxy
             return cls.set_sendfile_headers(response, file_path)  # type: ignore
@@ -120,11 +187,22 @@ class Response(flask.Response):
 
 
 class VBJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    @property
+    def engine(self) -> JsonEngine:
+        """selected by JSON_ENGINE, see ``flaskel.utils.jsonengine``"""
+        return get_engine(self._app.config.get("JSON_ENGINE"))
+
     def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
-        return vbcore_json.dumps(obj, **kwargs)
+        return self.engine.dumps(obj, **kwargs)
 
     def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
-        return vbcore_json.loads(s, **kwargs)
+        return self.engine.loads(s, **kwargs)
+
+    def response(self, *args: t.Any, **kwargs: t.Any) -> "Response":
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.engine.dumpb(obj), mimetype=self.mimetype)
 
 
 class Flaskel(flask.Flask):
@@ -137,3 +215,30 @@ class Flaskel(flask.Flask):
         self.version: OptStr = None
         self.config: Config
         self.json = VBJSONProvider(self)
+        self.event_loop = EventLoopThread()
+
+    def async_to_sync(
+        self, func: t.Callable[..., t.Coroutine]
+    ) -> t.Callable[..., t.Any]:
+        """
+        with ``ASYNC_SHARED_LOOP`` coroutine views and hooks run on the event
+        loop shared by the request threads, otherwise on a loop per call
+        """
+        if not self.config.get("ASYNC_SHARED_LOOP"):
+            return super().async_to_sync(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.event_loop.run(func(*args, **kwargs))
+
+        return wrapper
+
+    def ensure_batch_task(self, func: t.Callable, executor: type) -> t.Callable:
+        """
+        Prepares func to be run by a batch executor: coroutine functions are
+        left to an async executor, that gathers them, other executors get a
+        plain callable, see ``ensure_sync``
+        """
+        if issubclass(executor, AsyncBatchExecutor):
+            return func
+        return self.ensure_sync(func)
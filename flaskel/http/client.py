@@ -1,8 +1,9 @@
 import typing as t
 
 from requests import exceptions as http_exc
+from vbcore.http import HttpMethod
 from vbcore.http.batch import HTTPBatch
-from vbcore.http.client import HTTPClient, JsonRPCClient
+from vbcore.http.client import HTTPClient, JsonRPCClient, ResponseData
 from vbcore.http.httpdumper import LazyHTTPDumper
 from vbcore.uuid import get_uuid
 
@@ -42,6 +43,16 @@ class FlaskelHttpBatch(FlaskelHTTPDumper, HTTPBatch):
         kwargs.setdefault("verify", cap.config.HTTP_SSL_VERIFY)
         return super().request(requests, **kwargs)
 
+    async def fetch(self, uri: str, **kwargs) -> ResponseData:
+        """a single request, awaited by coroutine views"""
+        kwargs.setdefault("method", HttpMethod.GET)
+        if request.id:
+            headers = kwargs.get("headers") or {}
+            kwargs["headers"] = {**headers, cap.config.REQUEST_ID_HEADER: request.id}
+        if not cap.config.HTTP_SSL_VERIFY:
+            kwargs.setdefault("ssl", False)
+        return await self.http_request(url=self.normalize_url(uri), **kwargs)
+
 
 class FlaskelHttp(FlaskelHTTPDumper, HTTPClient):
     def __init__(self, endpoint, *args, **kwargs):
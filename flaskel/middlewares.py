@@ -1,9 +1,14 @@
+import itertools
 import typing as t
 from urllib.parse import parse_qs
 
 from vbcore import uuid
 from vbcore.datastruct import ObjectDict
+from werkzeug.datastructures import Headers
 from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.wsgi import ClosingIterator
+
+from flaskel.utils.compression import COMPRESSORS, negotiate_encoding, StreamCompressor
 
 if t.TYPE_CHECKING:
     # pylint: disable=unused-import
@@ -194,3 +199,141 @@ class RequestID(BaseMiddleware):
             return True  # pragma: no cover
 
         return uuid.check_uuid(request_id, raise_exc=False)
+
+
+class Compress(BaseMiddleware):
+    """
+    Compresses responses with the best encoding accepted by the client
+    among ``COMPRESS_ENCODINGS`` (br and zstd only if installed).
+
+    Only responses of ``COMPRESS_MIMETYPES`` (prefixes, plus +json and +xml)
+    and at least ``COMPRESS_MIN_SIZE`` bytes long are compressed; responses
+    already encoded, with Cache-Control no-transform or sent by the proxy
+    (X-Accel-Redirect, X-Sendfile) are left untouched.
+
+    Bodies up to ``COMPRESS_BUFFER_SIZE`` are compressed at once with the
+    right Content-Length, larger or unknown bodies (generators) are
+    compressed chunk by chunk, every chunk is flushed so streaming still works
+    """
+
+    min_size = 500
+    buffer_size = 2**20
+    level: t.Optional[int] = None
+    encodings = ("br", "zstd", "gzip")
+    mimetypes = (
+        "text/",
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "application/x-ndjson",
+        "application/yaml",
+        "image/svg+xml",
+    )
+    skip_headers = ("content-encoding", "x-accel-redirect", "x-sendfile")
+
+    def __call__(
+        self, environ: "WSGIEnvironment", start_response: "StartResponse"
+    ) -> t.Iterable[bytes]:
+        conf = self.get_config()
+        encodings = conf.COMPRESS_ENCODINGS or self.encodings
+        encoding = negotiate_encoding(
+            environ.get("HTTP_ACCEPT_ENCODING"),
+            [e for e in encodings if e in COMPRESSORS],
+        )
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            encoding = None
+
+        state: t.Dict[str, t.Any] = {}
+
+        def _start_response(status, wsgi_headers, exc_info=None):
+            headers = Headers(wsgi_headers)
+            if not self.is_compressible(status, headers, conf):
+                return start_response(status, wsgi_headers, exc_info)
+
+            self.add_vary(headers, "Accept-Encoding")
+            if encoding is None or "returned" in state:
+                return start_response(status, headers.to_wsgi_list(), exc_info)
+
+            state.update(status=status, headers=headers, exc_info=exc_info)
+            return state.setdefault("written", []).append
+
+        app_iter = self.app(environ, _start_response)
+        if "status" not in state:
+            state["returned"] = True
+            return app_iter
+
+        return self.compress_response(
+            app_iter,
+            start_response,
+            COMPRESSORS[t.cast(str, encoding)](conf.COMPRESS_LEVEL or self.level),
+            buffer_size=conf.COMPRESS_BUFFER_SIZE or self.buffer_size,
+            **state,
+        )
+
+    @staticmethod
+    def add_vary(headers: Headers, name: str):
+        vary = [v.strip() for v in headers.get("Vary", "").split(",") if v.strip()]
+        if "*" not in vary and name.lower() not in (v.lower() for v in vary):
+            headers["Vary"] = ", ".join((*vary, name))
+
+    def is_compressible(self, status: str, headers: Headers, conf: ObjectDict):
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if any(h in headers for h in self.skip_headers):
+            return False
+        if "no-transform" in headers.get("Cache-Control", ""):
+            return False
+
+        mimetype = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        mimetypes = tuple(conf.COMPRESS_MIMETYPES or self.mimetypes)
+        if not (mimetype.startswith(mimetypes) or mimetype.endswith(("+json", "+xml"))):
+            return False
+
+        length = headers.get("Content-Length", type=int)
+        return length is None or length >= (conf.COMPRESS_MIN_SIZE or self.min_size)
+
+    @classmethod
+    def compress_response(
+        cls,
+        app_iter: t.Iterable[bytes],
+        start_response: "StartResponse",
+        compressor: StreamCompressor,
+        status: str,
+        headers: Headers,
+        exc_info=None,
+        written: t.Optional[t.List[bytes]] = None,
+        buffer_size: int = 0,
+    ) -> t.Iterable[bytes]:
+        headers["Content-Encoding"] = compressor.name
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"  # the representation is changed
+
+        length = headers.get("Content-Length", type=int)
+        body = itertools.chain(written or (), app_iter)
+        if length is not None and length <= buffer_size:
+            try:
+                data = compressor.compress_all(b"".join(body))
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            headers["Content-Length"] = str(len(data))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [data]
+
+        headers.pop("Content-Length", None)
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return ClosingIterator(
+            cls.iter_compressed(body, compressor), getattr(app_iter, "close", None)
+        )
+
+    @staticmethod
+    def iter_compressed(
+        body: t.Iterable[bytes], compressor: StreamCompressor
+    ) -> t.Iterator[bytes]:
+        for chunk in body:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
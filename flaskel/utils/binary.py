@@ -0,0 +1,98 @@
+import datetime
+import typing as t
+from abc import ABC, abstractmethod
+
+from vbcore import json as vbcore_json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+
+class BinaryFormat(ABC):
+    """
+    Binary alternative to json for request and response bodies,
+    the types not supported natively are converted like ``JsonEncoder`` does
+    """
+
+    name: str = ""
+    mimetype: str = ""
+
+    def __init__(self):
+        self._encoder = vbcore_json.JsonEncoder()
+
+    def default(self, o: t.Any) -> t.Any:
+        return self._encoder.default(o)
+
+    @abstractmethod
+    def dumps(self, data: t.Any, **kwargs) -> bytes:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def loads(self, data: bytes, **kwargs) -> t.Any:
+        """raises ValueError if data is malformed"""
+
+
+class MsgpackFormat(BinaryFormat):
+    name = "msgpack"
+    mimetype = "application/msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("you must install 'msgpack'")  # pragma: no cover
+        super().__init__()
+
+    def dumps(self, data: t.Any, **kwargs) -> bytes:
+        kwargs.setdefault("default", self.default)
+        return msgpack.packb(data, **kwargs)
+
+    def loads(self, data: bytes, **kwargs) -> t.Any:
+        kwargs.setdefault("strict_map_key", False)
+        return msgpack.unpackb(data, **kwargs)
+
+
+class CborFormat(BinaryFormat):
+    """dates, decimals, uuids and sets are CBOR tags, naive datetimes are UTC"""
+
+    name = "cbor"
+    mimetype = "application/cbor"
+
+    def __init__(self):
+        if cbor2 is None:
+            raise ImportError("you must install 'cbor2'")  # pragma: no cover
+        super().__init__()
+
+    def dumps(self, data: t.Any, **kwargs) -> bytes:
+        kwargs.setdefault("timezone", datetime.timezone.utc)
+        kwargs.setdefault("default", self.encode_default)
+        return cbor2.dumps(data, **kwargs)
+
+    def encode_default(self, encoder, o: t.Any):
+        encoder.encode(self.default(o))
+
+    def loads(self, data: bytes, **kwargs) -> t.Any:
+        try:
+            return cbor2.loads(data, **kwargs)
+        except cbor2.CBORDecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+
+FORMATS: t.Dict[str, BinaryFormat] = {}
+if msgpack is not None:
+    FORMATS[MsgpackFormat.mimetype] = MsgpackFormat()
+if cbor2 is not None:
+    FORMATS[CborFormat.mimetype] = CborFormat()
+
+
+def register_format(binary_format: BinaryFormat, mimetype: t.Optional[str] = None):
+    FORMATS[mimetype or binary_format.mimetype] = binary_format
+
+
+def get_format(mimetype: t.Optional[str]) -> t.Optional[BinaryFormat]:
+    return FORMATS.get(mimetype) if mimetype else None
@@ -0,0 +1,136 @@
+import typing as t
+import zlib
+from abc import ABC, abstractmethod
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class StreamCompressor(ABC):
+    """
+    Incremental compressor for a single response body:
+    ``compress`` returns what can be sent for the given chunk,
+    ``finish`` returns the trailer, name is the http content-coding
+    """
+
+    name: str = ""
+    extension: str = ""
+
+    @abstractmethod
+    def __init__(self, level: t.Optional[int] = None):
+        """None means the default level of the algorithm"""
+
+    @abstractmethod
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """with flush, the returned bytes decode the whole chunk (streaming)"""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        pass  # pragma: no cover
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self.compress(data, flush=False) + self.finish()
+
+
+class GzipCompressor(StreamCompressor):
+    name = "gzip"
+    extension = ".gz"
+
+    def __init__(self, level: t.Optional[int] = None):
+        level = 6 if level is None else level
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor(StreamCompressor):
+    name = "br"
+    extension = ".br"
+
+    def __init__(self, level: t.Optional[int] = None):
+        if brotli is None:
+            raise ImportError("you must install 'brotli'")  # pragma: no cover
+        level = 4 if level is None else level
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        output = self._compressor.process(data)
+        if flush:
+            output += self._compressor.flush()
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor(StreamCompressor):
+    name = "zstd"
+    extension = ".zst"
+
+    def __init__(self, level: t.Optional[int] = None):
+        if zstandard is None:
+            raise ImportError("you must install 'zstandard'")  # pragma: no cover
+        level = 3 if level is None else level
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS: t.Dict[str, t.Type[StreamCompressor]] = {}
+if brotli is not None:
+    COMPRESSORS[BrotliCompressor.name] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS[ZstdCompressor.name] = ZstdCompressor
+COMPRESSORS[GzipCompressor.name] = GzipCompressor
+
+# file extensions of precompressed static files, in order of preference
+EXTENSIONS: t.Dict[str, str] = {
+    c.name: c.extension for c in (BrotliCompressor, ZstdCompressor, GzipCompressor)
+}
+
+
+def register_compressor(compressor: t.Type[StreamCompressor]):
+    COMPRESSORS[compressor.name] = compressor
+
+
+def negotiate_encoding(
+    accept_encoding: t.Optional[str], encodings: t.Iterable[str]
+) -> t.Optional[str]:
+    """
+    :param accept_encoding: value of the Accept-Encoding request header
+    :param encodings: the candidates, in order of preference for equal quality
+    :return: the accepted encoding with the highest quality, if any
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
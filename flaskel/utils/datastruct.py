@@ -1,6 +1,7 @@
+import hashlib
 import typing as t
 from dataclasses import dataclass
-from math import ceil
+from math import ceil, log
 
 from flask import current_app as cap
 
@@ -94,3 +95,45 @@ class Pagination:
                 return min(self.page_size, self.max_page_size)
             return self.page_size
         return self.max_page_size
+
+
+class BloomFilter:
+    """
+    Set membership with false positives and no false negatives, sized for
+    capacity items with the given false positive rate; items can not be
+    removed: build a new filter instead
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        bits = -capacity * log(error_rate) / log(2) ** 2
+        self.size = max(8, int(ceil(bits)))
+        self.hashes = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def positions(self, item: str) -> t.Iterator[int]:
+        """double hashing: the k positions come from two 64 bit hashes"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self.positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, items: t.Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(item)
+        )
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+import typing as t
+
+
+class EventLoopThread:
+    """
+    An event loop running in a daemon thread, shared by the request threads
+    of a process: their coroutines are multiplexed on one loop, and what they
+    open on it (client sessions, connection pools) outlives the request.
+    The loop is started at first use, and again in forked processes.
+    """
+
+    def __init__(self, name: str = "flaskel-event-loop"):
+        self.name = name
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._thread: t.Optional[threading.Thread] = None
+        self._pid: t.Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name=self.name, daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def run(self, coro: t.Coroutine) -> t.Any:
+        """
+        Runs coro on the loop and waits for its result
+
+        :raise RuntimeError: if called from the loop thread, it would deadlock
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("blocking call from the event loop thread")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                t.cast(threading.Thread, self._thread).join()
+                self._loop.close()
+            self._loop = None
+            self._thread = None
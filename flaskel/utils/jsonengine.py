@@ -0,0 +1,120 @@
+import typing as t
+from abc import ABC, abstractmethod
+
+from vbcore import json as vbcore_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+DEFAULT_ENCODER = vbcore_json.JsonEncoder
+
+
+class JsonEngine(ABC):
+    name: str = ""
+
+    @abstractmethod
+    def dumps(self, data: t.Any, **kwargs) -> str:
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def loads(self, data: t.Union[str, bytes, bytearray], **kwargs) -> t.Any:
+        pass  # pragma: no cover
+
+    def dumpb(self, data: t.Any, encoding: str = "utf-8", **kwargs) -> bytes:
+        return self.dumps(data, **kwargs).encode(encoding)
+
+
+class StdlibEngine(JsonEngine):
+    """vbcore json: stdlib json module with ``JsonEncoder`` and ``JsonDecoder``"""
+
+    name = "stdlib"
+
+    def dumps(self, data: t.Any, **kwargs) -> str:
+        return vbcore_json.dumps(data, **kwargs)
+
+    def loads(self, data: t.Union[str, bytes, bytearray], **kwargs) -> t.Any:
+        return vbcore_json.loads(data, **kwargs)
+
+
+class OrjsonEngine(JsonEngine):
+    """
+    orjson with the same conversions of ``JsonEncoder`` and ``JsonDecoder``;
+    differences: UUIDs are dumped in canonical form instead of hex, non ASCII
+    chars are not escaped, indent is always 2 and separators are compact
+
+    Falls back to stdlib for custom encoder classes and for the values
+    that orjson refuses (e.g. integers over 64 bit)
+    """
+
+    name = "orjson"
+
+    def __init__(self, fallback: t.Optional[JsonEngine] = None):
+        if orjson is None:
+            raise ImportError("you must install 'orjson'")  # pragma: no cover
+        self.fallback = fallback or StdlibEngine()
+        self._encoder = DEFAULT_ENCODER()
+
+    def default(self, o: t.Any) -> t.Any:
+        return self._encoder.default(o)
+
+    @staticmethod
+    def options(indent: t.Optional[int] = None, sort_keys: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumpb(self, data: t.Any, encoding: str = "utf-8", **kwargs) -> bytes:
+        cls = kwargs.pop("cls", DEFAULT_ENCODER)
+        indent = kwargs.pop("indent", None)
+        sort_keys = kwargs.pop("sort_keys", False)
+        kwargs.pop("separators", None)
+        kwargs.pop("ensure_ascii", None)
+
+        if cls is DEFAULT_ENCODER and not kwargs and encoding == "utf-8":
+            try:
+                option = self.options(indent, sort_keys)
+                return orjson.dumps(data, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                pass
+
+        return self.fallback.dumpb(
+            data, encoding, cls=cls, indent=indent, sort_keys=sort_keys, **kwargs
+        )
+
+    def dumps(self, data: t.Any, **kwargs) -> str:
+        return self.dumpb(data, **kwargs).decode()
+
+    def loads(self, data: t.Union[str, bytes, bytearray], **kwargs) -> t.Any:
+        """
+        the ``JsonDecoder`` hooks (ISO dates, object ids) run on every object
+        and dominate the cost, called from the stdlib C scanner they are
+        cheaper than walking the orjson result, so loads are delegated
+        """
+        return self.fallback.loads(data, **kwargs)
+
+
+ENGINES: t.Dict[str, JsonEngine] = {"stdlib": StdlibEngine()}
+if orjson is not None:
+    ENGINES["orjson"] = OrjsonEngine(ENGINES["stdlib"])
+
+
+def register_engine(engine: JsonEngine, name: t.Optional[str] = None):
+    ENGINES[name or engine.name] = engine
+
+
+def get_engine(name: t.Optional[str] = None) -> JsonEngine:
+    """
+    :param name: a registered engine, None means stdlib, "auto" means the
+        fastest installed, unknown names fall back to stdlib;
+        raises ImportError if "orjson" is requested but not installed
+    """
+    if name == "auto":
+        return ENGINES.get("orjson") or ENGINES["stdlib"]
+    if name == OrjsonEngine.name and orjson is None:
+        raise ImportError("you must install 'orjson'")
+    return ENGINES.get(name or "stdlib") or ENGINES["stdlib"]
@@ -0,0 +1,104 @@
+import ipaddress
+import typing as t
+import urllib.request
+
+IpType = t.Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+NetType = t.Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+NetworkEntry = t.Union[
+    str, IpType, NetType, t.Tuple[t.Union[str, IpType, NetType], t.Any]
+]
+
+
+class NetworkIndex:
+    """
+    Immutable longest prefix match index of IPv4 and IPv6 networks.
+
+    Networks are stored as integer prefixes in one hash table per prefix
+    length, a lookup probes only the lengths in use from the longest one:
+    a few dict lookups instead of a containment check per network.
+    Reloads build a new index and swap the reference, so readers
+    never see a partially loaded index.
+    """
+
+    def __init__(self, networks: t.Iterable[NetworkEntry] = ()):
+        # version -> prefix length -> network prefix -> (network, value)
+        tables: t.Dict[int, t.Dict[int, t.Dict[int, t.Tuple[NetType, t.Any]]]]
+        tables = {4: {}, 6: {}}
+        size = 0
+
+        for entry in networks:
+            network, value = self.parse_entry(entry)
+            host_bits = network.max_prefixlen - network.prefixlen
+            table = tables[network.version].setdefault(network.prefixlen, {})
+            table[int(network.network_address) >> host_bits] = (network, value)
+            size += 1
+
+        self._size = size
+        self._tables = {
+            version: tuple(
+                (max_len - length, tables[version][length])
+                for length in sorted(tables[version], reverse=True)
+            )
+            for version, max_len in ((4, 32), (6, 128))
+        }
+
+    @staticmethod
+    def parse_entry(entry: NetworkEntry) -> t.Tuple[NetType, t.Any]:
+        value = True
+        if isinstance(entry, tuple):
+            entry, value = entry
+        return ipaddress.ip_network(entry, strict=False), value
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, ip: t.Union[str, IpType]) -> bool:
+        return self.lookup(ip) is not None
+
+    def lookup(self, ip: t.Union[str, IpType]) -> t.Optional[t.Tuple[NetType, t.Any]]:
+        """
+        :return: the most specific network containing ip with its value
+        :raise ValueError: if ip is not a valid address
+        """
+        if isinstance(ip, str):
+            ip = ipaddress.ip_address(ip)
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+
+        address = int(ip)
+        for host_bits, table in self._tables[ip.version]:
+            match = table.get(address >> host_bits)
+            if match is not None:
+                return match
+        return None
+
+    @classmethod
+    def from_sources(cls, *sources: str, timeout: int = 10) -> "NetworkIndex":
+        return cls(load_networks(*sources, timeout=timeout))
+
+
+def read_networks(source: str, timeout: int = 10) -> t.Iterator[str]:
+    """
+    Reads one network per line from a file or an http(s) url,
+    blank lines and comments (#) are skipped
+    """
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=timeout) as res:  # nosec
+            lines = res.read().decode().splitlines()
+    else:
+        with open(source, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            yield line
+
+
+def load_networks(*sources: str, timeout: int = 10) -> t.List[NetType]:
+    """:raise ValueError: if a line is not a valid network"""
+    return [
+        ipaddress.ip_network(line, strict=False)
+        for source in sources
+        for line in read_networks(source, timeout=timeout)
+    ]
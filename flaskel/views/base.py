@@ -1,6 +1,7 @@
 import dataclasses
 import typing as t
 
+from flask import current_app
 from flask.views import MethodView, View
 from vbcore.http import httpcode, HttpMethod
 
@@ -29,6 +30,11 @@ class ViewSupportMixin:
     def not_implemented() -> t.NoReturn:  # pragma: no cover
         abort(httpcode.NOT_IMPLEMENTED)
 
+    @staticmethod
+    def call(func: t.Callable, *args, **kwargs) -> t.Any:
+        """calls a handler, plain or coroutine function, and returns its result"""
+        return current_app.ensure_sync(func)(*args, **kwargs)
+
     @classmethod
     def normalize_url(cls, url: str) -> str:
         return f"/{url.lstrip('/')}"
@@ -183,41 +189,41 @@ class Resource(MethodView, ViewSupportMixin):
 
     @builder.no_content
     def head(self, *args, **kwargs):
-        return self.get(*args, **kwargs)
+        return self.call(self.get, *args, **kwargs)
 
     @builder.on_accept()
     def get(self, *args, res_id=None, sub_resource=None, **kwargs):
         if res_id is None:
-            return self.on_collection(*args, **kwargs)
+            return self.call(self.on_collection, *args, **kwargs)
         if sub_resource is None:
-            return self.on_get(res_id, *args, **kwargs)
+            return self.call(self.on_get, res_id, *args, **kwargs)
         if self.methods_subresource and HttpMethod.GET not in self.methods_subresource:
             abort(httpcode.METHOD_NOT_ALLOWED)
 
         _sub_resource = getattr(self, f"sub_{sub_resource}", None)
         if _sub_resource is None:
             abort(httpcode.NOT_FOUND)
-        return _sub_resource(res_id, *args, **kwargs)
+        return self.call(_sub_resource, res_id, *args, **kwargs)
 
     @builder.on_accept()
     def post(self, *args, res_id=None, sub_resource=None, **kwargs):
         if res_id is None:
-            return self.on_post(*args, **kwargs)
+            return self.call(self.on_post, *args, **kwargs)
         if self.methods_subresource and HttpMethod.POST not in self.methods_subresource:
             abort(httpcode.METHOD_NOT_ALLOWED)
 
         _sub_resource = getattr(self, f"sub_{sub_resource}_post", None)
         if _sub_resource is None:
             abort(httpcode.NOT_FOUND)
-        return _sub_resource(res_id, *args, **kwargs)
+        return self.call(_sub_resource, res_id, *args, **kwargs)
 
     @builder.no_content
     def delete(self, res_id, *args, **kwargs):
-        return self.on_delete(res_id, *args, **kwargs)
+        return self.call(self.on_delete, res_id, *args, **kwargs)
 
     @builder.on_accept()
     def put(self, *args, res_id=None, **kwargs):
-        return self.on_put(*args, res_id=res_id, **kwargs)
+        return self.call(self.on_put, *args, res_id=res_id, **kwargs)
 
     def on_get(self, *_, **__):
         return self.not_implemented()  # pragma: no cover
@@ -9,7 +9,7 @@ from vbcore.http.headers import ContentTypeEnum, HeaderEnum
 from vbcore.http.rpc import rpc_error_to_httpcode
 
 from flaskel import abort, cap, flaskel, request
-from flaskel.http.client import FlaskelHttp, FlaskelJsonRPC
+from flaskel.http.client import FlaskelHttp, FlaskelHttpBatch, FlaskelJsonRPC
 
 from .base import BaseView
 
@@ -64,8 +64,9 @@ class ProxyView(BaseView):
 
     def dispatch_request(self, *_, **kwargs):
         opts = {**self._options, **self._filter_kwargs(kwargs)}
-        response = self.proxy(self.service(), **opts)
+        return self.make_response(self.proxy(self.service(), **opts))
 
+    def make_response(self, response: ObjectDict):
         if response and response.body and response.status != httpcode.NO_CONTENT:
             if self._stream:
                 return flaskel.Response(
@@ -116,6 +117,39 @@ class ProxyView(BaseView):
         return request.args if self._proxy_params else None
 
 
+class AsyncProxyView(ProxyView):
+    """
+    ProxyView with a coroutine dispatch_request: the upstream request is
+    awaited, so a view can gather many of them; responses are not streamed
+    """
+
+    client_class: t.Type[FlaskelHttpBatch] = FlaskelHttpBatch
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stream = False
+
+    # flask runs coroutine views through ensure_sync, so the override can be async
+    async def dispatch_request(  # pylint: disable=invalid-overridden-method
+        self, *_, **kwargs
+    ):
+        opts = {**self._options, **self._filter_kwargs(kwargs)}
+        return self.make_response(await self.proxy(self.service(), **opts))
+
+    # only awaited by the dispatch_request above, never called as the sync one
+    async def proxy(  # type: ignore[override] # pylint: disable=invalid-overridden-method
+        self, data: ObjectDict, **kwargs
+    ) -> ObjectDict:
+        client = self.client_class(data.host or self.upstream_host(), **kwargs)
+        return await client.fetch(
+            data.url or self.request_url(),
+            method=data.method or self.request_method(),
+            headers=data.headers or self.request_headers(),
+            params=data.params or self.request_params(),
+            data=data.body or self.request_body(),
+        )
+
+
 class ConfProxyView(BaseView):
     sep = "."
     config_key = None
@@ -1,12 +1,14 @@
 import typing as t
 
+import sqlalchemy as sa
 from sqlalchemy.exc import SQLAlchemyError
 from vbcore.db.exceptions import DBError
 from vbcore.db.support import SQLASupport
 from vbcore.http import httpcode, HttpMethod
 
 from flaskel import abort, cap, db_session, PayloadValidator, Response, webargs
-from flaskel.ext.default import builder
+from flaskel.ext.caching import model_tag
+from flaskel.ext.default import builder, caching
 
 from ..utils.datastruct import Pagination
 from .base import BaseView, Resource, UrlsType
@@ -14,6 +16,9 @@ from .base import BaseView, Resource, UrlsType
 
 class CatalogResource(Resource):
     pagination_enabled: bool = True
+    # if pagination is disabled the collection is fetched and streamed lazily
+    stream_collection: bool = False
+    yield_per: int = 1000
 
     methods_collection = [
         HttpMethod.GET,
@@ -57,6 +62,9 @@ class CatalogResource(Resource):
         if params is None:
             params = webargs.paginate()
 
+        if self.stream_collection and not self.pagination_enabled:
+            kwargs.setdefault("yield_per", self.yield_per)
+
         if self.pagination_enabled is True:
             page = params.get("page")
             size = params.get("page_size")
@@ -77,7 +85,7 @@ class CatalogResource(Resource):
                 response,
                 restricted=not params.get("related", False),
             )
-        return response
+        return response if self.stream_collection else list(response)
 
     @classmethod
     def response_paginated(cls, res, **kwargs):
@@ -104,6 +112,7 @@ class CatalogResource(Resource):
 class Restful(CatalogResource):
     post_schema: t.Any = None
     put_schema: t.Any = None
+    cache_tag: t.Optional[str] = None
     support_class: t.Type[SQLASupport] = SQLASupport
     validator: t.Type[PayloadValidator] = PayloadValidator
 
@@ -168,34 +177,57 @@ class Restful(CatalogResource):
             abort(httpcode.CONFLICT, response={"cause": exception.as_dict()})
         abort(httpcode.INTERNAL_SERVER_ERROR)
 
+    def invalidate_cache(self, res_id=None):
+        """
+        Drops the cached responses tagged with ``model_tags``:
+        the collections of the model and, if given, the resource
+
+        :param res_id: resource identifier (primary key value)
+        """
+        name = self.cache_tag or self._model.__tablename__
+        tags = [model_tag(name)]
+        if res_id is not None:
+            tags.append(model_tag(name, res_id))
+        caching.invalidate_tags(*tags)
+
+    @staticmethod
+    def resource_id(res) -> t.Any:
+        """primary key value of a persistent resource, a tuple if composite"""
+        identity = sa.inspect(res).identity
+        if not identity:
+            return None
+        return identity[0] if len(identity) == 1 else identity
+
     def _create(self, res):
         try:
             self._session.add(res)
             self._session.commit()
         except SQLAlchemyError as exc:
             self._session_exception_handler(exc)
+        self.invalidate_cache()
 
     def _update(self, res):
         try:
-            self._session.merge(res)
+            res = self._session.merge(res)
             self._session.commit()
         except SQLAlchemyError as exc:
             self._session_exception_handler(exc)
+        self.invalidate_cache(self.resource_id(res))
 
     @classmethod
     def _prepare_upsert_filters(cls, *_, **__) -> t.Dict[str, t.Any]:
         return {}
 
-    # pylint: disable=inconsistent-return-statements
     def _upsert(self, data) -> t.Tuple[t.Any, int]:
         try:
             res, created = self.support.update_or_create(
                 data, **self._prepare_upsert_filters(data)
             )
             self._session.commit()
-            return res, httpcode.CREATED if created else httpcode.SUCCESS
         except SQLAlchemyError as exc:
             self._session_exception_handler(exc)
+        self.invalidate_cache(self.resource_id(res))
+        return res, httpcode.CREATED if created else httpcode.SUCCESS
 
     def on_post(self, *_, **__) -> t.Tuple[t.Dict[str, t.Any], int]:
         payload = self.validate(self.post_schema)
@@ -217,6 +249,7 @@ class Restful(CatalogResource):
         except SQLAlchemyError as exc:
             self._session_exception_handler(exc)
 
+        self.invalidate_cache(res_id)
         return data
 
     def on_delete(self, res_id, *args, **kwargs):
@@ -263,7 +296,7 @@ class PatchApiView(Restful):
 
     @builder.no_content
     def patch(self, *args, **kwargs):
-        return self.on_patch(*args, **kwargs)
+        return self.call(self.on_patch, *args, **kwargs)
 
     def on_patch(self, *_, **__):
         return self.not_implemented()
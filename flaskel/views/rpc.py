@@ -92,6 +92,10 @@ class JSONRPCView(BaseView):
             cap.logger.debug(exc)
             raise rpc.RPCMethodNotFound()
 
+    def _notification(self, method: str) -> t.Callable:
+        action = self._get_action(method)
+        return cap.ensure_batch_task(action, self._batch_executor)
+
     def dispatch_request(self, *_, **__):
         tasks = []
         responses = []
@@ -113,11 +117,11 @@ class JSONRPCView(BaseView):
             try:
                 params = d.get("params") or {}
                 if "id" not in d:
-                    tasks.append((self._get_action(d["method"]), params))
+                    tasks.append((self._notification(d["method"]), params))
                 else:
                     resp.id = d.get("id")
                     action = self._get_action(d["method"])
-                    resp.result = action(**params)
+                    resp.result = self.call(action, **params)
             except rpc.RPCError as exc:
                 cap.logger.exception(exc)
                 resp.error = exc.as_dict()
@@ -10,6 +10,7 @@ DEFAULT_WSGI_SERVERS: t.Dict[str, str] = {
     "gevent": "flaskel.wsgi.wsgi_gevent:WSGIGevent",
     "tornado": "flaskel.wsgi.wsgi_tornado.WSGITornado",
     "twisted": "flaskel.wsgi.wsgi_twisted:WSGITwisted",
+    "uvicorn": "flaskel.wsgi.wsgi_uvicorn:WSGIUvicorn",
     "waitress": "flaskel.wsgi.wsgi_waitress:WSGIWaitress",
 }
 
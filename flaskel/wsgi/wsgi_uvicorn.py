@@ -0,0 +1,31 @@
+from multiprocessing import cpu_count
+
+import uvicorn  # pylint: disable=import-error
+from a2wsgi import WSGIMiddleware  # pylint: disable=import-error
+
+from .base import BaseApplication
+
+
+class WSGIUvicorn(BaseApplication):
+    """
+    Serves the application with uvicorn through the a2wsgi ASGI adapter:
+    the WSGI application still runs a request per thread of a pool of
+    ``threads`` workers, coroutine views included, so concurrency is bounded
+    by the pool size as with the other threaded servers
+    """
+
+    def asgi_application(self) -> WSGIMiddleware:
+        self.options.setdefault("threads", cpu_count())
+        return WSGIMiddleware(
+            self.application,  # type: ignore[arg-type] # a2wsgi own StartResponse
+            workers=int(self.options["threads"]),
+        )
+
+    def run(self):
+        uvicorn.run(
+            self.asgi_application(),
+            host=self._interface,
+            port=self._port,
+            interface="asgi3",
+            lifespan="off",
+        )
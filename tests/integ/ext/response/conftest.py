@@ -44,6 +44,12 @@ def app():
         builder = rb.csv(filename="users")
         return builder(data=data["users"])
 
+    @_app.route("/csv/stream")
+    def index_csv_stream():
+        fieldnames = flask.request.args.getlist("field") or None
+        builder = rb.csv(filename="users", fieldnames=fieldnames)
+        return builder(data=(u for u in data["users"]))
+
     @_app.route("/base64")
     @rb.base64()
     def index_base64():
@@ -74,6 +80,11 @@ def app():
     def test_accept():
         return data["users"]
 
+    @_app.route("/onaccept/async")
+    @rb.on_accept()
+    async def test_accept_async():
+        return data["users"]
+
     @_app.route("/onacceptonly")
     @rb.on_accept(acceptable=["application/xml"])
     def test_acceptonly():
@@ -84,6 +95,11 @@ def app():
         _, builder = rb.get_mimetype_accept()
         return rb.build_response(builder, (data["users"][0], 206, {"header": "header"}))
 
+    @_app.route("/onaccept/stream")
+    @rb.on_accept()
+    def test_accept_stream():
+        return (u for u in data["users"])
+
     @_app.route("/format")
     @rb.on_format()
     def test_format():
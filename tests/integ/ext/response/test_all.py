@@ -1,8 +1,15 @@
+import enum
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from vbcore.http import httpcode
 from vbcore.http.headers import ContentTypeEnum
 from vbcore.tester.asserter import Asserter
 
+from flaskel.ext.response import builders
+from flaskel.ext.response.builders import CsvBuilder, JsonBuilder, XmlBuilder
+from flaskel.ext.response.dictutils import FlattenPlan, to_flatten
 from flaskel.tester.helpers import ApiTester
 
 
@@ -75,6 +82,7 @@ def test_on_accept_default(client):
         ContentTypeEnum.CSV,
         "application/yaml",
         "application/base64",
+        "application/x-ndjson",
     ],
 )
 def test_on_accept(client, mimetype):
@@ -83,6 +91,14 @@ def test_on_accept(client, mimetype):
     )
 
 
+@pytest.mark.parametrize("mimetype", [ContentTypeEnum.JSON, ContentTypeEnum.XML])
+def test_on_accept_async(client, mimetype):
+    pytest.importorskip("asgiref")
+    ApiTester(client).get(
+        url="/onaccept/async", headers={"Accept": mimetype}, mimetype=mimetype
+    )
+
+
 def test_on_accept_multiple(client):
     ApiTester(client).get(
         url="/onaccept",
@@ -151,3 +167,257 @@ def test_jsonp(client):
     data = res.data.decode()
     Asserter.assert_true(data.startswith("pippo("))
     Asserter.assert_true(data.endswith(");"))
+
+
+def test_conditional_response(app, client):
+    app.config["RB_CONDITIONAL_ENABLED"] = True
+    res = ApiTester(client).get(url="/json")
+    etag = res.headers["ETag"]
+
+    res = ApiTester(client).get(
+        url="/json", status=httpcode.NOT_MODIFIED, headers={"If-None-Match": etag}
+    )
+    Asserter.assert_equals(res.data, b"")
+    ApiTester(client).get(url="/json", headers={"If-None-Match": '"other"'})
+
+
+def test_builders_are_thread_safe(app):
+    urls = {
+        "/json": "application/json",
+        "/json?callback=pippo": "application/javascript",
+        "/csv": "text/csv",
+        "/xml": "application/xml",
+    }
+
+    def fetch(url):
+        with app.test_client() as client:
+            res = client.get(url)
+            return url, res.mimetype, res.headers.get("X-Total-Rows")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force threads to interleave
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(fetch, list(urls) * 100))
+    finally:
+        sys.setswitchinterval(interval)
+
+    for url, mimetype, total_rows in results:
+        Asserter.assert_equals(mimetype, urls[url])
+        Asserter.assert_equals(total_rows, "3" if url == "/csv" else None)
+
+
+def test_builder_legacy_response(app):
+    builder = JsonBuilder("application/json")
+    with app.test_request_context():
+        builder.build({"a": 1})
+        Asserter.assert_equals(builder.to_dict(builder.data), {"a": 1})
+        res = builder.response(httpcode.CREATED, {"X-Custom": "value"})
+        Asserter.assert_equals(res.status_code, httpcode.CREATED)
+        Asserter.assert_equals(res.headers["X-Custom"], "value")
+        Asserter.assert_equals(builder.to_dict(res.data), {"a": 1})
+
+        res = builder.response(status=httpcode.ACCEPTED)
+        Asserter.assert_equals(res.status_code, httpcode.ACCEPTED)
+        Asserter.assert_equals(res.mimetype, "application/json")
+
+
+def test_csv_stream(client):
+    expected = ApiTester(client).get(url="/csv", mimetype=ContentTypeEnum.CSV)
+
+    with client.get("/csv/stream") as res:
+        Asserter.assert_true(res.is_streamed)
+        Asserter.assert_equals(res.mimetype, ContentTypeEnum.CSV)
+        Asserter.assert_not_in("X-Total-Rows", res.headers)
+        Asserter.assert_equals(res.headers["X-Total-Columns"], "2")
+        Asserter.assert_equals(res.data, expected.data)
+
+
+def test_csv_stream_fieldnames(client):
+    res = client.get("/csv/stream?field=name")
+    Asserter.assert_equals(res.headers["X-Total-Columns"], "1")
+    Asserter.assert_equals(
+        res.data.decode().splitlines(),
+        ['"name"', '"name-1"', '"name-2"', '"name-3"'],
+    )
+
+
+def test_csv_iter_chunks():
+    rows = ({"id": i} for i in range(100))
+    chunks = list(CsvBuilder.iter_csv(rows, ["id"], chunk_size=64))
+    Asserter.assert_true(len(chunks) > 1)
+    Asserter.assert_true(all(len(c) < 64 + 16 for c in chunks))
+    Asserter.assert_equals(len(b"".join(chunks).splitlines()), 101)
+
+
+def test_json_stream(client):
+    expected = ApiTester(client).get(url="/onaccept", mimetype=ContentTypeEnum.JSON)
+
+    with client.get("/onaccept/stream") as res:
+        Asserter.assert_true(res.is_streamed)
+        Asserter.assert_equals(res.mimetype, ContentTypeEnum.JSON)
+        Asserter.assert_equals(res.json, expected.json)
+
+    res = client.get("/onaccept/stream?callback=cb")
+    Asserter.assert_equals(res.mimetype, "application/javascript")
+    Asserter.assert_true(res.data.startswith(b"cb([{"))
+
+
+def test_ndjson_stream(client):
+    res = client.get("/onaccept/stream", headers={"Accept": "application/x-ndjson"})
+    Asserter.assert_true(res.is_streamed)
+    Asserter.assert_equals(res.mimetype, "application/x-ndjson")
+    lines = res.data.decode().splitlines()
+    Asserter.assert_equals(len(lines), 3)
+    Asserter.assert_equals(lines[0], '{"id":1,"name":"name-1"}')
+
+
+def test_json_iter_chunks():
+    tokens = JsonBuilder.join_tokens((str(i) for i in range(100)), "[", ",", "]")
+    chunks = list(JsonBuilder.iter_chunks(tokens, chunk_size=32))
+    Asserter.assert_true(len(chunks) > 1)
+    Asserter.assert_equals(
+        b"".join(chunks), str(list(range(100))).replace(" ", "").encode()
+    )
+
+
+def test_negotiation_cache(app, client):
+    rb = app.extensions["response_builder"]
+    rb.negotiation_cache_clear()
+    accept = {"Accept": "application/xml;q=0.8, text/csv;q=0.4"}
+
+    for _ in range(3):
+        ApiTester(client).get("/onaccept", headers=accept, mimetype="application/xml")
+    info = rb.negotiation_cache_info()
+    Asserter.assert_equals((info.misses, info.hits), (1, 2))
+
+    rb.register_builder("custom", JsonBuilder("application/xml"))
+    Asserter.assert_equals(rb.negotiation_cache_info().currsize, 0)
+    Asserter.assert_true(isinstance(rb.find_builder("application/xml"), XmlBuilder))
+
+
+def test_xml_stream(client):
+    expected = ApiTester(client).get(
+        url="/onaccept", headers={"Accept": ContentTypeEnum.XML}
+    )
+
+    with client.get("/onaccept/stream", headers={"Accept": ContentTypeEnum.XML}) as res:
+        Asserter.assert_true(res.is_streamed)
+        Asserter.assert_equals(res.mimetype, ContentTypeEnum.XML)
+        Asserter.assert_equals(res.data, expected.data)
+
+
+def test_xml_iter_chunks():
+    rows = ({"id": i, "name": f"<name-{i}>"} for i in range(100))
+    tokens = XmlBuilder.iter_xml(rows, custom_root="ROOT")
+    chunks = list(XmlBuilder.iter_chunks(tokens, chunk_size=256))
+    Asserter.assert_true(len(chunks) > 1)
+
+    document = XmlBuilder.to_dict(b"".join(chunks))
+    Asserter.assert_equals(len(document["ROOT"]["ROW"]), 100)
+    Asserter.assert_equals(document["ROOT"]["ROW"][1]["name"]["#text"], "<name-1>")
+
+
+def test_flatten_plan():
+    records = [
+        {"id": 1, "user": {"name": "a", "geo": {"lat": 1}}, "tags": [{"t": "x"}]},
+        {"id": 2, "user": {"name": "b", "geo": {"lat": 2}}, "tags": []},
+        {"id": 3, "user": None, "tags": [{"t": "y"}, {"t": "z"}]},
+    ]
+    plan = FlattenPlan.from_record(records[0], sep=".")
+    Asserter.assert_equals(plan.columns, ("id", "user.name", "user.geo.lat", "tags"))
+    Asserter.assert_equals(
+        list(plan.iter_rows(records)),
+        [
+            {"id": 1, "user.name": "a", "user.geo.lat": 1, "tags.t": "x"},
+            {"id": 2, "user.name": "b", "user.geo.lat": 2, "tags": []},
+            {"id": 3, "user": None, "tags.t": "y"},
+            {"id": 3, "user": None, "tags.t": "z"},
+        ],
+    )
+    Asserter.assert_equals(list(plan.iter_rows(records)), to_flatten(records, sep="."))
+
+    columns = plan.columnar(records)
+    Asserter.assert_equals(columns["id"], [1, 2, 3, 3])
+    Asserter.assert_equals(columns["user.name"], ["a", "b", None, None])
+    Asserter.assert_equals(columns["tags.t"], ["x", None, "y", "z"])
+
+
+def test_flatten_plan_mixed_records():
+    class Key(str, enum.Enum):
+        NAME = "name"
+
+    records = [
+        {"id": 1, "user": None, "tags": None},
+        {"id": 2, "user": {"name": "a"}, "tags": [{"t": "x"}, {"t": "y"}]},
+        {"id": 3, "user": {"name": "b", "geo": {"lat": 3}}, "tags": None},
+        {"id": 4, "user": {Key.NAME: "c"}, "tags": None},
+    ]
+    expected = [
+        {"id": 1, "user": None, "tags": None},
+        {"id": 2, "user_name": "a", "tags_t": "x"},
+        {"id": 2, "user_name": "a", "tags_t": "y"},
+        {"id": 3, "user_name": "b", "user_geo_lat": 3, "tags": None},
+        {"id": 4, "user_name": "c", "tags": None},
+    ]
+    Asserter.assert_equals(to_flatten(records), expected)
+    for first in records:
+        plan = FlattenPlan.from_record(first)
+        Asserter.assert_equals(to_flatten(records, plan=plan), expected)
+
+
+@pytest.mark.parametrize(
+    "mimetype, builder",
+    [
+        ("application/vnd.apache.arrow.stream", "ArrowBuilder"),
+        ("application/vnd.apache.parquet", "ParquetBuilder"),
+    ],
+)
+def test_columnar_builders(client, mimetype, builder):
+    pytest.importorskip("pyarrow")
+    builder = getattr(builders, builder)
+    expected = ApiTester(client).get(url="/onaccept", mimetype=ContentTypeEnum.JSON)
+
+    for url in ("/onaccept", "/onaccept/stream"):
+        with client.get(url, headers={"Accept": mimetype}) as res:
+            Asserter.assert_true(res.is_streamed)
+            Asserter.assert_equals(res.mimetype, mimetype)
+            Asserter.assert_equals(builder.to_dict(res.data), expected.json)
+
+
+def test_arrow_batches():
+    pyarrow = pytest.importorskip("pyarrow")
+    rows = ({"id": i, "user": {"name": f"name-{i}"}} for i in range(10))
+    batches = list(builders.ArrowBuilder.iter_batches(rows, batch_size=4))
+    Asserter.assert_equals([b.num_rows for b in batches], [4, 4, 2])
+    Asserter.assert_equals(batches[0].schema.names, ["id", "user_name"])
+
+    columns = {"id": [1, 2, 3], "name": ["a", "b", "c"]}
+    chunks = list(
+        builders.ArrowBuilder.iter_write(
+            builders.ArrowBuilder.iter_batches(columns, batch_size=2)
+        )
+    )
+    table = pyarrow.ipc.open_stream(b"".join(chunks)).read_all()
+    Asserter.assert_equals(table.to_pydict(), columns)
+
+
+@pytest.mark.parametrize(
+    "mimetype, builder",
+    [
+        ("application/msgpack", "MsgpackBuilder"),
+        ("application/cbor", "CborBuilder"),
+    ],
+)
+def test_binary_builders(client, mimetype, builder):
+    builder = getattr(builders, builder)
+    try:
+        builder.binary_format()
+    except ImportError as exc:
+        pytest.skip(str(exc))
+
+    expected = ApiTester(client).get(url="/onaccept", mimetype=ContentTypeEnum.JSON)
+    for url in ("/onaccept", "/onaccept/stream"):
+        res = ApiTester(client).get(url=url, headers={"Accept": mimetype})
+        Asserter.assert_equals(res.mimetype, mimetype)
+        Asserter.assert_equals(builder.to_dict(res.data), expected.json)
@@ -1,3 +1,5 @@
+import gzip
+
 import pytest
 from vbcore.datastruct import ObjectDict
 from vbcore.http import httpcode
@@ -112,6 +114,34 @@ def test_static_file_view(testapp):
     )
 
 
+def test_static_file_precompressed(testapp):
+    app = testapp(
+        config=ObjectDict(USE_X_SENDFILE=False),
+        views=((StaticFileView, bp_api, {"name": "precompressed_assets"}),),
+    )
+    client = ApiTester(app.test_client())
+    url = url_for("api.precompressed_assets", filename="css/style.css")
+
+    response = client.get(
+        url=url,
+        headers={HeaderEnum.ACCEPT_ENCODING: "br;q=0, gzip"},
+        mimetype=ContentTypeEnum.CSS,
+        status=httpcode.SUCCESS,
+    )
+    Asserter.assert_equals(response.headers[HeaderEnum.CONTENT_ENCODING], "gzip")
+    Asserter.assert_equals(
+        response.headers[HeaderEnum.CONTENT_DISPOSITION],
+        "attachment; filename=style.css",
+    )
+    Asserter.assert_equals(
+        gzip.decompress(response.data), b"html {\n    font-size: 12px;\n}\n"
+    )
+
+    response = client.get(url=url, mimetype=ContentTypeEnum.CSS)
+    Asserter.assert_not_in(HeaderEnum.CONTENT_ENCODING, response.headers)
+    Asserter.assert_in("Accept-Encoding", response.vary)
+
+
 def test_use_x_send_file(testapp):
     app = testapp(
         config=ObjectDict(USE_X_SENDFILE=True, ENABLE_ACCEL=True),
@@ -1,12 +1,21 @@
+from unittest.mock import AsyncMock, patch
+
 from vbcore.datastruct import ObjectDict
 from vbcore.http import httpcode
-from vbcore.http.headers import ContentTypeEnum
+from vbcore.http.client import ResponseData
+from vbcore.http.headers import ContentTypeEnum, HeaderEnum
 from vbcore.tester.asserter import Asserter
 
+from flaskel.http.client import FlaskelHttpBatch
 from flaskel.tester.helpers import ApiTester, url_for
 from flaskel.utils.schemas.default import SCHEMAS as DEFAULT_SCHEMAS
 from flaskel.views import UrlRule
-from flaskel.views.proxy import JsonRPCProxy, SchemaProxyView, TransparentProxyView
+from flaskel.views.proxy import (
+    AsyncProxyView,
+    JsonRPCProxy,
+    SchemaProxyView,
+    TransparentProxyView,
+)
 from tests.integ.test_http_client import HOSTS
 from tests.integ.views import bp_api
 
@@ -31,6 +40,46 @@ def test_proxy_view(testapp):
     Asserter.assert_equals(response.json.headers["X-Test"], "test")
 
 
+def test_async_proxy_view(testapp):
+    upstream = ResponseData(body={"a": "a"}, status=httpcode.SUCCESS, headers={})
+    app = testapp(
+        config=ObjectDict(ASYNC_SHARED_LOOP=True, HTTP_SSL_VERIFY=False),
+        views=(
+            (
+                AsyncProxyView,
+                ObjectDict(
+                    host="http://upstream",
+                    url="/anything",
+                    proxy_params=True,
+                    urls=(UrlRule(url="/async-proxy", endpoint="async_proxy"),),
+                ),
+            ),
+        ),
+    )
+    client = ApiTester(app.test_client(), mimetype=ContentTypeEnum.JSON)
+
+    with patch.object(
+        FlaskelHttpBatch, "http_request", AsyncMock(return_value=upstream)
+    ) as http_request:
+        response = client.get(
+            view="async_proxy",
+            params={"test": "test"},
+            headers={HeaderEnum.X_REQUEST_ID: "req-id"},
+        )
+    app.event_loop.stop()
+
+    Asserter.assert_equals(response.json, {"a": "a"})
+    http_request.assert_awaited_once()
+    kwargs = http_request.await_args.kwargs
+    Asserter.assert_equals(kwargs["url"], "http://upstream/anything")
+    Asserter.assert_equals(kwargs["method"], "GET")
+    Asserter.assert_equals(dict(kwargs["params"]), {"test": "test"})
+    Asserter.assert_true(
+        kwargs["headers"][HeaderEnum.X_REQUEST_ID].startswith("req-id")
+    )
+    Asserter.assert_false(kwargs["ssl"])
+
+
 def test_schema_conf_proxy_view(testapp):
     app = testapp(
         config=ObjectDict(SCHEMAS=DEFAULT_SCHEMAS),
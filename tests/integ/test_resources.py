@@ -1,4 +1,6 @@
+import pytest
 import sqlalchemy as sa
+from sqlalchemy.orm import declarative_base, Session
 from vbcore.datastruct import ObjectDict
 from vbcore.db.mixins import StandardMixin
 from vbcore.http import httpcode
@@ -9,8 +11,8 @@ from vbcore.tester.asserter import Asserter
 from flaskel.ext.default import Database
 from flaskel.tester.helpers import ApiTester, config, url_for
 from flaskel.utils.schemas.default import SCHEMAS
-from flaskel.views.resource import CatalogResource
-from tests.integ.views import ApiItem, APIResource, bp_api
+from flaskel.views.resource import CatalogResource, Restful
+from tests.integ.views import ApiItem, APIResource, AsyncAPIResource, bp_api
 
 db = Database()
 
@@ -51,6 +53,32 @@ def test_api_resource(testapp):
     )
 
 
+def test_async_api_resource(testapp):
+    app = testapp(
+        config=ObjectDict(SCHEMAS=ITEM_SCHEMAS, ASYNC_SHARED_LOOP=True),
+        views=((AsyncAPIResource, bp_api),),
+    )
+    client = ApiTester(app.test_client())
+
+    client.restful(
+        view="api.async_resources",
+        schema_read=config.SCHEMAS.ITEM,
+        schema_collection=config.SCHEMAS.ITEM_LIST,
+        body_create={"item": "TEST"},
+        body_update={"id": 1, "item": "TEST"},
+    )
+    app.event_loop.stop()
+
+
+def test_async_api_resource_loop_per_call(testapp):
+    pytest.importorskip("asgiref")
+    app = testapp(config=ObjectDict(SCHEMAS=ITEM_SCHEMAS), views=(AsyncAPIResource,))
+    client = ApiTester(app.test_client())
+
+    client.get(view="async_resources", schema=config.SCHEMAS.ITEM_LIST)
+    client.get(url=url_for("async_resources", res_id=1), schema=config.SCHEMAS.ITEM)
+
+
 def test_catalog(testapp, session_save):
     view = "api.resource"
 
@@ -106,3 +134,20 @@ def test_restful(testapp, session_save):
         body_create={"item": "TEST CREATE"},
         body_update={"item": "TEST CREATE"},
     )
+
+
+def test_resource_id():
+    base = declarative_base()
+
+    class Code(base):  # type: ignore[misc,valid-type]
+        __tablename__ = "codes"
+
+        code = sa.Column(sa.String(10), primary_key=True)
+
+    engine = sa.create_engine("sqlite://")
+    base.metadata.create_all(engine)
+    with Session(engine) as session:
+        res = session.merge(Code(code="abc"))
+        session.commit()
+        Asserter.assert_equals(Restful.resource_id(res), "abc")
+    Asserter.assert_none(Restful.resource_id(Code(code="new")))
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import MagicMock
 
 from flask import Blueprint
@@ -78,6 +79,48 @@ class APIResource(Resource):
             return abort(httpcode.NOT_FOUND)
 
 
+class AsyncAPIResource(APIResource):
+    default_view_name: str = "async_resources"
+    default_urls = ("/async-resources",)
+
+    resources = [
+        {"id": 1, "item": "1"},
+        {"id": 2, "item": "2"},
+        {"id": 3, "item": "3"},
+    ]
+
+    # Resource calls the handlers through ensure_sync, so overrides can be async
+    async def on_get(  # pylint: disable=invalid-overridden-method
+        self, res_id, *args, **kwargs
+    ):
+        await asyncio.sleep(0)
+        return super().on_get(res_id, *args, **kwargs)
+
+    async def on_collection(  # pylint: disable=invalid-overridden-method
+        self, *args, **kwargs
+    ):
+        await asyncio.sleep(0)
+        return super().on_collection(*args, **kwargs)
+
+    async def on_post(  # pylint: disable=invalid-overridden-method
+        self, *args, **kwargs
+    ):
+        await asyncio.sleep(0)
+        return super().on_post(*args, **kwargs)
+
+    async def on_delete(  # pylint: disable=invalid-overridden-method
+        self, res_id, *args, **kwargs
+    ):
+        await asyncio.sleep(0)
+        return super().on_delete(res_id, *args, **kwargs)
+
+    async def on_put(  # pylint: disable=invalid-overridden-method
+        self, res_id, *args, **kwargs
+    ):
+        await asyncio.sleep(0)
+        return super().on_put(res_id, *args, **kwargs)
+
+
 class MyJsonRPC:
     @staticmethod
     def action_success(**__):
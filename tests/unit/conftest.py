@@ -0,0 +1,41 @@
+import gzip
+
+import flask
+import pytest
+
+from flaskel import middlewares
+
+
+@pytest.fixture
+def compress_client(flaskel_app):
+    payload = [{"id": i, "name": f"name-{i}"} for i in range(100)]
+
+    @flaskel_app.route("/json")
+    def json_view():
+        return flask.jsonify(payload)
+
+    @flaskel_app.route("/small")
+    def small_view():
+        return flask.jsonify(id=1)
+
+    @flaskel_app.route("/stream")
+    def stream_view():
+        return flask.Response(
+            (f"line-{i}\n" for i in range(1000)), mimetype="text/plain"
+        )
+
+    @flaskel_app.route("/image")
+    def image_view():
+        return flask.Response(b"0" * 1000, mimetype="image/png")
+
+    @flaskel_app.route("/encoded")
+    def encoded_view():
+        data = gzip.compress(b"0" * 1000)
+        return flask.Response(
+            data, mimetype="text/plain", headers={"Content-Encoding": "gzip"}
+        )
+
+    middle = middlewares.Compress(flaskel_app.wsgi_app)
+    middle.flask_app = flaskel_app
+    flaskel_app.wsgi_app = middle
+    return flaskel_app.test_client()
@@ -1,6 +1,8 @@
+import pytest
 from vbcore.tester.asserter import Asserter
 
 from flaskel.ext.default import argon2
+from flaskel.http.exceptions import ServiceUnavailable
 
 
 def test_init_app(flaskel_app):
@@ -12,3 +14,28 @@ def test_init_app(flaskel_app):
 def test_verify(flaskel_app):
     argon2.init_app(flaskel_app)
     argon2.verify(argon2.hash("password"), "password")
+
+
+def test_async_inline(flaskel_app):
+    argon2.init_app(flaskel_app)
+    hashed = argon2.hash_async("password").result()
+    Asserter.assert_true(argon2.verify_async(hashed, "password").result())
+    Asserter.assert_false(argon2.verify_async(hashed, "wrong").result())
+
+
+def test_pool_backpressure(flaskel_app):
+    flaskel_app.config.ARGON2_POOL_SIZE = 1
+    flaskel_app.config.ARGON2_POOL_MAX_PENDING = 1
+    flaskel_app.config.ARGON2_POOL_TIMEOUT = 0.01
+    flaskel_app.config.ARGON2_POOL_RETRY_AFTER = 5
+    argon2.init_app(flaskel_app)
+
+    try:
+        future = argon2.hash_async("password")
+        with pytest.raises(ServiceUnavailable) as error:
+            argon2.hash_async("password")
+        Asserter.assert_equals(error.value.retry_after, 5)
+
+        Asserter.assert_true(argon2.verify(future.result(), "password"))
+    finally:
+        argon2.shutdown()
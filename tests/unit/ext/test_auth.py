@@ -1,9 +1,23 @@
+import threading
+import time
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+import jwt
+import sqlalchemy as sa
+from flask_jwt_extended import create_access_token, decode_token, JWTManager
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 from vbcore.datastruct import ObjectDict
 from vbcore.tester.asserter import Asserter
 
-from flaskel.ext.auth import BaseTokenHandler, DBTokenHandler, RedisTokenHandler
+from flaskel.ext.auth import (
+    BaseTokenHandler,
+    CachedJWTManager,
+    DBTokenHandler,
+    RedisTokenHandler,
+    RevokedTokenFilter,
+    RevokedTokenMixin,
+)
 
 
 @patch("flaskel.ext.auth.create_access_token")
@@ -82,6 +96,52 @@ def test_db_token_handler(mock_decode_token):
 
     handler.revoke("fake-token")
     handler.session.add.assert_called_once()
+    handler.model.purge_expired.assert_called_once()
+    handler.model.assert_called_once_with(jti="fake", expires_at=11111)
+
+
+@patch("flaskel.ext.auth.decode_token")
+def test_db_token_handler_without_expiration(mock_decode_token):
+    mock_decode_token.return_value = ObjectDict(exp=11111, iat=22222, jti="fake")
+    model = MagicMock(spec=RevokedTokenMixin)
+
+    handler = DBTokenHandler(model=model, session=MagicMock())
+    handler.revoke("fake-token")
+    model.assert_called_once_with(jti="fake")
+    handler.session.add.assert_called_once_with(model.return_value)
+    Asserter.assert_false(hasattr(RevokedTokenMixin, "expires_at"))
+
+
+def test_revoked_since_out_of_order_commits():
+    engine = sa.create_engine("sqlite://")
+    session = scoped_session(sessionmaker(engine))
+    base = declarative_base()
+
+    class RevokedToken(base, RevokedTokenMixin):  # type: ignore[misc,valid-type]
+        __tablename__ = "revoked_tokens"
+        query = session.query_property()
+
+    base.metadata.create_all(engine)
+    inserted_at = datetime(2022, 1, 1, 12, 0, 0)
+
+    # id 2 commits first, id 1 was inserted before it but commits later
+    session.add(RevokedToken(id=2, jti="jti-2", created_at=inserted_at))
+    session.commit()
+    jtis, cursor = RevokedToken.revoked_since()
+    Asserter.assert_equals(jtis, ["jti-2"])
+    Asserter.assert_equals(cursor, inserted_at)
+
+    session.add(
+        RevokedToken(id=1, jti="jti-1", created_at=inserted_at - timedelta(seconds=1))
+    )
+    session.commit()
+    jtis, cursor = RevokedToken.revoked_since(cursor)
+    Asserter.assert_equals(sorted(jtis), ["jti-1", "jti-2"])
+    Asserter.assert_equals(cursor, inserted_at)
+
+    old_cursor = inserted_at + timedelta(seconds=RevokedToken.revoked_overlap + 1)
+    Asserter.assert_equals(RevokedToken.revoked_since(old_cursor), ([], old_cursor))
+    session.remove()
 
 
 @patch("flaskel.ext.auth.decode_token")
@@ -97,7 +157,101 @@ def test_redis_token_handler(mock_decode_token):
         )
     )
 
-    handler.revoke("fake-token")
-    handler.redis.set.assert_called_once_with(
-        f"{handler.key_prefix}fake-jti", handler.entry_value
+    with patch.object(handler, "max_token_lifetime", return_value=100):
+        handler.revoke("fake-token")
+
+    pipe = mock_redis.pipeline.return_value
+    pipe.set.assert_called_once_with(
+        f"{handler.key_prefix}fake-jti", handler.entry_value, exat=11111
     )
+    pipe.zadd.assert_called_once()
+    pipe.zremrangebyscore.assert_called_once()
+    pipe.execute.assert_called_once()
+
+
+def test_revoked_token_filter(flaskel_app):
+    loader = MagicMock(side_effect=[(["jti-1"], 1), (["jti-2"], 2), ([], 2), ([], 2)])
+    blocklist_filter = RevokedTokenFilter(loader, refresh_interval=0)
+
+    with flaskel_app.app_context():
+        Asserter.assert_true(blocklist_filter.might_contain("jti-1"))
+        Asserter.assert_true(blocklist_filter.might_contain("jti-2"))
+        Asserter.assert_false(blocklist_filter.might_contain("jti-3"))
+        blocklist_filter.add("jti-3")
+        Asserter.assert_true(blocklist_filter.might_contain("jti-3"))
+
+        loader.side_effect = ConnectionError
+        Asserter.assert_true(blocklist_filter.might_contain("jti-4"))
+
+    Asserter.assert_equals(
+        [c.args for c in loader.call_args_list], [(None,), (1,), (2,), (2,), (2,)]
+    )
+
+
+def test_revoked_token_filter_add_during_refresh(flaskel_app):
+    loader = MagicMock(return_value=([], None))
+    blocklist_filter = RevokedTokenFilter(loader, refresh_interval=3600)
+
+    with flaskel_app.app_context():
+        Asserter.assert_false(blocklist_filter.might_contain("jti-1"))
+
+    # pylint: disable=protected-access
+    with blocklist_filter._lock:
+        thread = threading.Thread(target=blocklist_filter.add, args=("jti-1",))
+        thread.start()
+        thread.join(0.05)
+        Asserter.assert_true(thread.is_alive())
+    thread.join()
+    Asserter.assert_true(blocklist_filter.might_contain("jti-1"))
+
+
+@patch("flaskel.ext.auth.decode_token")
+def test_redis_token_handler_filter(mock_decode_token, flaskel_app):
+    mock_decode_token.return_value = ObjectDict(exp=11111, iat=22222, jti="fake-jti")
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore.return_value = [(b"revoked-jti", 1000.0)]
+    mock_redis.get.return_value = RedisTokenHandler.entry_value
+
+    handler = RedisTokenHandler(redis=mock_redis, blocklist_filter={})
+    with flaskel_app.app_context():
+        Asserter.assert_false(
+            handler.check_token_block_listed(MagicMock(), {"jti": "valid-jti"})
+        )
+        mock_redis.get.assert_not_called()
+        Asserter.assert_true(
+            handler.check_token_block_listed(MagicMock(), {"jti": "revoked-jti"})
+        )
+        handler.revoke("fake-token")
+        Asserter.assert_true(handler.blocklist_filter.might_contain("fake-jti"))
+
+    Asserter.assert_equals(handler.load_revoked(1000.0), (["revoked-jti"], 1000.0))
+    mock_redis.zrangebyscore.assert_called_with(
+        handler.index_key, 995.0, "+inf", withscores=True
+    )
+
+
+def test_cached_jwt_manager(flaskel_app):
+    flaskel_app.config.JWT_SECRET_KEY = "secret"
+    flaskel_app.config.JWT_DECODED_CACHE_SIZE = 10
+    manager = CachedJWTManager(flaskel_app)
+
+    with (
+        flaskel_app.app_context(),
+        patch.object(
+            JWTManager, "_decode_jwt_from_config", autospec=True
+        ) as mock_decode,
+    ):
+        token = create_access_token(identity="user", expires_delta=timedelta(hours=1))
+        claims = decode_token(token)
+        Asserter.assert_equals(claims["sub"], "user")
+        mock_decode.assert_not_called()
+
+        other = jwt.encode({"sub": "other"}, "secret", algorithm="HS256")
+        mock_decode.return_value = {"sub": "other", "exp": time.time() + 60}
+        decode_token(other)
+        decode_token(other)
+        mock_decode.assert_called_once_with(manager, other)
+
+        with patch("time.time", return_value=time.time() + 7200):
+            decode_token(token)
+        Asserter.assert_equals(mock_decode.call_count, 2)
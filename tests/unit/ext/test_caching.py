@@ -1,12 +1,31 @@
-import base64
-from unittest.mock import patch
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
 
 import pytest
+from flask_caching.backends import SimpleCache
 from vbcore.http import httpcode, HttpMethod
 from vbcore.tester.asserter import Asserter
 from werkzeug.datastructures import Headers
 
 import flaskel
+from flaskel.ext.caching import (
+    CachedResponse,
+    Caching,
+    EncodedCache,
+    GzipCodec,
+    IdentityCodec,
+    KeyLocks,
+    LocalInvalidator,
+    LocalLRUCache,
+    LocalTagIndex,
+    model_tags,
+    RedisInvalidator,
+    RedisKeyLocks,
+    RedisTagIndex,
+    resolve_tags,
+    TieredCache,
+)
 from flaskel.ext.default import caching
 
 
@@ -23,9 +42,10 @@ def test_optional_callable(key, expected):
 
 
 def test_hash_method():
-    data = "sample"
-    hashed = caching.hash_method(data)
-    Asserter.assert_equals(data, base64.b64decode(hashed).decode())
+    hashed = caching.hash_method("sample")
+    Asserter.assert_equals(hashed, caching.hash_method("sample"))
+    Asserter.assert_equals(len(hashed), 32)
+    Asserter.assert_equals(len(caching.hash_method("sample" * 1000)), 32)
 
 
 @pytest.mark.parametrize(
@@ -33,9 +53,10 @@ def test_hash_method():
     [
         ("a=1&b=2", "a=1&b=2"),
         ("c=4&a=1&b=2&a=3", "a=1&a=3&b=2&c=4"),
+        ("a=10&b=xy", "a=10&b=xy"),
         ("", ""),
     ],
-    ids=["simple", "multi", "empty"],
+    ids=["simple", "multi", "long-values", "empty"],
 )
 def test_make_query_string(flaskel_app, query_string, expected):
     with flaskel_app.test_request_context(f"/?{query_string}"):
@@ -121,6 +142,37 @@ def test_make_cache_key(flaskel_app):
                 mock_hash_method.assert_called_once_with(f"{query}{sep}{cts}")
 
 
+def test_make_cache_key_schema(flaskel_app):
+    make_key = caching.key_template(query=("page",), headers=("X-Hdr",))
+
+    def key_of(url, **headers):
+        with flaskel_app.test_request_context(url, headers=headers):
+            return make_key()
+
+    key = key_of("/items?page=1&utm=a", **{"X-Hdr": "1"})
+    Asserter.assert_equals(key, key_of("/items?utm=b&page=1", **{"X-Hdr": "1"}))
+    Asserter.assert_equals(key, key_of("/items?page=1", **{"X-Hdr": "1", "Y": "2"}))
+    Asserter.assert_different(key, key_of("/items?page=2", **{"X-Hdr": "1"}))
+    Asserter.assert_different(key, key_of("/items?page=1", **{"X-Hdr": "2"}))
+    Asserter.assert_equals(len(key), len(key_of("/items?page=1" + "&f=x" * 1000)))
+
+
+def test_key_template_resolved_once(flaskel_app):
+    key_prefix = MagicMock(return_value="/prefix")
+    headers_in_keys = MagicMock(return_value=("X-Hdr",))
+    cache = Caching(key_prefix=key_prefix, headers_in_keys=headers_in_keys)
+    make_key = cache.key_template(query=("page",))
+
+    for page in (1, 2):
+        with flaskel_app.test_request_context(f"/items?page={page}"):
+            Asserter.assert_true(
+                make_key().startswith("/prefix/http://localhost/items/")
+            )
+
+    key_prefix.assert_called_once_with()
+    headers_in_keys.assert_called_once_with()
+
+
 def test_cached(flaskel_app):
     response = "hello"
 
@@ -148,3 +200,431 @@ def test_cached(flaskel_app):
             response_filter=caching.response_filter,
             source_check=True,
         )
+
+
+def test_local_lru_cache_bounded_by_bytes():
+    local = LocalLRUCache(max_bytes=10, default_timeout=10)
+    local.set("a", b"12345")
+    local.set("b", b"12345")
+    Asserter.assert_equals(local.size, 10)
+
+    local.get("a")  # b becomes the least recently used
+    local.set("c", b"123")
+    Asserter.assert_equals(local.get("b"), None)
+    Asserter.assert_equals(local.get("a"), b"12345")
+    Asserter.assert_equals(local.size, 8)
+
+    Asserter.assert_false(local.set("d", b"too many bytes"))
+    Asserter.assert_equals(len(local), 2)
+
+
+def test_local_lru_cache_expires():
+    local = LocalLRUCache(max_bytes=10, default_timeout=10)
+    with patch("flaskel.ext.caching.tiered.time.monotonic") as mock_monotonic:
+        mock_monotonic.return_value = 100
+        local.set("a", b"1", timeout=1)
+        Asserter.assert_equals(local.get("a"), b"1")
+        mock_monotonic.return_value = 101
+        Asserter.assert_equals(local.get("a"), None)
+        Asserter.assert_equals(local.size, 0)
+
+
+def test_tiered_cache_stats():
+    tiered = TieredCache(SimpleCache())
+    tiered.backend.set("key", "value")
+
+    Asserter.assert_equals(tiered.get("missing"), None)
+    Asserter.assert_equals(tiered.get("key"), "value")
+    Asserter.assert_equals(tiered.get("key"), "value")
+    Asserter.assert_equals(
+        tiered.stats.to_dict(),
+        {"l1_hits": 1, "l1_misses": 2, "l2_hits": 1, "l2_misses": 1},
+    )
+
+
+def test_tiered_cache_invalidation():
+    invalidator = LocalInvalidator()
+    backend = SimpleCache()
+    worker_1 = TieredCache(backend, invalidator=invalidator)
+    worker_2 = TieredCache(backend, invalidator=invalidator)
+
+    worker_1.set("key", "value")
+    Asserter.assert_equals(worker_2.get("key"), "value")
+    Asserter.assert_true("key" in worker_2.local)
+
+    worker_1.delete("key")
+    Asserter.assert_false("key" in worker_2.local)
+    Asserter.assert_equals(worker_2.get("key"), None)
+
+    worker_1.set("key", "value")
+    worker_2.get("key")
+    worker_1.clear()
+    Asserter.assert_equals(len(worker_2.local), 0)
+
+
+def test_redis_invalidator():
+    client = MagicMock()
+    callback = MagicMock()
+    invalidator = RedisInvalidator(client=client, channel="channel")
+    invalidator.subscribe(callback)
+
+    invalidator.publish("key")
+    invalidator.publish(None)
+    client.publish.assert_any_call("channel", "del:key")
+    client.publish.assert_any_call("channel", "clear")
+
+    invalidator.on_message({"data": b"del:key"})
+    invalidator.on_message({"data": "clear"})
+    callback.assert_any_call("key")
+    callback.assert_any_call(None)
+
+
+def test_caching_l1_enabled(flaskel_app):
+    flaskel_app.config.update(
+        CACHE_TYPE="SimpleCache", CACHE_L1_ENABLED=True, CACHE_L1_MAX_BYTES=1024
+    )
+    cache = Caching(flaskel_app)
+
+    with flaskel_app.app_context():
+        Asserter.assert_true(isinstance(cache.cache, TieredCache))
+        Asserter.assert_equals(cache.cache.local.max_bytes, 1024)
+        cache.set("key", "value")
+        Asserter.assert_equals(cache.get("key"), "value")
+        Asserter.assert_equals(cache.stats.l1_hits, 1)
+
+
+def test_key_locks():
+    locks = KeyLocks()
+    with locks.acquire("key", timeout=1) as acquired:
+        Asserter.assert_true(acquired)
+        with locks.acquire("key", timeout=0.01) as acquired_again:
+            Asserter.assert_false(acquired_again)
+        with locks.acquire("other", timeout=0.01) as acquired_other:
+            Asserter.assert_true(acquired_other)
+    Asserter.assert_equals(locks._locks, {})  # pylint: disable=protected-access
+
+
+def test_redis_key_locks():
+    client = MagicMock()
+    client.lock.return_value.acquire.return_value = True
+    locks = RedisKeyLocks(client=client, lock_ttl=10)
+
+    with locks.acquire("key", timeout=1) as acquired:
+        Asserter.assert_true(acquired)
+
+    Asserter.assert_equals(client.lock.call_args.args, ("key/lock",))
+    client.lock.return_value.release.assert_called_once()
+
+
+def test_cached_single_flight(flaskel_app):
+    calls = []
+    flaskel_app.config.update(
+        CACHE_TYPE="SimpleCache", CACHE_SINGLE_FLIGHT=True, CACHE_STALE_TIMEOUT=10
+    )
+    cache = Caching(flaskel_app)
+
+    @flaskel_app.get("/single-flight")
+    @cache.cached()
+    def view():
+        calls.append(1)
+        time.sleep(0.2)
+        return flaskel.Response("done")
+
+    def fetch():
+        with flaskel_app.test_client() as client:
+            return client.get("/single-flight").data
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: fetch(), range(5)))
+
+    Asserter.assert_equals(len(calls), 1)
+    Asserter.assert_equals(set(responses), {b"done"})
+    with flaskel_app.test_request_context("/single-flight"):
+        key = cache.make_cache_key()
+        Asserter.assert_not_none(cache.get(cache.miss_handler.stale_key(key)))
+
+
+def test_cached_single_flight_slow_store(flaskel_app):
+    calls = []
+    flaskel_app.config.update(CACHE_TYPE="SimpleCache", CACHE_SINGLE_FLIGHT=True)
+    cache = Caching(flaskel_app)
+    with flaskel_app.app_context():
+        backend = cache.cache
+    cache_set = backend.set
+
+    def slow_set(*args, **kwargs):
+        time.sleep(0.1)  # widens the window between lock release and store
+        return cache_set(*args, **kwargs)
+
+    @flaskel_app.get("/single-flight-slow")
+    @cache.cached()
+    def view():
+        calls.append(1)
+        time.sleep(0.2)
+        return flaskel.Response("done")
+
+    def fetch():
+        with flaskel_app.test_client() as client:
+            return client.get("/single-flight-slow").data
+
+    with patch.object(backend, "set", side_effect=slow_set):
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(lambda _: fetch(), range(5)))
+
+    Asserter.assert_equals(len(calls), 1)
+    Asserter.assert_equals(set(responses), {b"done"})
+
+
+def expire_entry(app, cache, url):
+    """simulates the soft ttl expiration: the stale copy is still there"""
+    with app.test_request_context(url):
+        key = cache.make_cache_key()
+        cache.delete(key)
+        Asserter.assert_not_none(cache.get(cache.miss_handler.stale_key(key)))
+
+
+def test_cached_stale_while_revalidate(flaskel_app):
+    calls = []
+    flaskel_app.config.update(
+        CACHE_TYPE="SimpleCache", CACHE_STALE_TIMEOUT=10, CACHE_REFRESH_WORKERS=1
+    )
+    cache = Caching(flaskel_app)
+
+    @flaskel_app.get("/swr")
+    @cache.cached()
+    def view():
+        calls.append(1)
+        return flaskel.Response(f"value-{len(calls)}")
+
+    client = flaskel_app.test_client()
+    Asserter.assert_equals(client.get("/swr").data, b"value-1")
+
+    expire_entry(flaskel_app, cache, "/swr")
+    Asserter.assert_equals(client.get("/swr").data, b"value-1")
+    cache.miss_handler.executor.submit(
+        lambda: None
+    ).result()  # waits background refresh
+    Asserter.assert_equals(len(calls), 2)
+    Asserter.assert_equals(client.get("/swr").data, b"value-2")
+
+
+@pytest.mark.parametrize(
+    "failure",
+    [
+        lambda: flaskel.Response(status=httpcode.SERVICE_UNAVAILABLE),
+        lambda: 1 / 0,
+    ],
+    ids=["server-error", "exception"],
+)
+def test_cached_stale_if_error(flaskel_app, failure):
+    calls = []
+    flaskel_app.config.update(CACHE_TYPE="SimpleCache", CACHE_STALE_TIMEOUT=10)
+    cache = Caching(flaskel_app)
+
+    @flaskel_app.get("/sie")
+    @cache.cached(stale_while_revalidate=False)
+    def view():
+        if calls:
+            return failure()
+        calls.append(1)
+        return flaskel.Response("value")
+
+    client = flaskel_app.test_client()
+    Asserter.assert_equals(client.get("/sie").data, b"value")
+
+    expire_entry(flaskel_app, cache, "/sie")
+    response = client.get("/sie")
+    Asserter.assert_status_code(response, httpcode.SUCCESS)
+    Asserter.assert_equals(response.data, b"value")
+
+
+def test_cached_conditional_request(flaskel_app):
+    flaskel_app.config.update(CACHE_TYPE="SimpleCache", CACHE_ETAG_ENABLED=True)
+    cache = Caching(flaskel_app)
+    unless = MagicMock(return_value=False)
+    content = ["value"]
+
+    @flaskel_app.get("/etag")
+    @cache.cached(unless=unless)
+    def view():
+        return flaskel.Response(content[0])
+
+    client = flaskel_app.test_client()
+    response = client.get("/etag")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+    Asserter.assert_not_none(last_modified)
+
+    with flaskel_app.app_context():
+        backend = cache.cache
+
+    with patch.object(backend, "get", wraps=backend.get) as mock_get:
+        response = client.get("/etag", headers={"If-None-Match": etag})
+        Asserter.assert_status_code(response, httpcode.NOT_MODIFIED)
+        Asserter.assert_equals(response.headers["ETag"], etag)
+        # only validators are loaded
+        Asserter.assert_equals(mock_get.call_count, 1)
+        Asserter.assert_true(mock_get.call_args.args[0].endswith("/meta"))
+
+    response = client.get("/etag", headers={"If-Modified-Since": last_modified})
+    Asserter.assert_status_code(response, httpcode.NOT_MODIFIED)
+
+    response = client.get("/etag", headers={"If-None-Match": '"other"'})
+    Asserter.assert_status_code(response, httpcode.SUCCESS)
+    Asserter.assert_equals(response.data, b"value")
+    Asserter.assert_equals(unless.call_count, 4)  # once per request
+
+    # validators are not used once the entry is deleted
+    content[0] = "changed"
+    with flaskel_app.test_request_context("/etag"):
+        cache.delete(cache.make_cache_key())
+    response = client.get("/etag", headers={"If-None-Match": etag})
+    Asserter.assert_status_code(response, httpcode.SUCCESS)
+    Asserter.assert_equals(response.data, b"changed")
+
+
+def test_local_tag_index():
+    index = LocalTagIndex()
+    index.add(["a", "b"], "key1", timeout=10)
+    index.add(["b"], "key2", timeout=10)
+    index.add(["b"], "expired", timeout=0.01)
+    time.sleep(0.02)
+    index.add(["b"], "key3")
+
+    Asserter.assert_equals(index.pop(["b"]), {"key1", "key2", "key3"})
+    Asserter.assert_equals(index.pop(["b"]), set())
+    Asserter.assert_equals(index.pop(["a", "c"]), {"key1"})
+
+
+def test_redis_tag_index():
+    client = MagicMock()
+    pipe = client.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [{b"key1", b"key2"}, 2]
+    index = RedisTagIndex(client=client, prefix="tag/")
+
+    index.add(["a"], "key1", timeout=10)
+    pipe.sadd.assert_called_once_with("tag/a", "key1")
+    pipe.expire.assert_any_call("tag/a", 10, gt=True)
+    pipe.expire.assert_any_call("tag/a", 10, nx=True)
+
+    Asserter.assert_equals(index.pop(["a", "b"]), {"key1", "key2"})
+    pipe.sunion.assert_called_once_with(["tag/a", "tag/b"])
+    pipe.delete.assert_called_once_with("tag/a", "tag/b")
+
+
+def test_resolve_tags(flaskel_app):
+    with flaskel_app.test_request_context():
+        Asserter.assert_equals(
+            resolve_tags(["model:item", "model:item:{res_id}"], res_id=1),
+            ["model:item", "model:item:1"],
+        )
+        Asserter.assert_equals(
+            resolve_tags(["model:item", "model:item:{res_id}"]),
+            ["model:item"],
+        )
+        Asserter.assert_equals(
+            resolve_tags(model_tags("item"), res_id=1),
+            ["model:item:1"],
+        )
+
+
+def test_cached_tags_invalidation(flaskel_app):
+    calls = []
+    flaskel_app.config.update(CACHE_TYPE="SimpleCache", CACHE_STALE_TIMEOUT=10)
+    cache = Caching(flaskel_app)
+
+    @flaskel_app.get("/items")
+    @flaskel_app.get("/items/<int:res_id>")
+    @cache.cached(tags=model_tags("item"))
+    def view(res_id=None):
+        calls.append(res_id)
+        return flaskel.Response(f"item {res_id}")
+
+    client = flaskel_app.test_client()
+    for _ in range(2):
+        client.get("/items")
+        client.get("/items/1")
+        client.get("/items/2")
+    Asserter.assert_equals(calls, [None, 1, 2])
+
+    with flaskel_app.app_context():
+        Asserter.assert_equals(cache.invalidate_tags("model:item", "model:item:1"), 2)
+        Asserter.assert_equals(cache.invalidate_tags("model:item"), 0)
+
+    client.get("/items")
+    client.get("/items/1")
+    client.get("/items/2")
+    Asserter.assert_equals(calls, [None, 1, 2, None, 1])
+
+
+def test_encoded_cache_threshold(flaskel_app):
+    cache = EncodedCache(SimpleCache(), GzipCodec(), min_size=100)
+    with flaskel_app.test_request_context():
+        cache.set("small", flaskel.Response("a" * 10))
+        cache.set("large", flaskel.Response("a" * 1000))
+        cache.set("plain", {"a": 1})
+
+    stored = cache.backend.get("small")
+    Asserter.assert_true(isinstance(stored, CachedResponse))
+    Asserter.assert_none(stored.encoding)
+    Asserter.assert_equals(cache.backend.get("large").encoding, "gzip")
+    Asserter.assert_equals(cache.get("plain"), {"a": 1})
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, content_encoding, body",
+    [
+        ("gzip, br", "gzip", None),
+        ("br", None, b"a" * 1000),
+        ("", None, b"a" * 1000),
+    ],
+    ids=["accepted", "not-accepted", "missing"],
+)
+def test_encoded_cache_decode(flaskel_app, accept_encoding, content_encoding, body):
+    cache = EncodedCache(SimpleCache(), GzipCodec(), min_size=100)
+    response = flaskel.Response("a" * 1000)
+    response.add_etag()
+    cache.set("key", response)
+
+    headers = {"Accept-Encoding": accept_encoding}
+    with flaskel_app.test_request_context(headers=headers):
+        response = cache.get("key")
+
+    Asserter.assert_equals(response.headers.get("Content-Encoding"), content_encoding)
+    Asserter.assert_true("Accept-Encoding" in response.vary)
+    Asserter.assert_equals(response.get_etag()[1], content_encoding is not None)
+    if body is not None:
+        Asserter.assert_equals(response.get_data(), body)
+    else:
+        Asserter.assert_equals(response.get_data(), cache.backend.get("key").body)
+
+
+def test_cached_encoded(flaskel_app):
+    flaskel_app.config.update(CACHE_TYPE="SimpleCache", CACHE_CODEC="gzip")
+    cache = Caching(flaskel_app)
+
+    @flaskel_app.get("/encoded")
+    @cache.cached()
+    def view():
+        return flaskel.Response("a" * 2000, mimetype="text/plain")
+
+    with flaskel_app.app_context():
+        Asserter.assert_true(isinstance(cache.cache, EncodedCache))
+
+    client = flaskel_app.test_client()
+    client.get("/encoded")
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    Asserter.assert_status_code(response, httpcode.SUCCESS)
+    Asserter.assert_equals(response.headers["Content-Encoding"], "gzip")
+    Asserter.assert_equals(
+        response.headers["Content-Type"], "text/plain; charset=utf-8"
+    )
+    Asserter.assert_equals(GzipCodec().decompress(response.data), b"a" * 2000)
+
+    response = client.get("/encoded")
+    Asserter.assert_equals(response.data, b"a" * 2000)
+
+
+def test_identity_codec():
+    codec = IdentityCodec()
+    Asserter.assert_equals(codec.decompress(codec.compress(b"data")), b"data")
@@ -1,10 +1,20 @@
+import time
 from ipaddress import IPv4Address
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import pytest
 from vbcore.http import httpcode
 from vbcore.tester.asserter import Asserter
 
-from flaskel.ext.ipban import BanRepoLocal, BanRepoRedis, ipban, IpBanService
+from flaskel.ext.ipban import (
+    BanRepoLocal,
+    BanRepoRedis,
+    BanRepoSQLite,
+    ipban,
+    IpBanService,
+    SlidingWindowScoring,
+    TokenBucketScoring,
+)
 
 
 def test_ipban_init(flaskel_app):
@@ -79,3 +89,234 @@ def test_repo_redis():
     Asserter.assert_equals(repo.ban(ip, ttl=100), 3)
     mock_pipeline.incr.assert_called_once_with(cache_key)
     mock_pipeline.expire.assert_called_once_with(cache_key, 100)
+
+
+def test_ban_service_networks(tmp_path):
+    sources = tmp_path / "networks.txt"
+    sources.write_text("# office\n10.0.0.0/8\n\n2001:db8::/32  # vpn\n")
+    service = IpBanService(BanRepoLocal, key_prefix="TEST", max_attempts=1)
+
+    service.load_whitelist(net=("192.168.0.0/16",), sources=(str(sources),))
+    Asserter.assert_true(service.is_whitelisted("10.1.2.3"))
+    Asserter.assert_true(service.is_whitelisted("2001:db8::1"))
+    Asserter.assert_true(service.is_whitelisted("192.168.10.1"))
+    Asserter.assert_false(service.is_whitelisted("11.1.2.3"))
+
+    service.reload_whitelist(ip=("11.1.2.3",))
+    Asserter.assert_true(service.is_whitelisted("11.1.2.3"))
+    Asserter.assert_false(service.is_whitelisted("10.1.2.3"))
+
+    service.load_blacklist(net=("172.16.0.0/12",))
+    Asserter.assert_true(service.is_banned("172.20.0.1"))
+    Asserter.assert_none(service.ban("172.20.0.1"))
+    Asserter.assert_false(service.is_banned("172.32.0.1"))
+
+
+def test_ban_service_single_round_trip():
+    client_redis = MagicMock()
+    client_redis.mget.return_value = ["2", None]
+    service = IpBanService(
+        BanRepoRedis, key_prefix="TEST", max_attempts=3, client=client_redis
+    )
+
+    Asserter.assert_false(service.is_banned("10.0.0.1"))
+    client_redis.mget.assert_called_once_with(
+        ["TEST/10.0.0.1", "TEST/blacklist/10.0.0.1"]
+    )
+    client_redis.get.assert_not_called()
+
+    client_redis.mget.return_value = [None, "1"]
+    Asserter.assert_true(service.is_banned("10.0.0.1"))
+
+
+def test_ban_service_clean_cache():
+    service = IpBanService(
+        BanRepoLocal, key_prefix="TEST", max_attempts=2, clean_ttl=60
+    )
+    service.repo.attempts_many = MagicMock(wraps=service.repo.attempts_many)
+
+    Asserter.assert_false(service.is_banned("10.0.0.1"))
+    Asserter.assert_false(service.is_banned("10.0.0.1"))
+    Asserter.assert_equals(service.repo.attempts_many.call_count, 1)
+
+    service.ban("10.0.0.1")
+    service.ban("10.0.0.1")
+    Asserter.assert_true(service.is_banned("10.0.0.1"))
+
+
+def test_repo_redis_batched():
+    ip = "10.0.0.1"
+    cache_key = f"TEST/{ip}"
+    client_redis = MagicMock()
+    client_redis.get.return_value = "1"
+    repo = BanRepoRedis(client_redis, key_prefix="TEST", flush_interval=60)
+    repo.start_flusher = MagicMock()
+
+    Asserter.assert_equals(repo.ban(ip, ttl=100), 1)
+    Asserter.assert_equals(repo.ban(ip, ttl=100), 2)
+    Asserter.assert_equals(repo.attempts(ip), 3)
+    client_redis.pipeline.assert_not_called()
+
+    repo.flush()
+    pipe = client_redis.pipeline.return_value
+    pipe.incrby.assert_called_once_with(cache_key, 2)
+    pipe.expire.assert_called_once_with(cache_key, 100)
+    pipe.execute.assert_called_once()
+    Asserter.assert_equals(repo.attempts(ip), 1)
+
+    repo.flush()
+    pipe.execute.assert_called_once()
+
+
+def test_repo_redis_batched_flush_error():
+    ip = "10.0.0.1"
+    client_redis = MagicMock()
+    client_redis.get.return_value = None
+    pipe = client_redis.pipeline.return_value
+    pipe.execute.side_effect = ConnectionError
+    repo = BanRepoRedis(client_redis, key_prefix="TEST", flush_interval=60)
+    repo.start_flusher = MagicMock()
+
+    repo.ban(ip, ttl=100)
+    repo.ban(ip, ttl=100)
+    with pytest.raises(ConnectionError):
+        repo.flush()
+    Asserter.assert_equals(repo.attempts(ip), 2)
+
+    repo.ban(ip, ttl=200)
+    pipe.execute.side_effect = None
+    repo.flush()
+    pipe.incrby.assert_called_with(f"TEST/{ip}", 3)
+    pipe.expire.assert_called_with(f"TEST/{ip}", 200)
+    Asserter.assert_equals(repo.attempts(ip), 0)
+
+
+def test_sliding_window_scoring():
+    scoring = SlidingWindowScoring()
+    state, score = scoring.hit(None, now=0, ttl=10)
+    state, score = scoring.hit(state, now=5, ttl=10)
+    Asserter.assert_equals(score, 2)
+    Asserter.assert_equals(scoring.score(state, now=9), 2)
+    Asserter.assert_equals(scoring.score(state, now=12), 1)
+
+    state, score = scoring.hit(state, now=20, ttl=10)
+    Asserter.assert_equals((state, score), ([30], 1))
+    state, _ = scoring.hit(state, now=20, ttl=None)
+    Asserter.assert_equals(scoring.score(state, now=10**9), 1)
+
+
+def test_token_bucket_scoring():
+    scoring = TokenBucketScoring(rate=0.5)
+    state = None
+    for _ in range(4):
+        state, score = scoring.hit(state, now=0)
+    Asserter.assert_equals(score, 4)
+    Asserter.assert_equals(scoring.score(state, now=2), 3)
+    Asserter.assert_equals(scoring.score(state, now=100), 0)
+
+    state, score = scoring.hit(state, now=4)
+    Asserter.assert_equals(score, 3)
+
+
+@pytest.mark.parametrize("scoring", [SlidingWindowScoring(), TokenBucketScoring()])
+def test_ban_service_scoring_local(scoring):
+    service = IpBanService(
+        BanRepoLocal,
+        key_prefix="TEST",
+        max_attempts=2,
+        default_ttl=60,
+        scoring=scoring,
+    )
+    service.add_blacklist("10.0.0.2")
+
+    Asserter.assert_none(service.black_list.scoring)
+    Asserter.assert_equals(service.ban("10.0.0.1"), 1)
+    Asserter.assert_false(service.is_banned("10.0.0.1"))
+    Asserter.assert_equals(service.ban("10.0.0.1"), 2)
+    Asserter.assert_true(service.is_banned("10.0.0.1"))
+    Asserter.assert_true(service.is_banned("10.0.0.2"))
+
+
+def test_repo_redis_scoring():
+    client_redis = MagicMock()
+    hit_script, score_script = MagicMock(), MagicMock()
+    client_redis.register_script.side_effect = [hit_script, score_script]
+    repo = BanRepoRedis(
+        client_redis, key_prefix="TEST", scoring=TokenBucketScoring(rate=2)
+    )
+    hit_script.return_value = 3
+
+    Asserter.assert_equals(repo.ban("10.0.0.1", ttl=10), 3)
+    hit_script.assert_called_once_with(keys=["TEST/10.0.0.1"], args=[2])
+    client_redis.pipeline.assert_not_called()
+
+    pipe = client_redis.pipeline.return_value
+    pipe.execute.return_value = [1, None]
+    black_list = BanRepoRedis(client_redis, key_prefix="TEST/blacklist")
+    Asserter.assert_equals(repo.attempts_many("10.0.0.1", black_list), [1, 0])
+    score_script.assert_called_once_with(keys=["TEST/10.0.0.1"], args=[2], client=pipe)
+    pipe.get.assert_called_once_with("TEST/blacklist/10.0.0.1")
+    client_redis.mget.assert_not_called()
+
+
+@pytest.mark.parametrize("scoring", [SlidingWindowScoring(), TokenBucketScoring()])
+def test_repo_redis_scoring_lua(scoring):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client_redis = fakeredis.FakeRedis()
+    repo = BanRepoRedis(client_redis, key_prefix="TEST", scoring=scoring)
+
+    Asserter.assert_equals([repo.ban("10.0.0.1", ttl=60) for _ in range(3)], [1, 2, 3])
+    Asserter.assert_equals(repo.attempts("10.0.0.1"), 3)
+    Asserter.assert_equals(repo.attempts("10.0.0.2"), 0)
+    Asserter.assert_true(client_redis.pttl("TEST/10.0.0.1") > 0)
+
+
+def test_repo_sqlite_shared(tmp_path):
+    path = str(tmp_path / "ipban.db")
+    worker_1 = IpBanService(BanRepoSQLite, key_prefix="TEST", max_attempts=2, path=path)
+    worker_2 = IpBanService(BanRepoSQLite, key_prefix="TEST", max_attempts=2, path=path)
+
+    Asserter.assert_equals(worker_1.ban("10.0.0.1", ttl=60), 1)
+    Asserter.assert_equals(worker_2.ban("10.0.0.1", ttl=60), 2)
+    Asserter.assert_true(worker_1.is_banned("10.0.0.1"))
+    Asserter.assert_false(worker_2.is_banned("2001:db8::1"))
+
+    worker_2.add_blacklist("10.0.0.2")
+    Asserter.assert_true(worker_1.is_banned("10.0.0.2"))
+
+    worker_1.repo.unban("10.0.0.1")
+    Asserter.assert_false(worker_2.is_banned("10.0.0.1"))
+
+    worker_1.ban("10.0.0.3", ttl=60)
+    with patch("time.time", return_value=time.time() + 3600):
+        Asserter.assert_equals(worker_2.repo.attempts("10.0.0.3"), 0)
+        worker_2.ban("10.0.0.4", ttl=60)  # removes the expired entries
+    rows = worker_2.repo.conn.execute("SELECT count(*) FROM bans").fetchone()
+    Asserter.assert_equals(rows[0], 2)  # the blacklist and the new attempt
+
+
+def test_repo_sqlite_reboot(tmp_path):
+    path = str(tmp_path / "ipban.db")
+    repo = BanRepoSQLite(path=path, key_prefix="TEST")
+    repo.ban("10.0.0.1", ttl=60)
+    repo.ban("10.0.0.2")
+
+    # the monotonic clock restarts at boot, deadlines do not depend on it
+    with patch("time.monotonic", return_value=0):
+        rebooted = BanRepoSQLite(path=path, key_prefix="TEST")
+        Asserter.assert_equals(rebooted.attempts("10.0.0.1"), 1)
+        Asserter.assert_equals(rebooted.attempts("10.0.0.2"), 1)
+        with patch("time.time", return_value=time.time() + 61):
+            Asserter.assert_equals(rebooted.attempts("10.0.0.1"), 0)
+            Asserter.assert_equals(rebooted.attempts("10.0.0.2"), 1)
+
+
+@pytest.mark.parametrize("scoring", [SlidingWindowScoring(), TokenBucketScoring()])
+def test_repo_sqlite_scoring(tmp_path, scoring):
+    path = str(tmp_path / "ipban.db")
+    repo = BanRepoSQLite(path=path, key_prefix="TEST", scoring=scoring)
+
+    Asserter.assert_equals([repo.ban("10.0.0.1", ttl=60) for _ in range(3)], [1, 2, 3])
+    Asserter.assert_equals(repo.attempts("10.0.0.1"), 3)
+    Asserter.assert_equals(repo.attempts("10.0.0.2"), 0)
@@ -1,9 +1,14 @@
+import gzip
+import json
+import zlib
+
 import pytest
 from vbcore import uuid
 from vbcore.datastruct import ObjectDict
 from vbcore.tester.asserter import Asserter
 
 from flaskel import middlewares
+from flaskel.utils.compression import negotiate_encoding
 
 
 def test_base(flaskel_app, mock_wsgi_app):
@@ -72,3 +77,48 @@ def test_request_id_prefixed(flaskel_app, mock_wsgi_app):
     environ = {"HTTP_X_REQUEST_ID": "PREFIX_123456"}
     Asserter.assert_true(callable(middle(environ, mock_wsgi_app)))
     Asserter.assert_true(isinstance(environ["HTTP_X_REQUEST_ID"], str))
+
+
+def test_compress_gzip(compress_client):
+    res = compress_client.get("/json", headers={"Accept-Encoding": "gzip, deflate"})
+    Asserter.assert_equals(res.headers["Content-Encoding"], "gzip")
+    Asserter.assert_equals(int(res.headers["Content-Length"]), len(res.data))
+    Asserter.assert_in("Accept-Encoding", res.vary)
+    Asserter.assert_equals(len(json.loads(gzip.decompress(res.data))), 100)
+
+
+def test_compress_not_accepted(compress_client):
+    res = compress_client.get("/json", headers={"Accept-Encoding": "gzip;q=0"})
+    Asserter.assert_not_in("Content-Encoding", res.headers)
+    Asserter.assert_in("Accept-Encoding", res.vary)
+    Asserter.assert_equals(len(res.json), 100)
+
+
+@pytest.mark.parametrize("url", ["/small", "/image", "/encoded"])
+def test_compress_skipped(compress_client, url):
+    res = compress_client.get(url, headers={"Accept-Encoding": "gzip"})
+    Asserter.assert_not_in("Accept-Encoding", res.vary)
+    Asserter.assert_equals(int(res.headers["Content-Length"]), len(res.data))
+
+
+def test_compress_stream(compress_client):
+    with compress_client.get("/stream", headers={"Accept-Encoding": "gzip"}) as res:
+        Asserter.assert_equals(res.headers["Content-Encoding"], "gzip")
+        Asserter.assert_not_in("Content-Length", res.headers)
+        chunks = list(res.response)
+
+    Asserter.assert_greater(len(chunks), 1)
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # every flushed chunk can be decoded without waiting for the next one
+    Asserter.assert_equals(decompressor.decompress(chunks[0]), b"line-0\n")
+    data = b"".join(decompressor.decompress(c) for c in chunks[1:])
+    Asserter.assert_equals(len(data.splitlines()), 999)
+
+
+def test_negotiate_encoding():
+    candidates = ("br", "zstd", "gzip")
+    Asserter.assert_equals(negotiate_encoding("gzip, br", candidates), "br")
+    Asserter.assert_equals(negotiate_encoding("gzip, br;q=0.5", candidates), "gzip")
+    Asserter.assert_equals(negotiate_encoding("*;q=0.1", candidates), "br")
+    Asserter.assert_equals(negotiate_encoding("identity", candidates), None)
+    Asserter.assert_equals(negotiate_encoding(None, candidates), None)
@@ -0,0 +1,9 @@
+import pytest
+
+from flaskel.utils.jsonengine import get_engine
+
+
+@pytest.fixture
+def orjson_engine():
+    pytest.importorskip("orjson")
+    return get_engine("orjson")
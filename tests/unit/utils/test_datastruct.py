@@ -1,7 +1,7 @@
 import pytest
 from vbcore.tester.asserter import Asserter
 
-from flaskel.utils.datastruct import Pagination
+from flaskel.utils.datastruct import BloomFilter, Pagination
 
 
 @pytest.mark.parametrize(
@@ -57,3 +57,13 @@ def test_pagination_is_paginated(pagination, total, expected):
 )
 def test_pagination_offset(pagination, expected):
     Asserter.assert_equals(pagination.offset(), expected)
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(f"item-{i}" for i in range(1000))
+
+    Asserter.assert_equals(len(bloom), 1000)
+    Asserter.assert_true(all(f"item-{i}" in bloom for i in range(1000)))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    Asserter.assert_true(false_positives < 300)
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from vbcore.tester.asserter import Asserter
+
+from flaskel.utils.eventloop import EventLoopThread
+
+request_id: contextvars.ContextVar = contextvars.ContextVar("request_id")
+
+
+async def echo(value):
+    await asyncio.sleep(0.01)
+    return value, request_id.get(None), threading.current_thread().name
+
+
+def test_event_loop_thread():
+    event_loop = EventLoopThread(name="test-loop")
+
+    def call(value):
+        request_id.set(value)
+        return event_loop.run(echo(value))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(call, range(32)))
+
+    # coroutines of every thread run on the same loop, with the caller context
+    Asserter.assert_equals(results, [(i, i, "test-loop") for i in range(32)])
+    event_loop.stop()
+
+
+def test_event_loop_thread_deadlock():
+    event_loop = EventLoopThread()
+
+    async def nested():
+        return event_loop.run(echo(1))
+
+    with pytest.raises(RuntimeError):
+        event_loop.run(nested())
+    event_loop.stop()
@@ -0,0 +1,80 @@
+import dataclasses
+import datetime
+import enum
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from vbcore.base import BaseDTO
+from vbcore.datastruct import ObjectDict
+from vbcore.tester.asserter import Asserter
+
+from flaskel.utils.jsonengine import get_engine, OrjsonEngine, StdlibEngine
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+@dataclasses.dataclass
+class Item(BaseDTO):
+    name: str
+    price: Decimal
+
+
+PAYLOAD = {
+    "date": datetime.date(2022, 1, 2),
+    "datetime": datetime.datetime(2022, 1, 2, 3, 4, 5, 600),
+    "aware": datetime.datetime(2022, 1, 2, tzinfo=datetime.timezone.utc),
+    "time": datetime.time(1, 2, 3),
+    "delta": datetime.timedelta(seconds=90),
+    "decimal": Decimal("1.5"),
+    "enum": Color.RED,
+    "set": {1},
+    "bytes": b"bytes",
+    "object_dict": ObjectDict(a=ObjectDict(b=[1, 2])),
+    "dto": Item(name="item", price=Decimal("2.5")),
+    1: "int key",
+}
+
+
+def test_get_engine(orjson_engine):
+    Asserter.assert_true(isinstance(orjson_engine, OrjsonEngine))
+    Asserter.assert_true(isinstance(get_engine("auto"), OrjsonEngine))
+    Asserter.assert_true(isinstance(get_engine(None), StdlibEngine))
+    Asserter.assert_true(isinstance(get_engine("stdlib"), StdlibEngine))
+    Asserter.assert_true(isinstance(get_engine("unknown"), StdlibEngine))
+
+
+def test_get_engine_orjson_missing():
+    with patch("flaskel.utils.jsonengine.orjson", None):
+        with pytest.raises(ImportError):
+            get_engine("orjson")
+
+
+def test_orjson_dumps_equivalence(orjson_engine):
+    stdlib = get_engine("stdlib")
+    expected = stdlib.loads(stdlib.dumps(PAYLOAD))
+    Asserter.assert_equals(orjson_engine.loads(orjson_engine.dumpb(PAYLOAD)), expected)
+    Asserter.assert_true(isinstance(orjson_engine.dumpb(PAYLOAD), bytes))
+
+
+def test_orjson_uuid_canonical(orjson_engine):
+    value = uuid.uuid4()
+    Asserter.assert_equals(orjson_engine.dumps(value), f'"{value}"')
+
+
+def test_orjson_loads_hooks(orjson_engine):
+    data = '{"date": "2022-01-02T03:04:05", "nested": [{"id": {"$oid": "x"}}]}'
+    Asserter.assert_equals(orjson_engine.loads(data), get_engine("stdlib").loads(data))
+
+
+def test_orjson_fallback(orjson_engine):
+    big = {"value": 2**70}
+    Asserter.assert_equals(
+        orjson_engine.dumps(big), '{"value": 1180591620717411303424}'
+    )
+    Asserter.assert_equals(orjson_engine.dumps([1], indent=None, default=str), "[1]")
+    with pytest.raises(TypeError):
+        orjson_engine.dumps(object())
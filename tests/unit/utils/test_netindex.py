@@ -0,0 +1,34 @@
+import ipaddress
+
+import pytest
+from vbcore.tester.asserter import Asserter
+
+from flaskel.utils.netindex import NetworkIndex
+
+
+def test_network_index_longest_prefix():
+    index = NetworkIndex(
+        [
+            ("10.0.0.0/8", "wide"),
+            ("10.1.0.0/16", "narrow"),
+            ("10.1.2.3", "host"),
+            ("2001:db8::/32", "v6"),
+        ]
+    )
+
+    Asserter.assert_equals(len(index), 4)
+    Asserter.assert_equals(index.lookup("10.2.0.1")[1], "wide")
+    Asserter.assert_equals(index.lookup("10.1.0.1")[1], "narrow")
+    Asserter.assert_equals(index.lookup("10.1.2.3")[1], "host")
+    Asserter.assert_equals(
+        index.lookup("10.1.9.9")[0], ipaddress.ip_network("10.1.0.0/16")
+    )
+    Asserter.assert_equals(index.lookup("2001:db8:1::1")[1], "v6")
+    Asserter.assert_equals(index.lookup("::ffff:10.2.0.1")[1], "wide")
+    Asserter.assert_none(index.lookup("11.0.0.1"))
+    Asserter.assert_none(index.lookup("2001:db9::1"))
+    Asserter.assert_true(ipaddress.ip_address("10.0.0.1") in index)
+    Asserter.assert_false("::1" in NetworkIndex())
+
+    with pytest.raises(ValueError):
+        index.lookup("not an ip")
@@ -1,12 +1,15 @@
 from collections import deque
 
+import flask
 import pytest
 from vbcore.datastruct import ObjectDict
 from vbcore.jsonschema.support import Fields
 from vbcore.tester.asserter import Asserter
+from werkzeug.exceptions import BadRequest
 
 from flaskel import PayloadValidator
 from flaskel.http.exceptions import InternalServerError, UnprocessableEntity
+from flaskel.utils.binary import get_format
 from flaskel.utils.schemas.default import SCHEMAS
 
 
@@ -55,3 +58,20 @@ def test_payload_validator_error(flaskel_app):
             PayloadValidator.validate(schema)
 
     Asserter.assert_none(error.value.response)
+
+
+@pytest.mark.parametrize("mimetype", ["application/msgpack", "application/cbor"])
+def test_payload_validator_binary(flaskel_app, mimetype):
+    binary_format = get_format(mimetype)
+    if binary_format is None:
+        pytest.skip(f"missing codec for {mimetype}")
+
+    payload = {"a": 1}
+    schema = Fields.object(properties={"a": Fields.integer})
+    data = binary_format.dumps(payload)
+    with flaskel_app.test_request_context(data=data, content_type=mimetype):
+        Asserter.assert_equals(PayloadValidator.validate(schema), ObjectDict(a=1))
+
+    with pytest.raises(BadRequest):
+        with flaskel_app.test_request_context(data=b"\xc1\xff", content_type=mimetype):
+            flask.request.get_json()
@@ -0,0 +1,77 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from vbcore.tester.asserter import Asserter
+
+from flaskel import Flaskel
+
+
+def test_run():
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("a2wsgi")
+    # pylint: disable=import-outside-toplevel
+    from flaskel.wsgi.wsgi_uvicorn import WSGIUvicorn
+
+    app = Flaskel(__name__)
+    options = {"bind": "0.0.0.0:8080", "threads": "4"}
+    server = WSGIUvicorn(app=app, options=options)
+
+    with (
+        patch("flaskel.wsgi.wsgi_uvicorn.uvicorn") as mock_uvicorn,
+        patch("flaskel.wsgi.wsgi_uvicorn.WSGIMiddleware") as mock_middleware,
+    ):
+        server.run()
+
+    mock_middleware.assert_called_once_with(app, workers=4)
+    mock_uvicorn.run.assert_called_once_with(
+        mock_middleware.return_value,
+        host="0.0.0.0",
+        port=8080,
+        interface="asgi3",
+        lifespan="off",
+    )
+
+
+def test_asgi_request():
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("a2wsgi")
+    # pylint: disable=import-outside-toplevel
+    from flaskel.wsgi.wsgi_uvicorn import WSGIUvicorn
+
+    app = Flaskel(__name__)
+
+    @app.get("/hello")
+    async def hello():
+        await asyncio.sleep(0)
+        return "hello"
+
+    server = WSGIUvicorn(app=app, options={"bind": "127.0.0.1:8080", "threads": 1})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/hello",
+        "raw_path": b"/hello",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("127.0.0.1", 8080),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(server.asgi_application()(scope, receive, send))
+
+    Asserter.assert_equals(messages[0]["type"], "http.response.start")
+    Asserter.assert_equals(messages[0]["status"], 200)
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    Asserter.assert_equals(body, b"hello")